@@ -0,0 +1,23 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+from pathlib import Path
+
+fixtures_path = Path(__file__).parent / "fixtures"
+
+# 夹具名称及其对应的页面
+fixtures = {
+    "zqdc": "live.500.com/zqdc.php",
+    "yazhi": "odds.500.com/fenxi/yazhi-*.shtml",
+    "shuju": "odds.500.com/fenxi/shuju-*.shtml",
+    "shuju_zhanji": "odds.500.com/fenxi1/inc/shuju_zhanji*.php",
+    "team": "liansai.500.com/team/*",
+    "okooo": "www.okooo.com/livecenter/danchang",
+}
+
+
+def fixture_file(name: str) -> Path:
+    return fixtures_path / f"{name}.html"
+
+
+def read_fixture(name: str) -> str:
+    return fixture_file(name).read_text(encoding="utf-8")
@@ -0,0 +1,80 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+"""
+录制基准测试夹具
+
+随仓库提供的夹具是按解析器所用的选择器重建的页面，可使用本脚本以真实页面替换。
+
+用法：`python -m benchmarks.record --match-id a1210000 --team-id 1000`
+"""
+
+from typing import Annotated, Optional
+
+import requests
+import typer
+
+from benchmarks.fixtures import fixture_file
+from precise_bet import rprint
+from precise_bet.data.recent_results import (
+    parse_page,
+    plan_detailed_query,
+    request_detailed_recent_results,
+)
+from precise_bet.util import request_content, user_agents
+
+
+def write_fixture(name: str, text: str):
+    fixture_file(name).write_text(text, encoding="utf-8")
+    rprint(f"已保存夹具 [bold]{fixture_file(name)}[/bold]")
+
+
+def main(
+    match_id: Annotated[str, typer.Option(help="用于录制详细数据页面的比赛代号")],
+    team_id: Annotated[int, typer.Option(help="用于录制球队页面的球队代号")],
+    volume_number: Annotated[
+        Optional[int],
+        typer.Option("--volume-number", "-v", help="期号（默认为当前期）"),
+    ] = None,
+    request_trying_times: Annotated[int, typer.Option(help="请求尝试次数")] = 3,
+):
+    session = requests.Session()
+    ua = user_agents.random()
+
+    def get(url: str, encoding: str | None = None) -> str:
+        return request_content(
+            url, session, ua=ua, encoding=encoding, trying_times=request_trying_times
+        )
+
+    zqdc_url = "https://live.500.com/zqdc.php"
+    if volume_number:
+        zqdc_url += f"?e={volume_number}"
+    write_fixture("zqdc", get(zqdc_url, "gb2312"))
+
+    write_fixture(
+        "yazhi",
+        get(f"https://odds.500.com/fenxi/yazhi-{match_id[1:]}.shtml"),
+    )
+
+    shuju = get(f"https://odds.500.com/fenxi/shuju-{match_id[1:]}.shtml", "gb2312")
+    write_fixture("shuju", shuju)
+
+    query_hash, tables = parse_page(shuju)
+    write_fixture(
+        "shuju_zhanji",
+        request_detailed_recent_results(
+            match_id,
+            query_hash,
+            plan_detailed_query(tables[0]),
+            session,
+            ua,
+            request_trying_times,
+        ),
+    )
+
+    write_fixture("team", get(f"https://liansai.500.com/team/{team_id}"))
+
+    write_fixture("okooo", get("https://www.okooo.com/livecenter/danchang", "gb2312"))
+
+
+if __name__ == "__main__":
+    typer.run(main)
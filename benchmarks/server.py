@@ -0,0 +1,291 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+"""
+本地替身服务器
+
+以 `benchmarks/fixtures` 中的页面模拟 500.com 与澳客网的各页面，可注入延迟、503 突发与长时间无响应。
+配合全局选项 `--base-url` 使用，原地址的主机名作为路径的第一段：
+
+```
+python -m benchmarks.server --port 8500 --latency-median 80 --error-rate 0.02
+precise_bet --base-url http://127.0.0.1:8500 generate-data
+```
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Annotated
+
+import typer
+from rich.table import Table
+
+from benchmarks.fixtures import read_fixture
+from precise_bet import rprint
+
+
+@dataclass
+class Route:
+    name: str
+    pattern: re.Pattern
+    fixture: str | None
+    encoding: str
+
+
+routes = [
+    Route("home", re.compile(r"www\.500\.com/?"), None, "utf-8"),
+    Route("zqdc", re.compile(r"live\.500\.com/zqdc\.php"), "zqdc", "gb2312"),
+    Route(
+        "yazhi",
+        re.compile(r"odds\.500\.com/fenxi/yazhi-\d+\.shtml"),
+        "yazhi",
+        "utf-8",
+    ),
+    Route(
+        "shuju",
+        re.compile(r"odds\.500\.com/fenxi/shuju-\d+\.shtml"),
+        "shuju",
+        "gb2312",
+    ),
+    Route(
+        "shuju_zhanji",
+        re.compile(r"odds\.500\.com/fenxi1/inc/shuju_zhanji\w*\.php"),
+        "shuju_zhanji",
+        "utf-8",
+    ),
+    Route("team", re.compile(r"liansai\.500\.com/team/\d+/?"), "team", "utf-8"),
+    Route(
+        "okooo",
+        re.compile(r"www\.okooo\.com/livecenter/danchang/?"),
+        "okooo",
+        "gb2312",
+    ),
+]
+
+
+@dataclass
+class Faults:
+    """
+    故障注入配置
+
+    :param latency_median: 响应延迟中位数（毫秒），延迟服从对数正态分布
+    :param latency_sigma: 对数正态分布的形状参数，越大长尾越明显
+    :param error_rate: 每个请求开始一次 503 突发的概率
+    :param burst_length: 一次 503 突发持续的请求数
+    :param stall_rate: 请求长时间无响应的概率
+    :param stall_seconds: 无响应的时长（秒）
+    """
+
+    latency_median: float = 0
+    latency_sigma: float = 0.5
+    error_rate: float = 0
+    burst_length: int = 5
+    stall_rate: float = 0
+    stall_seconds: float = 30
+
+
+@dataclass
+class Stats:
+    start_time: float = field(default_factory=time.perf_counter)
+    requests: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    stalls: Counter = field(default_factory=Counter)
+    sent_bytes: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            elapsed = time.perf_counter() - self.start_time
+            total = sum(self.requests.values())
+            return {
+                "elapsed": elapsed,
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "stalls": dict(self.stalls),
+                "total": total,
+                "sent_bytes": self.sent_bytes,
+                "throughput": total / elapsed if elapsed else 0,
+            }
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], faults: Faults):
+        super().__init__(address, StandInHandler)
+        self.faults = faults
+        self.stats = Stats()
+        self.pages = {
+            route.name: (
+                read_fixture(route.fixture) if route.fixture else "<html></html>"
+            ).encode(route.encoding, errors="xmlcharrefreplace")
+            for route in routes
+        }
+        self._burst = 0
+        self._burst_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def in_burst(self) -> bool:
+        with self._burst_lock:
+            if self._burst == 0 and random.random() < self.faults.error_rate:
+                self._burst = self.faults.burst_length
+            if self._burst > 0:
+                self._burst -= 1
+                return True
+            return False
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self):
+        path = self.path.split("?", 1)[0].lstrip("/")
+        stats = self.server.stats
+
+        if path == "__stats__":
+            body = json.dumps(stats.snapshot()).encode("utf-8")
+            self.send_body(200, body, "application/json")
+            return
+
+        route = next((r for r in routes if r.pattern.fullmatch(path)), None)
+        if route is None:
+            self.send_body(404, b"not found", "text/plain")
+            return
+
+        faults = self.server.faults
+        with stats.lock:
+            stats.requests[route.name] += 1
+
+        if faults.latency_median > 0:
+            time.sleep(
+                random.lognormvariate(0, faults.latency_sigma)
+                * faults.latency_median
+                / 1000
+            )
+
+        if random.random() < faults.stall_rate:
+            with stats.lock:
+                stats.stalls[route.name] += 1
+            time.sleep(faults.stall_seconds)
+
+        if self.server.in_burst():
+            with stats.lock:
+                stats.errors[route.name] += 1
+            self.send_body(503, b"Service Unavailable", "text/plain")
+            return
+
+        body = self.server.pages[route.name]
+        with stats.lock:
+            stats.sent_bytes += len(body)
+        self.send_body(200, body, f"text/html; charset={route.encoding}")
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.handle_request()
+
+
+def stats_table(snapshot: dict) -> Table:
+    elapsed = snapshot["elapsed"]
+    table = Table("页面", "请求数", "503", "无响应", "请求/秒")
+    for name, count in sorted(snapshot["requests"].items()):
+        table.add_row(
+            name,
+            str(count),
+            str(snapshot["errors"].get(name, 0)),
+            str(snapshot["stalls"].get(name, 0)),
+            f"{count / elapsed:.2f}",
+        )
+    table.add_row(
+        "[bold]全部",
+        str(snapshot["total"]),
+        str(sum(snapshot["errors"].values())),
+        str(sum(snapshot["stalls"].values())),
+        f"{snapshot['throughput']:.2f}",
+    )
+    return table
+
+
+def main(
+    host: Annotated[str, typer.Option(help="监听地址")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="监听端口")] = 8500,
+    latency_median: Annotated[
+        float, typer.Option(help="响应延迟中位数（毫秒，服从对数正态分布）")
+    ] = 0,
+    latency_sigma: Annotated[
+        float, typer.Option(help="延迟分布的形状参数（越大长尾越明显）")
+    ] = 0.5,
+    error_rate: Annotated[
+        float, typer.Option(help="每个请求开始一次 503 突发的概率（0-1）")
+    ] = 0,
+    burst_length: Annotated[int, typer.Option(help="一次 503 突发持续的请求数")] = 5,
+    stall_rate: Annotated[
+        float, typer.Option(help="请求长时间无响应的概率（0-1）")
+    ] = 0,
+    stall_seconds: Annotated[float, typer.Option(help="无响应的时长（秒）")] = 30,
+    report_interval: Annotated[
+        int, typer.Option(help="报告吞吐量的间隔（秒，设为 0 则只在退出时报告）")
+    ] = 10,
+):
+    server = StandInServer(
+        (host, port),
+        Faults(
+            latency_median=latency_median,
+            latency_sigma=latency_sigma,
+            error_rate=error_rate,
+            burst_length=burst_length,
+            stall_rate=stall_rate,
+            stall_seconds=stall_seconds,
+        ),
+    )
+    server.start()
+    rprint(
+        f"替身服务器已在 [bold]{server.base_url}[/bold] 启动"
+        "（按下 [bold]Ctrl[/bold] + [bold]C[/bold] 停止）"
+    )
+
+    try:
+        while True:
+            time.sleep(report_interval or 3600)
+            if report_interval:
+                snapshot = server.stats.snapshot()
+                rprint(
+                    f"已处理 [bold]{snapshot['total']}[/bold] 个请求，"
+                    f"吞吐量 [bold]{snapshot['throughput']:.2f}[/bold] 请求/秒"
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        rprint(stats_table(server.stats.snapshot()))
+
+
+if __name__ == "__main__":
+    typer.run(main)
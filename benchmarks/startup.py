@@ -0,0 +1,171 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+"""
+启动耗时基准测试
+
+对每个子命令分别启动一次新进程，记录总耗时、导入耗时以及加载了哪些重量级依赖。
+
+用法：`python -m benchmarks.startup --repeat 5 --output startup.json`
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+from rich.table import Table
+
+from precise_bet import rprint
+
+heavy_modules = [
+    "pandas",
+    "bs4",
+    "openpyxl",
+    "tkinter",
+    "fake_useragent",
+    "requests",
+]
+
+commands = {
+    "about": ["about"],
+    "print-match-status-codes": ["print-match-status-codes"],
+    "generate-data": ["generate-data", "--help"],
+    "update": ["update", "--help"],
+    "export": ["export", "--help"],
+    "flow": ["flow", "--help"],
+    "gui": ["gui", "--help"],
+    "okooo": ["okooo", "--help"],
+    "watch": ["watch", "--help"],
+}
+
+
+def parse_import_time(stderr: str) -> tuple[float, set[str]]:
+    """
+    解析 `-X importtime` 的输出
+
+    :return: 顶层导入的累计耗时（秒），以及导入过的顶层包
+    """
+
+    total = 0
+    packages = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        packages.add(name.strip().split(".")[0])
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1_000_000, packages
+
+
+def measure(arguments: list[str], project_path: Path) -> tuple[float, float, set[str]]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "precise_bet.main"]
+        + ["-p", str(project_path)]
+        + arguments,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"命令 {arguments} 执行失败：\n{result.stderr[-2000:]}")
+    import_time, packages = parse_import_time(result.stderr)
+    return wall, import_time, packages
+
+
+def measure_user_agent() -> dict[str, float]:
+    """
+    测量 UA 的获取耗时（秒，均在新进程中测量，包括导入 fake_useragent）
+
+    :return: 每次构造 `UserAgent` 的耗时、UA 池首次加载的耗时及之后单次获取的耗时
+    """
+
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "from fake_useragent import UserAgent\n"
+        "UserAgent(platforms=['desktop']).random\n"
+        "construct = time.perf_counter() - start\n"
+        "from precise_bet.util.user_agent import UserAgentPool\n"
+        "pool = UserAgentPool()\n"
+        "start = time.perf_counter()\n"
+        "pool.random()\n"
+        "load = time.perf_counter() - start\n"
+        "start = time.perf_counter()\n"
+        "for _ in range(10000): pool.random()\n"
+        "get = (time.perf_counter() - start) / 10000\n"
+        "print(construct, load, get)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    construct, load, get = map(float, result.stdout.split())
+    return {"construct": construct, "pool_load": load, "pool_get": get}
+
+
+def main(
+    repeat: Annotated[int, typer.Option(help="每个子命令的重复次数")] = 5,
+    output: Annotated[
+        Optional[Path], typer.Option(help="将结果以 JSON 格式写入指定文件")
+    ] = None,
+):
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        project_path = Path(directory)
+        for name, arguments in commands.items():
+            samples = [measure(arguments, project_path) for _ in range(repeat)]
+            results[name] = {
+                "wall": statistics.median(sample[0] for sample in samples),
+                "import": statistics.median(sample[1] for sample in samples),
+                "heavy_modules": [
+                    module for module in heavy_modules if module in samples[0][2]
+                ],
+            }
+
+    user_agent_samples = [measure_user_agent() for _ in range(repeat)]
+    user_agent = {
+        key: statistics.median(sample[key] for sample in user_agent_samples)
+        for key in user_agent_samples[0]
+    }
+
+    table = Table("子命令", "总耗时（毫秒）", "导入耗时（毫秒）", "重量级依赖")
+    for name, result in results.items():
+        table.add_row(
+            name,
+            f"{result['wall'] * 1000:.0f}",
+            f"{result['import'] * 1000:.0f}",
+            ", ".join(result["heavy_modules"]) or "-",
+        )
+    rprint(table)
+    rprint(
+        f"每次构造 UserAgent 耗时：[bold]{user_agent['construct'] * 1000:.1f}[/bold] 毫秒，"
+        f"UA 池首次加载耗时：[bold]{user_agent['pool_load'] * 1000:.1f}[/bold] 毫秒，"
+        f"UA 池单次获取耗时：[bold]{user_agent['pool_get'] * 1_000_000:.2f}[/bold] 微秒"
+    )
+
+    if output:
+        output.write_text(
+            json.dumps(
+                {
+                    "time": time.time(),
+                    "python": sys.version,
+                    "commands": results,
+                    "user_agent": user_agent,
+                },
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
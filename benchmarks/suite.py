@@ -0,0 +1,262 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+"""
+离线基准测试
+
+使用 `benchmarks/fixtures` 中保存的页面测试各解析器、数据表读写及各导出格式，报告每秒操作数与峰值内存。
+
+用法：`python -m benchmarks.suite --min-time 1 --output suite.json`
+"""
+
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Annotated, Callable, Optional
+
+import typer
+from bs4 import BeautifulSoup
+from rich.table import Table
+
+from benchmarks.fixtures import read_fixture
+from precise_bet import rprint, stdout_console
+from precise_bet.cli.export import ExportFileFormats, export
+from precise_bet.cli.okooo import parse as parse_okooo
+from precise_bet.data import parse_table
+from precise_bet.data.handicap import parse_handicap
+from precise_bet.data.recent_results import parse_page
+from precise_bet.data.recent_results import parse_table as parse_recent_results
+from precise_bet.data.value import parse_team_value
+from precise_bet.type import (
+    AverageEuropeOddTable,
+    DataTable,
+    HandicapTable,
+    LeagueTable,
+    RecentResultsTable,
+    ScoreTable,
+    SpTable,
+    TeamTable,
+    ValueTable,
+    compact_dtypes,
+)
+from precise_bet.type import read_tables as read_tables_in_parallel
+from precise_bet.type import save_tables as save_tables_in_parallel
+
+project_tables = [
+    DataTable,
+    ScoreTable,
+    ValueTable,
+    HandicapTable,
+    RecentResultsTable,
+    SpTable,
+    AverageEuropeOddTable,
+    LeagueTable,
+    TeamTable,
+]
+
+
+@dataclass
+class Result:
+    name: str
+    rounds: int
+    ops_per_second: float
+    mean: float
+    peak_memory: int
+    # 执行结束后返回值仍占用的内存，如读取的数据表
+    retained_memory: int
+
+
+def run(name: str, func: Callable[[], object], min_time: float) -> Result:
+    """重复执行 `func` 至少 `min_time` 秒，再单独执行一次以测量峰值内存及返回值占用的内存"""
+
+    func()
+
+    rounds = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        rounds += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()
+    returned = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del returned
+
+    return Result(name, rounds, rounds / elapsed, elapsed / rounds, peak, retained)
+
+
+def benchmarks(project_path: Path, work_path: Path) -> dict[str, Callable[[], object]]:
+    zqdc = read_fixture("zqdc")
+    yazhi = read_fixture("yazhi")
+    shuju = read_fixture("shuju")
+    shuju_zhanji = read_fixture("shuju_zhanji")
+    team = read_fixture("team")
+    okooo = read_fixture("okooo")
+
+    parse_path = work_path / "parse"
+    parse_path.mkdir()
+
+    def recent_results():
+        _, tables = parse_page(shuju)
+        return [parse_recent_results(table) for table in tables]
+
+    def read_tables():
+        return [table(project_path).read() for table in project_tables]
+
+    def read_tables_compact():
+        with compact_dtypes():
+            return read_tables()
+
+    loaded = read_tables()
+    save_path = work_path / "save"
+    save_path.mkdir()
+
+    def save_tables():
+        for table in loaded:
+            table.save_to_dir(save_path)
+
+    # 内容与 `loaded` 相同，但保存到 `save_path`，以免修改项目中的文件
+    relocated = read_tables()
+    for table in relocated:
+        table.project_path = save_path
+
+    ctx = SimpleNamespace(obj={"project_path": project_path})
+
+    def export_format(file_format: ExportFileFormats, compact: bool = False):
+        return lambda: export(
+            ctx,
+            file_name=f"benchmark/{file_format.name}",
+            file_format=[file_format.value],
+            compact=compact,
+        )
+
+    result = {
+        "parse.zqdc": lambda: parse_table(parse_path, zqdc),
+        "parse.yazhi": lambda: parse_handicap(yazhi),
+        "parse.shuju": recent_results,
+        "parse.shuju_zhanji": lambda: parse_recent_results(
+            BeautifulSoup(shuju_zhanji, "html.parser")
+        ),
+        "parse.team": lambda: parse_team_value(team),
+        "parse.okooo": lambda: parse_okooo(parse_path, okooo),
+        "table.read": read_tables,
+        # 峰值内存与保留内存可与 `table.read` 对比
+        "table.read.compact": read_tables_compact,
+        "table.save": save_tables,
+        # 墙上时间可与 `table.read`、`table.save` 对比
+        "table.read.parallel": lambda: read_tables_in_parallel(
+            project_path, project_tables
+        ),
+        "table.save.parallel": lambda: save_tables_in_parallel(*relocated),
+    }
+    for file_format in ExportFileFormats:
+        result[f"export.{file_format.name}"] = export_format(file_format)
+    result["export.special.compact"] = export_format(ExportFileFormats.special, True)
+    # 一次导出全部格式，与分别导出各格式的耗时之和对比
+    result["export.all"] = lambda: export(
+        ctx,
+        file_name="benchmark/all",
+        file_format=[file_format.value for file_format in ExportFileFormats],
+    )
+    return result
+
+
+def create_project(project_path: Path):
+    """以夹具生成一个项目，并以详细数据页面的解析结果填充各场比赛的详细数据"""
+
+    data_set = parse_table(project_path, read_fixture("zqdc"))
+
+    handicap = parse_handicap(read_fixture("yazhi"))
+    team_value = parse_team_value(read_fixture("team"))
+    _, tables = parse_page(read_fixture("shuju"))
+    recent_results = []
+    for table in tables:
+        result = parse_recent_results(table)
+        recent_results += result + ["unknown"] * (3 - len(result))
+
+    for match_id, status in data_set.data[DataTable.match_status].items():
+        data_set.value.update_from_list(match_id, [team_value] * 2, status)
+        data_set.handicap.update_from_list(match_id, handicap, status)
+        data_set.recent_results.update_from_list(match_id, recent_results, status)
+
+    data_set.save()
+
+
+def main(
+    min_time: Annotated[
+        float, typer.Option(help="每项基准测试的最短运行时间（秒）")
+    ] = 1.0,
+    only: Annotated[
+        Optional[str], typer.Option(help="只运行名称包含该字符串的基准测试")
+    ] = None,
+    project: Annotated[
+        Optional[Path],
+        typer.Option(help="用于数据表读写与导出的项目路径（默认以夹具生成）"),
+    ] = None,
+    output: Annotated[
+        Optional[Path], typer.Option(help="将结果以 JSON 格式写入指定文件")
+    ] = None,
+):
+    results: list[Result] = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        work_path = Path(directory)
+        project_path = work_path / "project"
+        if project:
+            shutil.copytree(project, project_path)
+        else:
+            project_path.mkdir()
+            stdout_console.quiet = True
+            create_project(project_path)
+            stdout_console.quiet = False
+
+        for name, func in benchmarks(project_path, work_path).items():
+            if only and only not in name:
+                continue
+            rprint(f"正在运行 [bold]{name}[/bold] ...")
+            stdout_console.quiet = True
+            try:
+                results.append(run(name, func, min_time))
+            finally:
+                stdout_console.quiet = False
+
+    table = Table(
+        "基准测试",
+        "轮数",
+        "每秒操作数",
+        "平均耗时（毫秒）",
+        "峰值内存（MiB）",
+        "保留内存（MiB）",
+    )
+    for result in results:
+        table.add_row(
+            result.name,
+            str(result.rounds),
+            f"{result.ops_per_second:.2f}",
+            f"{result.mean * 1000:.2f}",
+            f"{result.peak_memory / 1024 / 1024:.2f}",
+            f"{result.retained_memory / 1024 / 1024:.2f}",
+        )
+    rprint(table)
+
+    if output:
+        output.write_text(
+            json.dumps(
+                {"time": time.time(), "results": [asdict(r) for r in results]},
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
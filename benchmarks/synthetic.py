@@ -0,0 +1,382 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+"""
+生成合成项目
+
+按 `precise_bet/type/table.py` 中各数据表的列定义生成 N 期 × M 场比赛的项目，
+用于在数倍于实际规模的数据上测试数据表读写、`update` 的比赛筛选和 `export`。
+
+用法：`python -m benchmarks.synthetic <项目路径> --volumes 1000 --matches 200`
+
+生成的项目可传给 `python -m benchmarks.suite --project <项目路径>`。
+"""
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Annotated, Any, Optional
+
+import numpy as np
+import pandas as pd
+import typer
+from rich.table import Table
+
+from precise_bet import rprint
+from precise_bet.data import save_to_csv
+from precise_bet.type import (
+    AverageEuropeOddTable,
+    Column,
+    DataTable,
+    HandicapTable,
+    LeagueTable,
+    ProjectTable,
+    RecentResultsTable,
+    ScoreTable,
+    SpTable,
+    TeamTable,
+    ValueTable,
+)
+
+handicap_names = [
+    "平手",
+    "平手/半球",
+    "半球",
+    "半球/一球",
+    "一球",
+    "一球/球半",
+    "球半",
+    "受平手/半球",
+    "受半球",
+    "受半球/一球",
+    "受一球",
+]
+league_colors = ["#FF3333", "#006633", "#0066FF", "#CC3300", "#990099", "#999900"]
+recent_results = np.array(["win", "draw", "lose", "unknown"])
+
+# 每期比赛分布的时间跨度与相邻两期的间隔（秒）
+volume_span = 2 * 24 * 3600
+volume_interval = 3 * 24 * 3600
+
+
+def write_table(
+    table: type[ProjectTable],
+    project_path: Path,
+    index: Any,
+    columns: dict[Column, Any],
+):
+    """
+    按数据表的列定义写入一张数据表
+
+    :param table: 数据表类
+    :param project_path: 项目路径
+    :param index: 索引列的值
+    :param columns: 其余各列的值，须覆盖数据表的全部列
+    """
+
+    missing = [
+        column.name
+        for column in table.table_columns()
+        if column != table.index_ and column not in columns
+    ]
+    if missing:
+        raise KeyError(f"在生成数据表 {table.name_} 时，缺少列：{', '.join(missing)}")
+
+    index = pd.Index(index, name=table.index_.name, dtype=table.index_.type)
+    frame = pd.DataFrame(
+        {
+            column.name: pd.Series(
+                columns[column], index=index, dtype=column.type, copy=False
+            )
+            for column in table.table_columns()
+            if column != table.index_
+        },
+        index=index,
+    )
+    save_to_csv(frame, project_path, table.name_)
+
+
+def generate(
+    project_path: Path,
+    volumes: int,
+    matches: int,
+    leagues: int = 40,
+    teams_per_league: int = 20,
+    first_volume: int = 25001,
+    seed: int = 0,
+    now: float | None = None,
+):
+    """
+    生成合成项目
+
+    最后一期的比赛分布在 `now` 前后，其中部分比赛进行中或未开始，其余各期均已结束。
+
+    :param project_path: 项目路径
+    :param volumes: 期数
+    :param matches: 每期比赛数
+    :param leagues: 赛事数
+    :param teams_per_league: 每项赛事的球队数
+    :param first_volume: 第一期的期号
+    :param seed: 随机数种子
+    :param now: 当前时间戳（默认为当前时间）
+    """
+
+    rng = np.random.default_rng(seed)
+    now = now if now is not None else datetime.now().timestamp()
+    count = volumes * matches
+
+    # 比赛
+    volume_index = np.repeat(np.arange(volumes), matches)
+    match_ids = np.char.add("a", (1000000 + np.arange(count)).astype(str))
+    volume_start = now - (volumes - 1) * volume_interval - volume_span / 2
+    match_time = (
+        volume_start
+        + volume_index * volume_interval
+        + np.sort(rng.integers(0, volume_span, (volumes, matches)), axis=1).ravel()
+    ).astype(np.int64)
+    match_time -= match_time % 300
+
+    league_ids = np.array([f"league-{i}" for i in range(leagues)])
+    match_league = rng.integers(0, leagues, count)
+    host_offset = rng.integers(0, teams_per_league, count)
+    guest_offset = (
+        host_offset + rng.integers(1, teams_per_league, count)
+    ) % teams_per_league
+    host_id = 1000 + match_league * teams_per_league + host_offset
+    guest_id = 1000 + match_league * teams_per_league + guest_offset
+
+    team_ids = 1000 + np.arange(leagues * teams_per_league)
+    team_names = np.char.add("球队", team_ids.astype(str))
+    concede = rng.choice(np.array(["", "(+1)", "(-1)"]), count, p=[0.5, 0.25, 0.25])
+
+    elapsed = now - match_time
+    status = np.select(
+        [elapsed < 0, elapsed < 45 * 60, elapsed < 60 * 60, elapsed < 105 * 60],
+        [0, 1, 2, 3],
+        4,
+    )
+    # 少量已结束的比赛被取消或改期
+    cancelled = (status == 4) & (rng.random(count) < 0.01)
+    status[cancelled] = rng.choice([5, 6], cancelled.sum())
+    finished = status == 4
+    played = np.isin(status, [2, 3, 4])
+
+    host_score = np.where(finished, rng.poisson(1.4, count), 0)
+    guest_score = np.where(finished, rng.poisson(1.1, count), 0)
+    half_score = np.where(
+        played,
+        np.char.add(
+            np.char.add(rng.integers(0, 3, count).astype(str), " - "),
+            rng.integers(0, 3, count).astype(str),
+        ),
+        "-",
+    )
+
+    updated_time = np.minimum(match_time + 2 * 3600, now).astype(float)
+
+    write_table(
+        DataTable,
+        project_path,
+        match_ids,
+        {
+            DataTable.volume_number: first_volume + volume_index,
+            DataTable.match_number: np.tile(np.arange(1, matches + 1), volumes),
+            DataTable.league_id: league_ids[match_league],
+            DataTable.round_number: np.char.add(
+                np.char.add("第", rng.integers(1, 39, count).astype(str)), "轮"
+            ),
+            DataTable.match_time: match_time,
+            DataTable.match_status: status,
+            DataTable.host_id: host_id,
+            DataTable.host_name: np.char.add(team_names[host_id - 1000], concede),
+            DataTable.guest_id: guest_id,
+            DataTable.guest_name: team_names[guest_id - 1000],
+            DataTable.half_score: half_score,
+            DataTable.handicap_name: rng.choice(handicap_names, count),
+        },
+    )
+
+    write_table(
+        ScoreTable,
+        project_path,
+        match_ids,
+        {
+            ScoreTable.host_score: host_score,
+            ScoreTable.guest_score: guest_score,
+            ScoreTable.updated_time: updated_time,
+            ScoreTable.updated_match_status: status,
+        },
+    )
+
+    # 详细数据：最后一期中未开始的比赛部分尚未获取
+    fetched = ~(
+        (volume_index == volumes - 1) & (status == 0) & (rng.random(count) < 0.5)
+    )
+    fetched_time = np.where(fetched, updated_time, -1.0)
+    fetched_status = np.where(fetched, status, -1)
+
+    team_value = rng.integers(500, 120000, len(team_ids))
+
+    write_table(
+        ValueTable,
+        project_path,
+        match_ids,
+        {
+            ValueTable.host_value: np.where(fetched, team_value[host_id - 1000], None),
+            ValueTable.guest_value: np.where(
+                fetched, team_value[guest_id - 1000], None
+            ),
+            ValueTable.updated_time: fetched_time,
+            ValueTable.updated_match_status: fetched_status,
+        },
+    )
+
+    handicap = rng.choice(np.arange(-2.5, 2.75, 0.25), count)
+    water = rng.uniform(0.7, 1.15, (4, count)).round(3)
+    write_table(
+        HandicapTable,
+        project_path,
+        match_ids,
+        {
+            HandicapTable.live_average_water1: np.where(fetched, water[0], None),
+            HandicapTable.live_average_handicap: np.where(fetched, handicap, None),
+            HandicapTable.live_average_water2: np.where(fetched, water[1], None),
+            HandicapTable.early_average_water1: np.where(fetched, water[2], None),
+            HandicapTable.early_average_handicap: np.where(
+                fetched, handicap + rng.choice([-0.25, 0, 0, 0.25], count), None
+            ),
+            HandicapTable.early_average_water2: np.where(fetched, water[3], None),
+            HandicapTable.updated_time: fetched_time,
+            HandicapTable.updated_match_status: fetched_status,
+        },
+    )
+
+    codes = np.array([RecentResultsTable.codes_.index(i) for i in recent_results])
+    results = codes[
+        rng.choice(
+            4,
+            (len(RecentResultsTable.result_columns()), count),
+            p=[0.4, 0.25, 0.3, 0.05],
+        )
+    ]
+    packed = RecentResultsTable.pack(np.where(fetched, results, 0).T)
+    write_table(
+        RecentResultsTable,
+        project_path,
+        match_ids,
+        {
+            **{
+                column: packed[:, i]
+                for i, column in enumerate(RecentResultsTable.class_columns())
+            },
+            RecentResultsTable.updated_time: fetched_time,
+            RecentResultsTable.updated_match_status: fetched_status,
+        },
+    )
+
+    # 赔率：约 85% 的比赛有让球 SP
+    odds = rng.uniform(1.2, 12, (3, count)).round(2)
+    write_table(
+        AverageEuropeOddTable,
+        project_path,
+        match_ids,
+        {
+            AverageEuropeOddTable.win: odds[0],
+            AverageEuropeOddTable.draw: odds[1],
+            AverageEuropeOddTable.lose: odds[2],
+            AverageEuropeOddTable.updated_time: updated_time,
+            AverageEuropeOddTable.updated_match_status: status,
+        },
+    )
+
+    has_sp = rng.random(count) < 0.85
+    sp = rng.uniform(1.2, 12, (3, has_sp.sum())).round(2)
+    write_table(
+        SpTable,
+        project_path,
+        match_ids[has_sp],
+        {
+            SpTable.win: sp[0],
+            SpTable.draw: sp[1],
+            SpTable.lose: sp[2],
+            SpTable.updated_time: updated_time[has_sp],
+            SpTable.updated_match_status: status[has_sp],
+        },
+    )
+
+    write_table(
+        LeagueTable,
+        project_path,
+        league_ids,
+        {
+            LeagueTable.name: np.char.add("赛事", np.arange(leagues).astype(str)),
+            LeagueTable.color: rng.choice(league_colors, leagues),
+            LeagueTable.type: rng.choice(["league", "cup", "unknown"], leagues),
+        },
+    )
+
+    team_fetched = rng.random(len(team_ids)) < 0.8
+    write_table(
+        TeamTable,
+        project_path,
+        team_ids,
+        {
+            TeamTable.name: team_names,
+            TeamTable.value: np.where(team_fetched, team_value, None),
+            TeamTable.updated_time: np.where(team_fetched, now, -1.0),
+        },
+    )
+
+
+def main(
+    project_path: Annotated[Path, typer.Argument(help="生成的项目路径")],
+    volumes: Annotated[int, typer.Option(help="期数")] = 100,
+    matches: Annotated[int, typer.Option(help="每期比赛数")] = 200,
+    leagues: Annotated[int, typer.Option(help="赛事数")] = 40,
+    teams_per_league: Annotated[int, typer.Option(help="每项赛事的球队数")] = 20,
+    first_volume: Annotated[int, typer.Option(help="第一期的期号")] = 25001,
+    seed: Annotated[int, typer.Option(help="随机数种子")] = 0,
+    now: Annotated[
+        Optional[float], typer.Option(help="当前时间戳（默认为当前时间）")
+    ] = None,
+):
+    if project_path.exists() and any(project_path.iterdir()):
+        rprint(f"[bold red]目录 {project_path} 不为空")
+        raise typer.Exit(1)
+
+    start = time.perf_counter()
+    generate(
+        project_path,
+        volumes,
+        matches,
+        leagues=leagues,
+        teams_per_league=teams_per_league,
+        first_volume=first_volume,
+        seed=seed,
+        now=now,
+    )
+    elapsed = time.perf_counter() - start
+
+    table = Table("数据表", "行数", "文件大小（MiB）")
+    for table_class in [
+        DataTable,
+        ScoreTable,
+        ValueTable,
+        HandicapTable,
+        RecentResultsTable,
+        SpTable,
+        AverageEuropeOddTable,
+        LeagueTable,
+        TeamTable,
+    ]:
+        file = table_class(project_path).file
+        with open(file, encoding="utf-8") as f:
+            rows = sum(1 for _ in f) - 1
+        table.add_row(
+            table_class.name_, str(rows), f"{file.stat().st_size / 1024 / 1024:.2f}"
+        )
+    rprint(table)
+    rprint(f"[bold green]已在 {elapsed:.2f} 秒内生成 {volumes * matches} 场比赛")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,155 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+"""
+端到端吞吐量测试
+
+启动本地替身服务器，在临时项目上依次以子进程运行各命令，报告每个命令的耗时与达到的请求吞吐量。
+
+用法：`python -m benchmarks.throughput --latency-median 80 --error-rate 0.02`
+"""
+
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+from rich.table import Table
+
+from benchmarks.server import Faults, StandInServer, stats_table
+from precise_bet import rprint
+
+repository_path = Path(__file__).parent.parent
+
+default_commands = [
+    "generate-data",
+    "update value -i 0 -r 0 -b 0 --status e --request-trying-times 10",
+    "update handicap -i 0 -r 0 -b 0 --status e --request-trying-times 10",
+    "update recent_results -i 0 -r 0 -b 0 --status e --request-trying-times 10",
+]
+
+
+def main(
+    command: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            "--command",
+            "-c",
+            help="要运行的命令（可多次指定，默认依次生成数据并更新全部数据类型）",
+        ),
+    ] = None,
+    global_option: Annotated[
+        Optional[list[str]],
+        typer.Option(help="附加的全局选项（如 `--hedge-percentile 95`）"),
+    ] = None,
+    project: Annotated[
+        Optional[Path], typer.Option(help="项目路径（默认使用临时目录）")
+    ] = None,
+    latency_median: Annotated[
+        float, typer.Option(help="响应延迟中位数（毫秒，服从对数正态分布）")
+    ] = 0,
+    latency_sigma: Annotated[float, typer.Option(help="延迟分布的形状参数")] = 0.5,
+    error_rate: Annotated[
+        float, typer.Option(help="每个请求开始一次 503 突发的概率（0-1）")
+    ] = 0,
+    burst_length: Annotated[int, typer.Option(help="一次 503 突发持续的请求数")] = 5,
+    stall_rate: Annotated[
+        float, typer.Option(help="请求长时间无响应的概率（0-1）")
+    ] = 0,
+    stall_seconds: Annotated[float, typer.Option(help="无响应的时长（秒）")] = 30,
+    verbose: Annotated[bool, typer.Option(help="显示命令输出")] = False,
+    output: Annotated[
+        Optional[Path], typer.Option(help="将结果以 JSON 格式写入指定文件")
+    ] = None,
+):
+    server = StandInServer(
+        ("127.0.0.1", 0),
+        Faults(
+            latency_median=latency_median,
+            latency_sigma=latency_sigma,
+            error_rate=error_rate,
+            burst_length=burst_length,
+            stall_rate=stall_rate,
+            stall_seconds=stall_seconds,
+        ),
+    )
+    server.start()
+    rprint(f"替身服务器已在 [bold]{server.base_url}[/bold] 启动")
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(repository_path)] + env.get("PYTHONPATH", "").split(os.pathsep)
+    )
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        project_path = project or Path(directory) / "project"
+        prefix = [
+            sys.executable,
+            "-m",
+            "precise_bet.main",
+            "--base-url",
+            server.base_url,
+            "--project-path",
+            str(project_path),
+        ]
+        for option in global_option or []:
+            prefix += shlex.split(option)
+
+        for line in command or default_commands:
+            rprint(f"正在运行 [bold]{line}[/bold] ...")
+            before = server.stats.snapshot()
+            start = time.perf_counter()
+            process = subprocess.run(
+                prefix + shlex.split(line),
+                env=env,
+                stdout=None if verbose else subprocess.DEVNULL,
+                stderr=None if verbose else subprocess.DEVNULL,
+            )
+            elapsed = time.perf_counter() - start
+            after = server.stats.snapshot()
+            requests = after["total"] - before["total"]
+            results.append(
+                {
+                    "command": line,
+                    "return_code": process.returncode,
+                    "elapsed": elapsed,
+                    "requests": requests,
+                    "errors": sum(after["errors"].values())
+                    - sum(before["errors"].values()),
+                    "throughput": requests / elapsed,
+                }
+            )
+
+    server.shutdown()
+
+    table = Table("命令", "返回值", "耗时（秒）", "请求数", "503", "请求/秒")
+    for result in results:
+        table.add_row(
+            result["command"],
+            str(result["return_code"]),
+            f"{result['elapsed']:.2f}",
+            str(result["requests"]),
+            str(result["errors"]),
+            f"{result['throughput']:.2f}",
+        )
+    rprint(table)
+    rprint(stats_table(server.stats.snapshot()))
+
+    if output:
+        output.write_text(
+            json.dumps(
+                {"time": time.time(), "results": results}, ensure_ascii=False, indent=2
+            ),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,12 +1,116 @@
 #  Copyright (C) 2023  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+import json
+import sys
+import time
+
 from rich.console import Console
+from rich.errors import MarkupError
+from rich.text import Text
 
 from .info import __author__, __copyright__, __version__
+from .profiling import profiler
 
 stdout_console = Console()
-rprint = stdout_console.print
-rule = stdout_console.rule
-
 stderr_console = Console(stderr=True)
-rprint_err = stderr_console.print
+
+log_levels = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+_log_level = log_levels["debug"]
+_json_lines = False
+_pending: list[str] = []
+
+
+def configure_output(log_level: str | None = None, log_format: str = "rich"):
+    """
+    配置控制台输出
+
+    :param log_level: 最低输出级别，为 `None` 时 rich 模式输出全部信息，JSON Lines 模式只输出 `info` 及以上级别
+    :param log_format: `rich`、`json`，或 `auto`（标准输出为终端时使用 rich，否则使用 JSON Lines）
+    """
+
+    global _log_level, _json_lines
+    _json_lines = log_format == "json" or (
+        log_format == "auto" and not stdout_console.is_terminal
+    )
+    if log_level is None:
+        log_level = "info" if _json_lines else "debug"
+    _log_level = log_levels[log_level]
+
+
+def is_json_lines() -> bool:
+    return _json_lines
+
+
+def _plain(text: str) -> str:
+    try:
+        return Text.from_markup(text).plain
+    except MarkupError:
+        return text
+
+
+def _write_json(record: dict, file=None):
+    def default(o):
+        return o.item() if hasattr(o, "item") else str(o)
+
+    (file or sys.stdout).write(
+        json.dumps(record, ensure_ascii=False, default=default) + "\n"
+    )
+
+
+def _emit(level: str, objects: tuple, end: str, file=None):
+    for o in objects:
+        if isinstance(o, str):
+            _pending.append(_plain(o))
+        else:
+            # rich 的表格等渲染对象无法表示为一行 JSON，输出到标准错误，不混入标准输出的 JSON Lines；
+            # 命令的主要结果（如查询结果）应由命令另行以 `event` 输出
+            stderr_console.print(o)
+    if end == "":
+        return
+    message = "".join(_pending).strip()
+    _pending.clear()
+    if message:
+        _write_json({"time": time.time(), "level": level, "message": message}, file)
+
+
+def rprint(*objects, level: str = "info", **kwargs):
+    """输出信息；JSON Lines 模式下每条信息输出为一行 JSON"""
+
+    if log_levels[level] < _log_level:
+        return
+    with profiler.phase("render"):
+        if _json_lines:
+            _emit(level, objects, kwargs.get("end", "\n"))
+        else:
+            stdout_console.print(*objects, **kwargs)
+
+
+def rule(title: str = "", level: str = "info", **kwargs):
+    if log_levels[level] < _log_level:
+        return
+    with profiler.phase("render"):
+        if _json_lines:
+            _emit(level, (title,), "\n")
+        else:
+            stdout_console.rule(title, **kwargs)
+
+
+def rprint_err(*objects, **kwargs):
+    if _json_lines:
+        _emit("error", tuple(str(o) for o in objects), "\n", sys.stderr)
+    else:
+        stderr_console.print(*objects, **kwargs)
+
+
+def event(name: str, level: str = "info", **fields):
+    """
+    输出一条结构化事件
+
+    只在 JSON Lines 模式下输出，rich 模式下相应的信息由 `rprint` 输出。
+    """
+
+    if not _json_lines or log_levels[level] < _log_level:
+        return
+    with profiler.phase("render"):
+        _write_json({"time": time.time(), "level": level, "event": name, **fields})
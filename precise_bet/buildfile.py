@@ -18,7 +18,12 @@ datas = [('../LICENSE', '.')]
 datas += collect_data_files('fake_useragent')
 
 a = Analysis(
-    ['main.py'], pathex=[], binaries=[], datas=datas, hiddenimports=['shellingham.nt', 'shellingham.posix', 'tabulate'],
+    ['main.py'], pathex=[], binaries=[], datas=datas, hiddenimports=[
+        'shellingham.nt', 'shellingham.posix', 'tabulate',
+        # 子命令在 `main.py` 中按需导入，需显式声明
+        'precise_bet.cli.export', 'precise_bet.cli.flow', 'precise_bet.cli.generate_data', 'precise_bet.cli.gui',
+        'precise_bet.cli.okooo', 'precise_bet.cli.query', 'precise_bet.cli.update', 'precise_bet.cli.watch'
+    ],
     hookspath=[], hooksconfig={}, runtime_hooks=[], excludes=[], noarchive=False
 )
 
@@ -1,8 +1,3 @@
 #  Copyright (C) 2024  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
-from .export import export
-from .flow import flow
-from .generate_data import generate_data
-from .gui import gui
-from .okooo import okooo
-from .update import update
+# 子命令由 `main.py` 按需导入，以免启动时加载全部依赖
@@ -1,28 +1,32 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
 import inspect
-import re
+import io
 from abc import ABC
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from typing import Annotated, Optional
 
+import numpy as np
 import pandas as pd
 import typer
-from openpyxl.worksheet.worksheet import Worksheet
 from rich.prompt import Confirm
 
 from precise_bet import rprint, stdout_console
-from precise_bet.data import save_message, save_to_csv, save_to_html
+from precise_bet.data import ExportView, save
 from precise_bet.type import (
     AverageEuropeOddTable,
     DataTable,
+    ExportViewTable,
     HandicapTable,
     LeagueTable,
     RecentResultsTable,
-    ScoreTable,
     ValueTable,
+    compact_dtypes,
     match_status_dict,
 )
 from precise_bet.type.table import SpTable
@@ -100,6 +104,10 @@ def formats_parser(value: str | ExportFileFormat) -> ExportFileFormat:
         raise typer.BadParameter(f"不支持的文件格式：{value}")
 
 
+def parse_formats(value: str) -> list[ExportFileFormat]:
+    return [formats_parser(f.strip()) for f in value.split(",") if f.strip()]
+
+
 def export(
     ctx: typer.Context,
     file_name: Annotated[
@@ -109,15 +117,14 @@ def export(
         Optional[str], typer.Option("--file-name-suffix", "-s", help="导出文件名后缀")
     ] = None,
     file_format: Annotated[
-        ExportFileFormat,
+        Optional[list[ExportFileFormat]],
         typer.Option(
             "--file-format",
             "-f",
-            help="导出文件格式",
-            prompt="请输入文件格式",
+            help="导出文件格式（可多次指定，数据只需整合一次；不指定时询问）",
             parser=formats_parser,
         ),
-    ] = ExportFileFormats.csv.value,
+    ] = None,
     volume_number: Annotated[
         Optional[int], typer.Option("--volume-number", "-v", help="期号")
     ] = None,
@@ -125,15 +132,74 @@ def export(
         Optional[str],
         typer.Option("--match-number-range", "-r", help="场次范围（如 1-3）"),
     ] = None,
+    compact: Annotated[
+        bool,
+        typer.Option(
+            help="以紧凑的类型读取数据（整数比赛代号、分类名称、32 位浮点赔率），减少内存占用"
+        ),
+    ] = False,
 ):
     """导出数据"""
 
     project_path: Path = ctx.obj["project_path"]
 
+    if not file_format:
+        file_format = typer.prompt(
+            "请输入文件格式（多个格式以逗号分隔）",
+            default="csv",
+            value_proc=parse_formats,
+        )
+    file_formats = list(dict.fromkeys(file_format))
+
     if file_name_suffix:
         file_name += file_name_suffix
 
-    save_path = project_path / f"{file_name}{file_format.extension}"
+    # 扩展名相同的格式（如 `excel` 与 `special`）在文件名后附加格式名称以免相互覆盖
+    extensions = Counter(f.extension for f in file_formats)
+    save_paths: dict[ExportFileFormat, Path] = {}
+    for f in file_formats:
+        name = file_name
+        if extensions[f.extension] > 1:
+            name += f"-{ExportFileFormats(f).name}"
+        save_path = resolve_save_path(project_path, name, f.extension)
+        if save_path is None:
+            rprint("已取消")
+            return
+        save_paths[f] = save_path
+
+    rprint("开始导出数据...")
+
+    rprint("正在处理数据...")
+
+    if compact:
+        with compact_dtypes():
+            source = integrate(project_path, volume_number, match_number_range)
+    else:
+        source = integrate(project_path, volume_number, match_number_range)
+
+    if len(save_paths) == 1:
+        [(f, save_path)] = save_paths.items()
+        render(build(source, f), source.league, f, save_path)
+        return
+
+    # 各格式的写入互不依赖，并行进行
+    with ThreadPoolExecutor(max_workers=len(save_paths)) as executor:
+        futures = [
+            executor.submit(
+                lambda f, p: render(build(source, f), source.league, f, p), f, p
+            )
+            for f, p in save_paths.items()
+        ]
+        for future in futures:
+            future.result()
+
+
+def resolve_save_path(
+    project_path: Path, file_name: str, extension: str
+) -> Path | None:
+    """获取保存路径，文件不可写入时询问是否改用其他文件名；取消时返回 `None`"""
+
+    save_path = project_path / f"{file_name}{extension}"
     mkdir(save_path.parent)
 
     if not can_write(save_path) and not Confirm.ask(
@@ -143,138 +209,144 @@ def export(
     ):
         alternative: Path
         for i in range(1, 100):
-            alternative = project_path / f"{file_name}{i}{file_format.extension}"
+            alternative = project_path / f"{file_name}{i}{extension}"
             if can_write(alternative):
                 if Confirm.ask(
                     f"是否保存到 [bold]{alternative}[/bold] ？",
                     console=stdout_console,
                     default=True,
                 ):
-                    save_path = alternative
-                    break
+                    return alternative
                 else:
-                    rprint("已取消")
-                    return
+                    return None
 
-    rprint("开始导出数据...")
+    return save_path
 
-    rprint("正在处理数据...")
 
-    data = DataTable(project_path).read()
-    score = ScoreTable(project_path).read()
-    value = ValueTable(project_path).read()
-    league = LeagueTable(project_path).read()
-    handicap = HandicapTable(project_path).read()
-    recent_results = RecentResultsTable(project_path).read()
-    sp = SpTable(project_path).read()
-    odd = AverageEuropeOddTable(project_path).read()
+@dataclass
+class IntegratedData:
+    """各导出格式共用的数据，由导出数据的视图读取，只需读取一次"""
+
+    data: pd.DataFrame
+    league: LeagueTable
+    value: ExportViewTable
+    handicap: ExportViewTable
+    recent_results: ExportViewTable
+    sp: ExportViewTable
+    odd: ExportViewTable
+    score: pd.Series
+    result: pd.Series
+    result_with_concede: pd.Series
+    recent_forms: list[pd.Series]
+    status: pd.Series
+
+
+# 页面中的赔率、水位等最多 3 位小数，紧凑模式下的 float32 值保留 4 位小数即可还原为非紧凑模式下的值
+compact_float_decimals = 4
+
+
+def widen_floats(view: pd.DataFrame) -> pd.DataFrame:
+    """将紧凑模式下的 float32 列还原为原类型，使导出的文件与非紧凑模式相同"""
+
+    narrow = [
+        column
+        for column in view.columns
+        if view[column].dtype in (np.float32, pd.Float32Dtype())
+    ]
+    if not narrow:
+        return view
+    view = view.copy()
+    for column in narrow:
+        view[column] = view[column].astype(column.type).round(compact_float_decimals)
+    return view
+
+
+def integrate(
+    project_path: Path, volume_number: int | None, match_number_range: str | None
+) -> IntegratedData:
+    where = {}
 
     if volume_number:
         rprint(f"已指定期号为 [bold]{volume_number}[/bold]")
-        data = data[data[DataTable.volume_number] == volume_number]
+        where[DataTable.volume_number] = [volume_number]
 
     if volume_number and match_number_range:
         start, end = map(int, match_number_range.split("-"))
         rprint(f"已指定场次范围为 [bold]{start}[/bold] 至 [bold]{end}[/bold]")
-        data = data[
-            (data[DataTable.match_number] >= start)
-            & (data[DataTable.match_number] <= end)
-        ]
+        where[DataTable.match_number] = range(start, end + 1)
 
-    def calculate_match_result(score_text: str):
-        score_list = score_text.split("-")
-        host_score = int(score_list[0].strip())
-        guest_score = int(score_list[1].strip())
-        if host_score > guest_score:
-            return "胜"
-        elif host_score == guest_score:
-            return "平"
-        else:
-            return "负"
-
-    def calculate_result_with_concede(row: pd.Series):
-        score_list = row["比分"].split("-")
-        host_score = int(score_list[0].strip())
-        guest_score = int(score_list[1].strip())
-        concede_point = 0
-        concede_match = re.match(r".*\(([+-][\d.]+)\)", row[DataTable.host_name])
-        if concede_match:
-            concede_point = int(concede_match.group(1))
-        if host_score + concede_point > guest_score:
-            return "胜"
-        elif host_score + concede_point == guest_score:
-            return "平"
-        else:
-            return "负"
-
-    def calculate_recent_result(result_type: int):
-        return recent_results.apply(
-            lambda row: "".join(
-                [
-                    (
-                        "A"
-                        if row[col] == "win"
-                        else (
-                            "B"
-                            if row[col] == "draw"
-                            else "C" if row[col] == "lose" else "-"
-                        )
-                    )
-                    for col in RecentResultsTable.class_columns()[
-                        result_type * 3 : result_type * 3 + 3
-                    ]
-                ]
-            ),
-            axis=1,
-        )
+    view = widen_floats(ExportView(project_path).read(where=where))
+    league = LeagueTable(project_path).read()
+
+    if ExportViewTable.compact_index():
+        view = view.copy()
+        view.index = ExportViewTable.encode_index(view.index)
+
+    timezone = datetime.now().astimezone().tzinfo
+    data = view[DataTable.class_columns()].copy()
+    data[DataTable.match_time] = pd.to_datetime(
+        data[DataTable.match_time], unit="s", utc=True
+    ).dt.tz_convert(timezone)
+
+    return IntegratedData(
+        data=data,
+        league=league,
+        value=view,
+        handicap=view,
+        recent_results=view,
+        sp=view,
+        odd=view,
+        # 未结束的比赛会以占位符覆盖，分类列不能写入新的值
+        score=view[ExportViewTable.score].astype(object),
+        result=view[ExportViewTable.result].astype(object),
+        result_with_concede=view[ExportViewTable.result_with_concede].astype(object),
+        recent_forms=[view[column] for column in ExportViewTable.forms()],
+        status=data[DataTable.match_status].map(match_status_dict),
+    )
+
+
+def build(source: IntegratedData, file_format: ExportFileFormat) -> pd.DataFrame:
+    """按导出格式排列整合后的数据"""
 
     rprint(f"正在整合数据{'并添加样式' if file_format == StyledFormat else ''}...")
 
+    data = source.data.copy()
+
     if file_format != Special:
         handicap_name = data[DataTable.handicap_name]
         data.drop(columns=[DataTable.handicap_name], inplace=True)
 
-    # '+' 为特殊运算符，表示合并，不可替换为模板字符串
-    score_str = (
-        score[ScoreTable.host_score].astype(str)
-        + " - "
-        + score[ScoreTable.guest_score].astype(str)
-    )
-    data.insert(data.columns.get_loc(DataTable.guest_name), "比分", score_str)
-    data[AverageEuropeOddTable.class_columns()] = odd[
+    data.insert(data.columns.get_loc(DataTable.guest_name), "比分", source.score)
+    data[AverageEuropeOddTable.class_columns()] = source.odd[
         AverageEuropeOddTable.class_columns()
     ]
-    data["结果"] = data["比分"].apply(calculate_match_result)
+    data["结果"] = source.result
     placeholder = "-" if file_format == TextBasedFormat else ""
-    data[SpTable.class_columns()] = sp[SpTable.class_columns()]
-    data["让球结果"] = data.apply(calculate_result_with_concede, axis=1)
+    data[SpTable.class_columns()] = source.sp[SpTable.class_columns()]
+    data["让球结果"] = source.result_with_concede
     data.loc[data[DataTable.match_status] != 4, ["比分", "结果", "让球结果"]] = (
         placeholder
     )
-    data[ValueTable.class_columns()] = value[ValueTable.class_columns()]
+    data[ValueTable.class_columns()] = source.value[ValueTable.class_columns()]
     if file_format == Special:
-        data["主队近况"] = calculate_recent_result(0)
-        data["客队近况"] = calculate_recent_result(1)
-        data["主队近况（主）"] = calculate_recent_result(2)
-        data["客队近况（客）"] = calculate_recent_result(3)
+        data["主队近况"] = source.recent_forms[0]
+        data["客队近况"] = source.recent_forms[1]
+        data["主队近况（主）"] = source.recent_forms[2]
+        data["客队近况（客）"] = source.recent_forms[3]
     else:
-        data[RecentResultsTable.class_columns()] = recent_results[
-            RecentResultsTable.class_columns()
+        data[RecentResultsTable.result_columns()] = source.recent_results[
+            RecentResultsTable.result_columns()
         ]
     if file_format != Special:
         # noinspection PyUnboundLocalVariable
         data[DataTable.handicap_name] = handicap_name
-    data[HandicapTable.class_columns()[:3]] = handicap[
+    data[HandicapTable.class_columns()[:3]] = source.handicap[
         HandicapTable.class_columns()[:3]
     ]
-    data[HandicapTable.class_columns()[3:]] = handicap[
+    data[HandicapTable.class_columns()[3:]] = source.handicap[
         HandicapTable.class_columns()[3:]
     ]
 
-    timezone = datetime.now().astimezone().tzinfo
-    data[DataTable.match_time] = pd.to_datetime(
-        data[DataTable.match_time], unit="s", utc=True
-    ).dt.tz_convert(timezone)
     data.drop(columns=[DataTable.host_id, DataTable.guest_id], inplace=True)
 
     if file_format == Special:
@@ -298,16 +370,26 @@ def export(
         data.drop(columns=[DataTable.handicap_name], inplace=True)
         data[DataTable.handicap_name] = handicap_name
 
-    status = data[DataTable.match_status].map(match_status_dict)
     if file_format == Special:
         data.drop(columns=[DataTable.match_status], inplace=True)
-    data[DataTable.match_status] = status
+    data[DataTable.match_status] = source.status
+
+    return data
+
+
+def render(
+    data: pd.DataFrame,
+    league: LeagueTable,
+    file_format: ExportFileFormat,
+    save_path: Path,
+):
+    """将 `build` 排列后的数据保存为指定格式"""
 
     if file_format == Csv:
         data[DataTable.league_id] = data[DataTable.league_id].map(
             league[LeagueTable.name]
         )
-        save_to_csv(data, project_path, file_name, file_format.extension)
+        save(data, save_path, lambda d, p: d.to_csv(p))
     elif file_format == StyledFormat:
         data[DataTable.match_time] = data[DataTable.match_time].dt.tz_localize(None)
         league_styles = data[DataTable.league_id].map(league[LeagueTable.color])
@@ -340,15 +422,25 @@ def export(
         handicap_style = []
         for match_id in data.index:
             color = ""
-            if data.loc[match_id, HandicapTable.live_average_handicap] < 0:
+            live_handicap = data.loc[match_id, HandicapTable.live_average_handicap]
+            early_handicap = data.loc[match_id, HandicapTable.early_average_handicap]
+            host_value = data.loc[match_id, ValueTable.host_value]
+            guest_value = data.loc[match_id, ValueTable.guest_value]
+            # 尚未获取的亚盘或球队价值为空，不参与比较
+            if pd.isna(live_handicap):
+                pass
+            elif live_handicap < 0:
                 color = handicap_background_color
-            elif data.loc[match_id, HandicapTable.live_average_handicap] == 0:
-                if data.loc[match_id, HandicapTable.early_average_handicap] < 0:
+            elif live_handicap == 0:
+                if pd.isna(early_handicap):
+                    pass
+                elif early_handicap < 0:
                     color = handicap_background_color
-                elif data.loc[match_id, HandicapTable.early_average_handicap] == 0:
+                elif early_handicap == 0:
                     if (
-                        data.loc[match_id, ValueTable.guest_value]
-                        <= data.loc[match_id, ValueTable.host_value]
+                        not pd.isna(host_value)
+                        and not pd.isna(guest_value)
+                        and guest_value <= host_value
                     ):
                         color = handicap_background_color
             handicap_style.append(f"{color}{tahoma}{nine_point}{center}{middle}")
@@ -437,7 +529,7 @@ def export(
             )
 
         if file_format == Html:
-            save_to_html(style, project_path, file_name, file_format.extension)
+            save(style, save_path, lambda d, p: d.to_html(p))
             return
 
         exported_time = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -457,7 +549,11 @@ def export(
             for index, column in enumerate(style.data.columns.values)
         }
 
-        writer = pd.ExcelWriter(save_path)
+        from openpyxl.worksheet.worksheet import Worksheet
+
+        # 写入内存后再保存，以便原子地替换文件
+        buffer = io.BytesIO()
+        writer = pd.ExcelWriter(buffer, engine="openpyxl")
 
         style.to_excel(writer, sheet_name=exported_time)
 
@@ -540,4 +636,8 @@ def export(
                 # noinspection SpellCheckingInspection
                 selection.sqref = active_cell
 
-        save_message(save_path, lambda: writer.close())
+        def close(w: pd.ExcelWriter, p: Path):
+            w.close()
+            p.write_bytes(buffer.getvalue())
+
+        save(writer, save_path, close)
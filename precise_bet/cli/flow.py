@@ -6,10 +6,11 @@ from datetime import datetime
 import typer
 
 from precise_bet import rprint, rule
-from precise_bet.cli.export import ExportFileFormats, export
+from precise_bet.cli.export import export, formats_parser
 from precise_bet.cli.generate_data import generate_data
 from precise_bet.cli.update import Actions as UpdateActions, update
-from precise_bet.util import sleep
+from precise_bet.profiling import profiler
+from precise_bet.util import circuit_breaker, sleep
 
 
 def flow(
@@ -32,6 +33,7 @@ def flow(
     fast_mode: bool = False,
     export_only_current_volume: bool = True,
     export_match_number_range: str = None,
+    export_file_format: list[str] = None,
 ):
     """生成数据、更新数据、导出数据"""
 
@@ -48,6 +50,8 @@ def flow(
     if retry_times < 0:
         retry_times = 0
 
+    export_file_formats = [formats_parser(f) for f in export_file_format or ["special"]]
+
     executed_times = 0
 
     step = 0
@@ -75,69 +79,73 @@ def flow(
             )
 
             if step == 0:
-                generate_data(
-                    ctx,
-                    volume_number=volume_number,
-                    request_trying_times=request_trying_times,
-                )
+                with profiler.command("generate-data"):
+                    generate_data(
+                        ctx,
+                        volume_number=volume_number,
+                        request_trying_times=request_trying_times,
+                    )
                 if should_terminate():
                     raise KeyboardInterrupt
                 step += 1
 
             if step == 1:
                 if update_value:
-                    update(
-                        ctx,
-                        action=UpdateActions.value_action.value,
-                        volume_number=volume_number,
-                        interval=interval,
-                        extra_interval=extra_interval,
-                        extra_interval_probability=extra_interval_probability,
-                        interval_offset_range=interval_offset_range,
-                        break_hours=break_hours,
-                        only_new=only_new_value,
-                        request_trying_times=request_trying_times,
-                        **additional_parameter_update,
-                    )
+                    with profiler.command("update value"):
+                        update(
+                            ctx,
+                            action=UpdateActions.value_action.value,
+                            volume_number=volume_number,
+                            interval=interval,
+                            extra_interval=extra_interval,
+                            extra_interval_probability=extra_interval_probability,
+                            interval_offset_range=interval_offset_range,
+                            break_hours=break_hours,
+                            only_new=only_new_value,
+                            request_trying_times=request_trying_times,
+                            **additional_parameter_update,
+                        )
                     if should_terminate():
                         raise KeyboardInterrupt
                 step += 1
 
             if step == 2:
                 if update_handicap:
-                    update(
-                        ctx,
-                        action=UpdateActions.handicap_action.value,
-                        volume_number=volume_number,
-                        interval=interval,
-                        extra_interval=extra_interval,
-                        extra_interval_probability=extra_interval_probability,
-                        interval_offset_range=interval_offset_range,
-                        break_hours=break_hours,
-                        request_trying_times=request_trying_times,
-                        **additional_parameter_update,
-                    )
+                    with profiler.command("update handicap"):
+                        update(
+                            ctx,
+                            action=UpdateActions.handicap_action.value,
+                            volume_number=volume_number,
+                            interval=interval,
+                            extra_interval=extra_interval,
+                            extra_interval_probability=extra_interval_probability,
+                            interval_offset_range=interval_offset_range,
+                            break_hours=break_hours,
+                            request_trying_times=request_trying_times,
+                            **additional_parameter_update,
+                        )
                     if should_terminate():
                         raise KeyboardInterrupt
                 step += 1
 
             if step == 3:
                 if update_recent_results:
-                    update(
-                        ctx,
-                        action=UpdateActions.recent_results_action.value,
-                        volume_number=volume_number,
-                        interval=interval,
-                        extra_interval=extra_interval,
-                        extra_interval_probability=extra_interval_probability,
-                        interval_offset_range=interval_offset_range,
-                        last_updated_status="e",
-                        status="e",
-                        break_hours=break_hours,
-                        only_new=True,
-                        request_trying_times=request_trying_times,
-                        **additional_parameter_update,
-                    )
+                    with profiler.command("update recent_results"):
+                        update(
+                            ctx,
+                            action=UpdateActions.recent_results_action.value,
+                            volume_number=volume_number,
+                            interval=interval,
+                            extra_interval=extra_interval,
+                            extra_interval_probability=extra_interval_probability,
+                            interval_offset_range=interval_offset_range,
+                            last_updated_status="e",
+                            status="e",
+                            break_hours=break_hours,
+                            only_new=True,
+                            request_trying_times=request_trying_times,
+                            **additional_parameter_update,
+                        )
                     if should_terminate():
                         raise KeyboardInterrupt
         except KeyboardInterrupt:
@@ -152,21 +160,24 @@ def flow(
                 raise e
             traceback.print_exception(e)
             rule(f"[bold red]发生错误，正在重试（第 {error_times} / {retry_times} 次）")
+            # 错误由熔断引起时，立即重试只会再次失败
+            circuit_breaker.wait()
         else:
             executed_times += 1
 
             step = 0
             error_times = 0
         finally:
-            export(
-                ctx,
-                file_name_suffix=(
-                    f"-{volume_number}" if export_only_current_volume else None
-                ),
-                file_format=ExportFileFormats.special.value,
-                volume_number=volume_number if export_only_current_volume else None,
-                match_number_range=export_match_number_range,
-            )
+            with profiler.command("export"):
+                export(
+                    ctx,
+                    file_name_suffix=(
+                        f"-{volume_number}" if export_only_current_volume else None
+                    ),
+                    file_format=export_file_formats,
+                    volume_number=volume_number if export_only_current_volume else None,
+                    match_number_range=export_match_number_range,
+                )
 
             last = 1 <= execute_times == executed_times
 
@@ -8,7 +8,10 @@ import typer
 from requests import RequestException
 
 from precise_bet import rprint, rprint_err
-from precise_bet.data import parse_table
+from precise_bet.data import ExportView, parse_table
+from precise_bet.data.table import DataSet
+from precise_bet.profiling import profiler
+from precise_bet.type import DataTable
 from precise_bet.util import request_content
 
 
@@ -34,6 +37,17 @@ def generate_data(
     except RequestException:
         rprint_err("连接错误，正在重试")
 
+    return fetch_volume(project_path, session, volume_number, request_trying_times)
+
+
+def fetch_volume(
+    project_path: Path,
+    session: requests.Session,
+    volume_number: int | None,
+    request_trying_times: int,
+) -> DataSet | None:
+    """获取并解析一期数据，保存后返回；请求失败时返回 `None`"""
+
     text: str
     try:
         text = request_content(
@@ -44,20 +58,29 @@ def generate_data(
         )
     except RequestException as e:
         rprint_err(e)
-        return
+        return None
 
     rprint("正在解析数据...")
 
-    data_table = parse_table(project_path, text)
+    with profiler.phase("parse"):
+        data_table = parse_table(project_path, text)
 
     rprint(f"解析成功，期号：{data_table.volume_number}")
 
-    data_table.data.save()
-    data_table.score.save()
-    data_table.value.save()
-    data_table.handicap.save()
-    data_table.recent_results.save()
-    data_table.sp.save()
-    data_table.odd.save()
-    data_table.league.save()
-    data_table.team.save()
+    view = ExportView(project_path)
+
+    data_table.save()
+
+    data = data_table.data
+    view.refresh(
+        data.index[data[DataTable.volume_number] == data_table.volume_number],
+        data,
+        data_table.score,
+        data_table.value,
+        data_table.handicap,
+        data_table.recent_results,
+        data_table.sp,
+        data_table.odd,
+    )
+
+    return data_table
@@ -1,9 +1,20 @@
 #  Copyright (C) 2024  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+import json
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from time import sleep
-from typing import List
+from typing import Annotated, List, Optional
 from zoneinfo import ZoneInfo
 
 import pandas as pd
@@ -12,7 +23,7 @@ import typer
 from bs4 import BeautifulSoup, Tag
 from requests import RequestException
 
-from precise_bet import rprint, rprint_err
+from precise_bet import rprint, rprint_err, rule
 from precise_bet.cli.export import (
     bold,
     calibri,
@@ -25,21 +36,56 @@ from precise_bet.cli.export import (
     ten_point,
     ya_hei,
 )
+from precise_bet.profiling import profiler
 from precise_bet.type import Column, DataTable, MatchTable
-from precise_bet.util import mkdir, request_content
+from precise_bet.util import RateLimiter, mkdir, request_content
 
 
 def okooo(
     ctx: typer.Context,
+    start_volume_number: Annotated[
+        Optional[int],
+        typer.Option(
+            "--start-volume-number",
+            "-s",
+            help="起始期号（指定后以非交互的批量模式获取，不指定则依次询问起始期号、结束期号与请求间隔）",
+        ),
+    ] = None,
+    end_volume_number: Annotated[
+        Optional[int],
+        typer.Option(
+            "--end-volume-number", "-e", help="结束期号（默认与起始期号相同）"
+        ),
+    ] = None,
+    interval: Annotated[
+        Optional[float],
+        typer.Option("--interval", "-i", help="请求间隔（秒，批量模式默认为 5）"),
+    ] = None,
+    workers: Annotated[
+        int, typer.Option(help="批量模式下同时进行的请求数（请求间隔仍受限制）")
+    ] = 4,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="批量模式下解析页面的进程数（默认为 CPU 核心数）"),
+    ] = None,
+    checkpoint_every: Annotated[
+        int, typer.Option(help="批量模式下每解析多少期保存一次进度")
+    ] = 10,
+    request_trying_times: Annotated[
+        int,
+        typer.Option("--request-trying-times", help="请求尝试次数（设为 0 无限尝试）"),
+    ] = 1,
 ):
     """获取澳客数据"""
 
     project_path: Path = ctx.obj["project_path"]
     session: requests.Session = ctx.obj["session"]
 
-    start_volume_number: int = typer.prompt("请输入起始期号", type=int)
-    end_volume_number: int = typer.prompt("请输入结束期号", type=int)
-    interval = typer.prompt("请输入请求间隔", type=int)
+    interactive = start_volume_number is None
+    if interactive:
+        start_volume_number = typer.prompt("请输入起始期号", type=int)
+        end_volume_number = typer.prompt("请输入结束期号", type=int)
+        interval = typer.prompt("请输入请求间隔", type=int)
 
     rprint("正在获取数据...")
 
@@ -48,25 +94,41 @@ def okooo(
     try:
         request_content("https://www.okooo.com/livecenter/danchang", session)
     except RequestException as e:
-        if e.response.status_code != 405:
+        if e.response is None or e.response.status_code != 405:
             rprint_err(e)
             return
 
         rprint("捕捉到 405 错误，继续请求...")
 
+    if not interactive:
+        fetch_range(
+            project_path,
+            session,
+            start_volume_number,
+            end_volume_number or start_volume_number,
+            5 if interval is None else interval,
+            workers,
+            processes,
+            checkpoint_every,
+            request_trying_times,
+        )
+        return
+
     volume_number = start_volume_number
 
     while volume_number <= end_volume_number:
         if volume_number != start_volume_number:
             rprint(f"等待 {interval} 秒...")
-            sleep(interval)
+            with profiler.phase("sleep"):
+                sleep(interval)
 
         text: str
         try:
             text = request_content(
-                f"https://www.okooo.com/livecenter/danchang{f'?date={volume_number}' if volume_number else ''}",
+                okooo_url(volume_number),
                 session,
                 encoding="gb2312",
+                trying_times=request_trying_times,
             )
         except RequestException as e:
             rprint_err(e)
@@ -74,106 +136,322 @@ def okooo(
 
         rprint("正在解析数据...")
 
-        data = parse(project_path, text)
+        with profiler.phase("parse"):
+            data = parse(project_path, text)
 
         rprint(f"解析成功")
 
         data.save()
 
-        save_path = project_path / "okooo" / f"{volume_number}.xlsx"
-        mkdir(save_path.parent)
+        save_workbook(data, project_path / "okooo" / f"{volume_number}.xlsx")
 
-        data[OkoooDataTable.match_number] = (
-            data[OkoooDataTable.match_number].astype(str).str.zfill(3)
-        )
+        volume_number = next_volume_number(volume_number)
 
-        timezone = datetime.now().astimezone().tzinfo
-        data[OkoooDataTable.match_time] = (
-            pd.to_datetime(data[OkoooDataTable.match_time], unit="s", utc=True)
-            .dt.tz_convert(timezone)
-            .dt.tz_localize(None)
-        )
 
-        odd_style = f"{calibri}{ten_point}{center}{middle}"
-        sp_win_style = [
-            (odd_background_color if r == "胜" else "") + odd_style
-            for r in data[OkoooDataTable.result]
-        ]
-        sp_draw_style = [
-            (odd_background_color if r == "平" else "") + odd_style
-            for r in data[OkoooDataTable.result]
-        ]
-        sp_lose_style = [
-            (odd_background_color if r == "负" else "") + odd_style
-            for r in data[OkoooDataTable.result]
-        ]
+def okooo_url(volume_number: int | None) -> str:
+    return f"https://www.okooo.com/livecenter/danchang{f'?date={volume_number}' if volume_number else ''}"
+
+
+def next_volume_number(volume_number: int) -> int:
+    """获取下一期的期号"""
+
+    if volume_number % 10 == 5:
+        volume_number += 6
+    else:
+        volume_number += 1
+    if int(volume_number % 1000 / 10) == 13:
+        volume_number += 880
+    return volume_number
+
+
+def volume_numbers(start_volume_number: int, end_volume_number: int) -> list[int]:
+    result = []
+    volume_number = start_volume_number
+    while volume_number <= end_volume_number:
+        result.append(volume_number)
+        volume_number = next_volume_number(volume_number)
+    return result
+
+
+def save_workbook(data: pd.DataFrame, save_path: Path):
+    """将数据保存为带格式的 Excel 工作簿"""
+
+    mkdir(save_path.parent)
+
+    data = data.copy()
+
+    data[OkoooDataTable.match_number] = (
+        data[OkoooDataTable.match_number].astype(str).str.zfill(3)
+    )
+
+    timezone = datetime.now().astimezone().tzinfo
+    data[OkoooDataTable.match_time] = (
+        pd.to_datetime(data[OkoooDataTable.match_time], unit="s", utc=True)
+        .dt.tz_convert(timezone)
+        .dt.tz_localize(None)
+    )
+
+    odd_style = f"{calibri}{ten_point}{center}{middle}"
+    sp_win_style = [
+        (odd_background_color if r == "胜" else "") + odd_style
+        for r in data[OkoooDataTable.result]
+    ]
+    sp_draw_style = [
+        (odd_background_color if r == "平" else "") + odd_style
+        for r in data[OkoooDataTable.result]
+    ]
+    sp_lose_style = [
+        (odd_background_color if r == "负" else "") + odd_style
+        for r in data[OkoooDataTable.result]
+    ]
+
+    length = len(data)
+    style = data.style
+    style.apply(
+        lambda _: [f"{red}{bold}"] * length,
+        subset=[OkoooDataTable.match_number, OkoooDataTable.score],
+    )
+    style.apply(lambda _: sp_win_style, subset=[OkoooDataTable.sp_win])
+    style.apply(lambda _: sp_draw_style, subset=[OkoooDataTable.sp_draw])
+    style.apply(lambda _: sp_lose_style, subset=[OkoooDataTable.sp_lose])
+    style.apply(
+        lambda _: [f"{ya_hei}{result_color}{nine_point}{center}{middle}"] * length,
+        subset=[OkoooDataTable.result],
+    )
+
+    writer = pd.ExcelWriter(save_path)
+    style.to_excel(writer)
+
+    worksheet = writer.sheets["Sheet1"]
+
+    for cell in worksheet["E"]:
+        cell.number_format = "yyyy/m/d h:mm"
+
+    for cells in worksheet["I:K"]:
+        for cell in cells:
+            cell.number_format = "0.00"
+
+    worksheet.column_dimensions["A"].width = 8
+    worksheet.column_dimensions["B"].width = 6
+    worksheet.column_dimensions["C"].width = 5
+    worksheet.column_dimensions["D"].width = 10
+    worksheet.column_dimensions["E"].width = 18
+    worksheet.column_dimensions["F"].width = 20
+    worksheet.column_dimensions["G"].width = 6
+    worksheet.column_dimensions["H"].width = 20
+    worksheet.column_dimensions["I"].width = 5
+    worksheet.column_dimensions["J"].width = 5
+    worksheet.column_dimensions["K"].width = 5
+    worksheet.column_dimensions["L"].width = 5
+
+    with profiler.phase("save"):
+        writer.close()
 
-        length = len(data)
-        style = data.style
-        style.apply(
-            lambda _: [f"{red}{bold}"] * length,
-            subset=[OkoooDataTable.match_number, OkoooDataTable.score],
+
+@dataclass
+class Checkpoint:
+    """
+    批量获取的进度
+
+    已解析的各期数据保存在进度文件中，中断后以相同的期号范围再次运行时跳过已完成的期。
+    """
+
+    path: Path
+    pages: dict[int, list[tuple[str, dict]]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "Checkpoint":
+        checkpoint = cls(path)
+        if path.exists():
+            content = json.loads(path.read_text(encoding="utf-8"))
+            checkpoint.pages = {
+                int(volume_number): [tuple(row) for row in rows]
+                for volume_number, rows in content["pages"].items()
+            }
+        return checkpoint
+
+    def save(self):
+        mkdir(self.path.parent)
+        temp = self.path.with_name(f".{self.path.name}.tmp")
+        temp.write_text(
+            json.dumps({"pages": self.pages}, ensure_ascii=False), encoding="utf-8"
         )
-        style.apply(lambda _: sp_win_style, subset=[OkoooDataTable.sp_win])
-        style.apply(lambda _: sp_draw_style, subset=[OkoooDataTable.sp_draw])
-        style.apply(lambda _: sp_lose_style, subset=[OkoooDataTable.sp_lose])
-        style.apply(
-            lambda _: [f"{ya_hei}{result_color}{nine_point}{center}{middle}"] * length,
-            subset=[OkoooDataTable.result],
+        os.replace(temp, self.path)
+
+
+def fetch_range(
+    project_path: Path,
+    session: requests.Session,
+    start_volume_number: int,
+    end_volume_number: int,
+    interval: float,
+    workers: int,
+    processes: int | None,
+    checkpoint_every: int,
+    request_trying_times: int,
+):
+    """
+    批量获取一段期号范围内的数据
+
+    请求在线程池中进行并受请求间隔限制，页面在进程池中解析，全部完成后一次性合并为一张数据表，
+    保存为 `okooo-data-<起始期号>-<结束期号>.csv` 及对应的 Excel 工作簿。
+    """
+
+    name = f"{start_volume_number}-{end_volume_number}"
+    checkpoint = Checkpoint.load(project_path / "okooo" / f"checkpoint-{name}.json")
+
+    remaining = [
+        volume_number
+        for volume_number in volume_numbers(start_volume_number, end_volume_number)
+        if volume_number not in checkpoint.pages
+    ]
+    if checkpoint.pages:
+        rprint(
+            f"从进度文件中恢复了 [bold]{len(checkpoint.pages)}[/bold] 期数据，"
+            f"剩余 [bold]{len(remaining)}[/bold] 期"
         )
 
-        writer = pd.ExcelWriter(save_path)
-        style.to_excel(writer)
+    limiter = RateLimiter(interval)
+    stopped = threading.Event()
+    failed: list[int] = []
+
+    def fetch(volume_number: int) -> str | None:
+        limiter.wait()
+        if stopped.is_set():
+            return None
+        return request_content(
+            okooo_url(volume_number),
+            session,
+            encoding="gb2312",
+            trying_times=request_trying_times,
+        )
 
-        worksheet = writer.sheets["Sheet1"]
+    fetcher = ThreadPoolExecutor(max_workers=max(workers, 1))
+    parser = ProcessPoolExecutor(max_workers=processes)
+    fetching: dict[Future, int] = {}
+    parsing: dict[Future, int] = {}
+    unsaved = 0
 
-        for cell in worksheet["E"]:
-            cell.number_format = "yyyy/m/d h:mm"
+    try:
+        for volume_number in remaining:
+            fetching[fetcher.submit(fetch, volume_number)] = volume_number
+
+        waiting = set(fetching)
+        while waiting:
+            done, waiting = wait(waiting, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetching:
+                    volume_number = fetching[future]
+                    try:
+                        text = future.result()
+                    except RequestException as e:
+                        rprint_err(e)
+                        rprint(
+                            f"[bold red]获取第 {volume_number} 期数据失败",
+                            level="warning",
+                        )
+                        failed.append(volume_number)
+                        continue
+                    parse_future = parser.submit(parse_page, text)
+                    parsing[parse_future] = volume_number
+                    waiting.add(parse_future)
+                    continue
+
+                volume_number = parsing[future]
+                try:
+                    page_volume_number, rows = future.result()
+                except Exception as e:
+                    # 如返回了反爬虫页面，与获取失败一样留待下次运行
+                    rprint_err(e)
+                    rprint(
+                        f"[bold red]解析第 {volume_number} 期数据失败",
+                        level="warning",
+                    )
+                    failed.append(volume_number)
+                    continue
+                checkpoint.pages[volume_number] = rows
+                rprint(
+                    f"第 [bold]{page_volume_number}[/bold] 期解析成功，"
+                    f"共 [bold]{len(rows)}[/bold] 场比赛"
+                )
+                unsaved += 1
+                if unsaved >= checkpoint_every:
+                    checkpoint.save()
+                    unsaved = 0
+    except KeyboardInterrupt:
+        stopped.set()
+        rule("[bold red]已中断")
+        return
+    finally:
+        fetcher.shutdown(cancel_futures=True)
+        parser.shutdown(cancel_futures=True)
+        if unsaved:
+            checkpoint.save()
+            rprint(f"进度已保存到 [bold]{checkpoint.path}[/bold]")
+
+    data = merge(project_path, name, checkpoint.pages)
+    data.save()
+    save_workbook(data, project_path / "okooo" / f"{name}.xlsx")
+
+    if failed:
+        failed.sort()
+        rprint(
+            f"[bold yellow]第 {failed} 期获取或解析失败，再次以相同的期号范围运行以继续获取",
+            level="warning",
+        )
+        checkpoint.save()
+    else:
+        checkpoint.path.unlink(missing_ok=True)
 
-        for cells in worksheet["I:K"]:
-            for cell in cells:
-                cell.number_format = "0.00"
+    rprint(f"获取完成，共 [bold]{len(data)}[/bold] 场比赛")
 
-        worksheet.column_dimensions["A"].width = 8
-        worksheet.column_dimensions["B"].width = 6
-        worksheet.column_dimensions["C"].width = 5
-        worksheet.column_dimensions["D"].width = 10
-        worksheet.column_dimensions["E"].width = 18
-        worksheet.column_dimensions["F"].width = 20
-        worksheet.column_dimensions["G"].width = 6
-        worksheet.column_dimensions["H"].width = 20
-        worksheet.column_dimensions["I"].width = 5
-        worksheet.column_dimensions["J"].width = 5
-        worksheet.column_dimensions["K"].width = 5
-        worksheet.column_dimensions["L"].width = 5
 
-        writer.close()
+def merge(
+    project_path: Path, name: str, pages: dict[int, list[tuple[str, dict]]]
+) -> "OkoooDataTable":
+    """
+    将各期数据合并为一张数据表
 
-        if volume_number % 10 == 5:
-            volume_number += 6
-        else:
-            volume_number += 1
-        if int(volume_number % 1000 / 10) == 13:
-            volume_number += 880
+    同一场比赛出现在多期中时保留期号最大的一期。
+    """
 
+    with profiler.phase("mutate"):
+        pairs = OkoooDataTable.table_pairs()
+        records = [
+            {pairs[key].name: value for key, value in row.items()}
+            | {OkoooDataTable.match_id.name: match_id}
+            for volume_number in sorted(pages)
+            for match_id, row in pages[volume_number]
+        ]
+        frame = pd.DataFrame.from_records(
+            records, columns=OkoooDataTable.column_names()
+        ).set_index(OkoooDataTable.match_id.name)
+        duplicated = frame.index.duplicated(keep="last")
+        if duplicated.any():
+            rprint(
+                f"[bold yellow]发现 {duplicated.sum()} 场重复的比赛，已保留期号最大的一期",
+                level="warning",
+            )
+        frame = frame.loc[~duplicated].sort_values(
+            [OkoooDataTable.volume_number.name, OkoooDataTable.match_number.name]
+        )
 
-def parse(project_path: Path, html: str) -> DataTable:
-    soup = BeautifulSoup(html, "html.parser")
+        data = OkoooDataTable(project_path).create()
+        data.name_ = f"{data.name_}-{name}"
+        for column in data.table_columns():
+            if column.name in frame:
+                data[column] = frame[column.name].astype(column.type)
+    return data
 
-    volume_number = int(soup.find(id="select_qihao").text.strip()[:-1])
+
+def parse(project_path: Path, html: str) -> DataTable:
+    volume_number, rows = parse_page(html)
 
     data = OkoooDataTable(project_path).read_or_create()
 
     data.name_ = f"{data.name_}-{volume_number}"
 
-    trs: list[Tag] = soup.find("tbody").find_all("tr")
-
-    for tr in trs:
-        if not tr.has_attr("matchid"):
-            continue
-
-        match_id = tr["matchid"]
-
+    for match_id, row in rows:
         if (
             match_id in data.index
             and data.loc[match_id, DataTable.volume_number] > volume_number
@@ -185,6 +463,35 @@ def parse(project_path: Path, html: str) -> DataTable:
             )
             continue
 
+        data.loc[match_id] = OkoooDataTable.generate_row(**row)
+
+    return data
+
+
+def parse_page(html: str) -> tuple[int, list[tuple[str, dict]]]:
+    """
+    解析澳客单场页面
+
+    不读取项目数据，可在子进程中调用。
+
+    :param html: 澳客单场页面
+    :return: 期号，以及各场比赛的代号与 `OkoooDataTable.generate_row` 的参数
+    """
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    volume_number = int(soup.find(id="select_qihao").text.strip()[:-1])
+
+    rows = []
+
+    trs: list[Tag] = soup.find("tbody").find_all("tr")
+
+    for tr in trs:
+        if not tr.has_attr("matchid"):
+            continue
+
+        match_id = tr["matchid"]
+
         tds: list[Tag] = tr.find_all("td")
 
         match_number = int(tds[0].text)
@@ -215,23 +522,28 @@ def parse(project_path: Path, html: str) -> DataTable:
         else:
             result = ""
 
-        data.loc[match_id] = OkoooDataTable.generate_row(
-            volume_number=volume_number,
-            match_number=match_number,
-            league=league,
-            match_time=int(
-                match_time.astimezone(ZoneInfo("Asia/Shanghai")).timestamp()
-            ),
-            host_name=host,
-            score=score,
-            guest_name=guest,
-            sp_win=float(sp_tags[0].text),
-            sp_draw=float(sp_tags[1].text),
-            sp_lose=float(sp_tags[2].text),
-            result=result,
+        rows.append(
+            (
+                match_id,
+                dict(
+                    volume_number=volume_number,
+                    match_number=match_number,
+                    league=league,
+                    match_time=int(
+                        match_time.astimezone(ZoneInfo("Asia/Shanghai")).timestamp()
+                    ),
+                    host_name=host,
+                    score=score,
+                    guest_name=guest,
+                    sp_win=float(sp_tags[0].text),
+                    sp_draw=float(sp_tags[1].text),
+                    sp_lose=float(sp_tags[2].text),
+                    result=result,
+                ),
+            )
         )
 
-    return data
+    return volume_number, rows
 
 
 class OkoooDataTable(MatchTable):
@@ -0,0 +1,147 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+from rich.table import Table
+
+from precise_bet import event, is_json_lines, rprint
+from precise_bet.data import QueryIndex, save
+from precise_bet.type import DataTable, LeagueTable, TeamTable, match_status_dict
+
+
+def query(
+    ctx: typer.Context,
+    team: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            "--team", "-t", help="球队代号或名称（名称包含该文本即可，可多次指定）"
+        ),
+    ] = None,
+    league: Annotated[
+        Optional[list[str]],
+        typer.Option("--league", "-l", help="赛事代号或名称（可多次指定）"),
+    ] = None,
+    volume_range: Annotated[
+        Optional[str],
+        typer.Option("--volume-range", "-v", help="期号或期号范围（如 25001-25010）"),
+    ] = None,
+    start_time: Annotated[
+        Optional[datetime], typer.Option(help="比赛时间不早于")
+    ] = None,
+    end_time: Annotated[Optional[datetime], typer.Option(help="比赛时间不晚于")] = None,
+    status: Annotated[
+        Optional[list[int]],
+        typer.Option("--status", "-s", help="比赛状态（可多次指定）"),
+    ] = None,
+    handicap_moved: Annotated[
+        bool, typer.Option(help="只查询即时盘与初盘不同的比赛")
+    ] = False,
+    limit_count: Annotated[
+        Optional[int], typer.Option("--limit-count", "-m", help="最多显示多少场比赛")
+    ] = None,
+    output: Annotated[
+        Optional[Path], typer.Option("--output", "-o", help="将结果保存为 CSV 文件")
+    ] = None,
+):
+    """
+    查询比赛
+
+    各条件之间为“且”，同一条件的多个值之间为“或”；结果按比赛时间排序。
+    """
+
+    project_path: Path = ctx.obj["project_path"]
+
+    index = QueryIndex(project_path).load()
+    started = time.perf_counter()
+
+    match_ids = index.between(
+        int(start_time.timestamp()) if start_time else None,
+        int(end_time.timestamp()) if end_time else None,
+    )
+
+    def keep(allowed: set[str]):
+        nonlocal match_ids
+        match_ids = [match_id for match_id in match_ids if match_id in allowed]
+
+    if team:
+        teams = TeamTable(project_path).read_or_create()
+        names = teams[TeamTable.name].fillna("")
+        team_ids = set()
+        for value in team:
+            if value.isdigit():
+                team_ids.add(value)
+                continue
+            matched = teams.loc[names.str.contains(value, regex=False)]
+            team_ids.update(str(i) for i in matched.index)
+        keep({m for team_id in team_ids for m in index.teams.get(team_id, [])})
+
+    if league:
+        leagues = LeagueTable(project_path).read_or_create()
+        league_ids = set(league) | set(
+            leagues.index[leagues[LeagueTable.name].isin(league)]
+        )
+        keep({m for league_id in league_ids for m in index.leagues.get(league_id, [])})
+
+    if volume_range:
+        start, _, end = volume_range.partition("-")
+        volumes = range(int(start), int(end or start) + 1)
+        keep({m for volume in volumes for m in index.volumes.get(str(volume), [])})
+
+    if handicap_moved:
+        keep(set(index.handicap_moved))
+
+    result = index.read(match_ids)
+    if status:
+        result = result.loc[result[DataTable.match_status].isin(status)]
+    if limit_count is not None:
+        result = result.iloc[:limit_count]
+
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if output is not None:
+        save(result, output, lambda d, p: d.to_csv(p))
+
+    league_names = LeagueTable(project_path).read_or_create()[LeagueTable.name]
+    table = Table("代号", "期号", "场次", "赛事", "比赛时间", "主队", "客队", "状态")
+    for match_id, row in result.iterrows():
+        match_time = datetime.fromtimestamp(row[DataTable.match_time])
+        league_name = league_names.get(
+            row[DataTable.league_id], row[DataTable.league_id]
+        )
+        status_text = match_status_dict[row[DataTable.match_status]]
+        table.add_row(
+            match_id,
+            str(row[DataTable.volume_number]),
+            str(row[DataTable.match_number]),
+            league_name,
+            match_time.strftime("%Y-%m-%d %H:%M"),
+            row[DataTable.host_name],
+            row[DataTable.guest_name],
+            status_text,
+        )
+        event(
+            "query_match",
+            match_id=match_id,
+            volume_number=row[DataTable.volume_number],
+            match_number=row[DataTable.match_number],
+            league=league_name,
+            match_time=int(row[DataTable.match_time]),
+            host_name=row[DataTable.host_name],
+            guest_name=row[DataTable.guest_name],
+            status=status_text,
+        )
+    if is_json_lines():
+        # 查询结果即标准输出中的 `query_match` 事件，表格只是其展示形式，不再输出
+        event(
+            "query_result",
+            count=len(result),
+            elapsed_ms=round(elapsed, 1),
+            match_ids=list(result.index),
+        )
+    else:
+        rprint(table)
+    rprint(f"共 [bold]{len(result)}[/bold] 场比赛，查询用时 {elapsed:.1f} 毫秒")
@@ -1,7 +1,11 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
 import random
+import threading
+import time
 from abc import ABC, abstractmethod
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
@@ -11,8 +15,6 @@ from typing import Annotated, Any, Generic, Optional, Tuple, TypeVar
 import pandas as pd
 import requests
 import typer
-from fake_useragent import UserAgent
-from rich.console import Console
 from rich.markdown import Markdown
 from rich.progress import (
     BarColumn,
@@ -23,25 +25,40 @@ from rich.progress import (
     TimeRemainingColumn,
 )
 
-from precise_bet import rprint, rule, stdout_console
+from precise_bet import event, is_json_lines, rprint, rule, stdout_console
 from precise_bet.data import (
-    get_match_handicap,
+    ExportView,
+    fetch_match_handicap,
+    fetch_team_value,
     get_match_recent_results,
-    get_team_value,
+    local_recent_results,
+    parse_handicap,
+    parse_team_value,
     save_to_csv,
 )
+from precise_bet.profiling import profiler
 from precise_bet.type import (
     DataTable,
     HandicapTable,
+    LeagueTable,
     MatchInformationTable,
     ProjectTable,
     RecentResultsTable,
+    ScoreTable,
+    TeamRecentResultsTable,
     TeamTable,
     UpdatableTable,
     ValueTable,
     match_status_dict,
 )
-from precise_bet.util import sleep
+from precise_bet.util import (
+    CircuitOpenError,
+    circuit_breaker,
+    metrics,
+    sleep_until,
+    user_agents,
+)
+from precise_bet.util.scheduler import MatchScheduler
 
 AT = TypeVar("AT", bound=ProjectTable)
 
@@ -49,6 +66,9 @@ AT = TypeVar("AT", bound=ProjectTable)
 class Action(Generic[AT], ABC):
     name: str
     _table: AT
+    _view: ExportView
+    # 上一次 `update` 是否发送了网络请求，未发送时无需等待更新间隔
+    requested: bool = True
 
     def __init__(self, name: str):
         self.name = name
@@ -57,16 +77,42 @@ class Action(Generic[AT], ABC):
     def table(self) -> AT:
         return self._table.copy()
 
+    @property
+    def table_name(self) -> str:
+        return self._table.name_
+
     @abstractmethod
     def assign(self, **kwargs):
         pass
 
+    def _save(self, match_id: str):
+        """保存数据表，并更新导出数据的视图中相应的行"""
+
+        self._table.save()
+        self._view.update(self._table, match_id)
+
+    def batch(self):
+        """在 `with` 语句中对导出数据的视图的修改在结束时一并写入，见 `ExportView.deferred`"""
+
+        return self._view.deferred()
+
     def filter(self, **kwargs) -> AT:
         pass
 
     @abstractmethod
+    def fetch(self, **kwargs) -> Any:
+        """
+        发送网络请求，返回 `apply` 所需的数据
+
+        可能与上一场比赛的 `apply` 同时执行，因此不应读取 `apply` 会修改的数据。
+        """
+
+    @abstractmethod
+    def apply(self, match_id: str, fetched: Any, **kwargs) -> Tuple[Any, Any]:
+        """解析 `fetch` 返回的数据，更新并保存数据表，返回更新前后的数据"""
+
     def update(self, **kwargs) -> Tuple[Any, Any]:
-        pass
+        return self.apply(fetched=self.fetch(**kwargs), **kwargs)
 
     def __str__(self):
         return self.name
@@ -75,39 +121,56 @@ class Action(Generic[AT], ABC):
 class ValueAction(Action[ValueTable]):
     def assign(self, project_path: Path, **_):
         self._table = ValueTable(project_path).read()
+        self._view = ExportView(project_path)
 
     def filter(self, indexes, **_):
         return self.table.loc[self.table.index.isin(indexes)]
 
-    def update(
+    def fetch(
         self,
         match_id: str,
         global_data: DataTable,
-        team_data: TeamTable,
         session: requests.Session,
         ua: str,
         request_trying_times: int,
         **_,
-    ):
-        before = self._table.get_data(match_id)
-        after = []
-        updated_time: float
-        for team_id_column in [DataTable.host_id, DataTable.guest_id]:
-            value = get_team_value(
+    ) -> list[str]:
+        return [
+            fetch_team_value(
                 global_data.loc[match_id, team_id_column],
                 session,
                 ua,
                 request_trying_times,
             )
+            for team_id_column in [DataTable.host_id, DataTable.guest_id]
+        ]
+
+    def apply(
+        self,
+        match_id: str,
+        fetched: list[str],
+        global_data: DataTable,
+        team_data: TeamTable,
+        **_,
+    ):
+        before = self._table.get_data(match_id)
+        after = []
+        for team_id_column, text in zip(
+            [DataTable.host_id, DataTable.guest_id], fetched
+        ):
+            with profiler.phase("parse"):
+                value = parse_team_value(text)
             after += [value]
-            team_data.update_from_value(
-                global_data.loc[match_id, team_id_column], value
-            )
+            with profiler.phase("mutate"):
+                team_data.update_from_value(
+                    global_data.loc[match_id, team_id_column], value
+                )
             team_data.save()
-        self._table.update_from_list(
-            match_id, after, global_data.loc[match_id, DataTable.match_status]
-        )
-        self._table.save()
+        with profiler.phase("mutate"):
+            self._table.update_from_list(
+                match_id, after, global_data.loc[match_id, DataTable.match_status]
+            )
+        self._save(match_id)
         return before, after
 
     def __init__(self):
@@ -117,25 +180,30 @@ class ValueAction(Action[ValueTable]):
 class HandicapAction(Action[HandicapTable]):
     def assign(self, project_path: Path, **_):
         self._table = HandicapTable(project_path).read()
+        self._view = ExportView(project_path)
 
     def filter(self, indexes, **_):
         return self.table.loc[self.table.index.isin(indexes)]
 
-    def update(
+    def fetch(
         self,
         match_id: str,
-        global_data: DataTable,
         session: requests.Session,
         ua: str,
         request_trying_times: int,
         **_,
-    ):
+    ) -> str:
+        return fetch_match_handicap(match_id, session, ua, request_trying_times)
+
+    def apply(self, match_id: str, fetched: str, global_data: DataTable, **_):
         before = self._table.get_data(match_id)
-        after = get_match_handicap(match_id, session, ua, request_trying_times)
-        self._table.update_from_list(
-            match_id, after, global_data.loc[match_id, DataTable.match_status]
-        )
-        self._table.save()
+        with profiler.phase("parse"):
+            after = parse_handicap(fetched)
+        with profiler.phase("mutate"):
+            self._table.update_from_list(
+                match_id, after, global_data.loc[match_id, DataTable.match_status]
+            )
+        self._save(match_id)
         return before, after
 
     def __init__(self):
@@ -143,13 +211,73 @@ class HandicapAction(Action[HandicapTable]):
 
 
 class RecentResultsAction(Action[RecentResultsTable]):
-    def assign(self, project_path: Path, **_):
+    _cache: TeamRecentResultsTable
+    _cache_max_age: float
+    _finished_times: dict[int, list[int]]
+    # 可由本地历史确定的近期战绩
+    _local: dict[str, list[str]]
+    # `fetch` 查询缓存时，上一场比赛的 `apply` 可能正在更新缓存
+    _cache_lock: threading.Lock
+
+    def assign(
+        self,
+        project_path: Path,
+        recent_results_cache_hours: int = 24,
+        local_recent_results_enabled: bool = False,
+        **_,
+    ):
         self._table = RecentResultsTable(project_path).read()
+        self._view = ExportView(project_path)
+        self._cache = TeamRecentResultsTable(project_path).read_or_create()
+        self._cache_lock = threading.Lock()
+        self._cache_max_age = recent_results_cache_hours * 3600
+
+        history = DataTable(project_path).read()
+        finished = history.loc[history[DataTable.match_status] == 4]
+        times = pd.concat(
+            [
+                finished.set_index(DataTable.host_id)[DataTable.match_time],
+                finished.set_index(DataTable.guest_id)[DataTable.match_time],
+            ]
+        ).sort_values()
+        self._finished_times = times.groupby(level=0).agg(list).to_dict()
+
+        self._local = {}
+        if local_recent_results_enabled:
+            local = local_recent_results(
+                history,
+                ScoreTable(project_path).read_or_create(),
+                LeagueTable(project_path).read_or_create(),
+                self._table.index,
+            )
+            self._local = {
+                match_id: list(row) for match_id, row in zip(local.index, local.values)
+            }
 
     def filter(self, indexes, **_):
         return self.table.loc[self.table.index.isin(indexes)]
 
-    def update(
+    def as_of(self, team_id: int, match_time: int) -> int:
+        """获取球队在指定时间前最近一场已结束比赛的比赛时间，没有时返回 0"""
+
+        times = self._finished_times.get(team_id, [])
+        index = bisect_left(times, match_time)
+        return times[index - 1] if index > 0 else 0
+
+    def teams(self, match_id: str, global_data: DataTable) -> tuple[int, int, int, int]:
+        """获取两队的代号及各自的缓存时间点"""
+
+        host_id = global_data.loc[match_id, DataTable.host_id]
+        guest_id = global_data.loc[match_id, DataTable.guest_id]
+        match_time = global_data.loc[match_id, DataTable.match_time]
+        return (
+            host_id,
+            self.as_of(host_id, match_time),
+            guest_id,
+            self.as_of(guest_id, match_time),
+        )
+
+    def fetch(
         self,
         match_id: str,
         global_data: DataTable,
@@ -157,13 +285,71 @@ class RecentResultsAction(Action[RecentResultsTable]):
         ua: str,
         request_trying_times: int,
         **_,
+    ) -> tuple[list[str], bool]:
+        """返回近期战绩，以及是否来自缓存或本地历史"""
+
+        if match_id in self._local:
+            rprint("已由本地历史确定近期战绩，跳过请求")
+            self.requested = False
+            return self._local[match_id], True
+
+        host_id, host_as_of, guest_id, guest_as_of = self.teams(match_id, global_data)
+
+        with self._cache_lock:
+            host = self._cache.get_results(
+                host_id, host_as_of, True, self._cache_max_age
+            )
+            guest = self._cache.get_results(
+                guest_id, guest_as_of, False, self._cache_max_age
+            )
+
+        for result in [host, guest]:
+            metrics.inc(
+                "cache_requests_total",
+                cache=TeamRecentResultsTable.name_,
+                result="miss" if result is None else "hit",
+            )
+
+        if host is not None and guest is not None:
+            rprint("两队的近期战绩均命中缓存，跳过请求")
+            self.requested = False
+            return host[:3] + guest[:3] + host[3:] + guest[3:], True
+
+        self.requested = True
+        return (
+            get_match_recent_results(match_id, session, ua, request_trying_times),
+            False,
+        )
+
+    def apply(
+        self,
+        match_id: str,
+        fetched: tuple[list[str], bool],
+        global_data: DataTable,
+        **_,
     ):
         before = self._table.get_data(match_id)
-        after = get_match_recent_results(match_id, session, ua, request_trying_times)
-        self._table.update_from_list(
-            match_id, after, global_data.loc[match_id, DataTable.match_status]
-        )
-        self._table.save()
+        after, cached = fetched
+
+        if not cached:
+            host_id, host_as_of, guest_id, guest_as_of = self.teams(
+                match_id, global_data
+            )
+            with self._cache_lock:
+                with profiler.phase("mutate"):
+                    self._cache.update_results(
+                        host_id, host_as_of, after[0:3], True, after[6:9]
+                    )
+                    self._cache.update_results(
+                        guest_id, guest_as_of, after[3:6], False, after[9:12]
+                    )
+                self._cache.save()
+
+        with profiler.phase("mutate"):
+            self._table.update_from_list(
+                match_id, after, global_data.loc[match_id, DataTable.match_status]
+            )
+        self._save(match_id)
         return before, after
 
     def __init__(self):
@@ -251,23 +437,44 @@ def update(
         int,
         typer.Option("--request-trying-times", help="请求尝试次数（设为 0 无限尝试）"),
     ] = 1,
+    recent_results_cache_hours: Annotated[
+        int,
+        typer.Option(
+            help="球队近期战绩缓存的最长有效时间（时，记录到球队更新的已结束比赛后缓存也会失效）"
+        ),
+    ] = 24,
+    local_recent_results_enabled: Annotated[
+        bool,
+        typer.Option(
+            "--local-recent-results/--no-local-recent-results",
+            help="先由本地记录的已结束比赛计算近期战绩，本地历史不足时才发送请求（本地只有生成过的期中的比赛，"
+            "球队的其他比赛缺失时结果不准确，只适用于连续生成了各期数据、且球队的比赛均在其中的项目）",
+        ),
+    ] = False,
 ):
     """更新数据"""
 
     project_path: Path = ctx.obj["project_path"]
     session: requests.Session = ctx.obj["session"]
 
-    global_data = DataTable(project_path).read()
+    global_data = DataTable(project_path).read(
+        where=(
+            {DataTable.volume_number: [volume_number]}
+            if volume_number is not None
+            else None
+        )
+    )
     team_data = TeamTable(project_path).read()
-
-    if volume_number is not None:
-        global_data = global_data.loc[
-            global_data[DataTable.volume_number] == volume_number
-        ]
+    # `team_data` 只由后台线程中的 `apply` 修改（更新球队价值），主线程只读取此处的球队名称
+    team_names = team_data[TeamTable.name].to_dict()
 
     rprint("正在读取数据...")
 
-    action.assign(project_path=project_path)
+    action.assign(
+        project_path=project_path,
+        recent_results_cache_hours=recent_results_cache_hours,
+        local_recent_results_enabled=local_recent_results_enabled,
+    )
     data = action.filter(indexes=global_data.index)
 
     if break_hours < 0:
@@ -311,14 +518,19 @@ def update(
         | (break_hours <= 0)
         | (global_data[DataTable.match_time] < break_time)
     ]
-    data.sort_values(
-        by=[DataTable.match_status, MatchInformationTable.updated_time],
-        ascending=[False, True],
-        inplace=True,
-    )
+    scheduler = MatchScheduler()
+    for match_id in data.index:
+        scheduler.push(
+            match_id,
+            global_data.loc[match_id, DataTable.match_time],
+            global_data.loc[match_id, DataTable.match_status],
+            data.loc[match_id, MatchInformationTable.updated_time],
+        )
+    data = data.loc[scheduler.ordered()]
 
+    update_count = len(data)
     if limit_count is not None:
-        data = data.iloc[:limit_count]
+        update_count = min(limit_count, update_count)
 
     if debug:
         save_to_csv(data, project_path, "processing")
@@ -337,7 +549,8 @@ def update(
     rprint()
 
     rprint("处理数据分析：")
-    Console().print(Markdown(data_analysis.to_markdown()))
+    rprint(Markdown(data_analysis.to_markdown()))
+    event("update_plan", action=action.table_name, **data_analysis["数量"].to_dict())
 
     rprint()
 
@@ -391,11 +604,11 @@ def update(
 
     rprint(f"开始更新{action.name}信息...")
 
-    ua = UserAgent(platforms=["desktop"]).random
+    ua = user_agents.random()
 
     interval_list: list[Interval] = []
     extra_interval_count = 0
-    for i in range(len(data) - 1):
+    for i in range(update_count - 1):
         delta = random.randint(-interval_offset_range, interval_offset_range)
         if random.random() < extra_interval_probability:
             interval_list.append(Interval(extra_interval + delta, True))
@@ -417,80 +630,202 @@ def update(
         TimeRemainingColumn(),
         console=stdout_console,
         auto_refresh=False,
+        disable=is_json_lines(),
     ) as progress:
-        task = progress.add_task(
-            f"正在更新{action.name}（按下 [bold]Ctrl[/bold] + [bold]C[/bold] 中断）...",
-            total=len(data) + interval_sum,
+        description = (
+            f"正在更新{action.name}（按下 [bold]Ctrl[/bold] + [bold]C[/bold] 中断）..."
         )
+        task = progress.add_task(description, total=update_count + interval_sum)
 
         def advance():
             progress.advance(task)
-            progress.refresh()
+            with profiler.phase("render"):
+                progress.refresh()
 
-        for index, match_id in enumerate(data.index):
-            rule(
-                f"正在更新第 [yellow]{index + 1}[/yellow] / [blue]{len(data)}[/blue] 场比赛"
+        def show_circuit():
+            circuit = circuit_breaker.describe()
+            progress.update(
+                task, description=description + (f"[red]{circuit}" if circuit else "")
             )
-
-            host_name = team_data.loc[
-                global_data.loc[match_id, DataTable.host_id], TeamTable.name
-            ]
-            guest_name = team_data.loc[
-                global_data.loc[match_id, DataTable.guest_id], TeamTable.name
-            ]
-
-            current_status = global_data.loc[match_id, DataTable.match_status]
-            last_updated_status = data.loc[
-                match_id, MatchInformationTable.updated_match_status
-            ]
-            current_status_text = (
-                f"[bold blue]{match_status_dict[current_status]}[/bold blue]"
-            )
-            last_updated_status_text = (
-                f"[bold yellow]{match_status_dict[last_updated_status]}[/bold yellow]"
+            with profiler.phase("render"):
+                progress.refresh()
+
+        data_file = DataTable(project_path).file
+        data_modified_time = data_file.stat().st_mtime
+
+        def refresh_status():
+            nonlocal global_data, data_modified_time
+            modified_time = data_file.stat().st_mtime
+            if modified_time == data_modified_time:
+                return
+            data_modified_time = modified_time
+            rprint("数据已发生变化，正在重新计算更新顺序...")
+            global_data = DataTable(project_path).read(
+                where={DataTable.match_id: global_data.index}
             )
-            status_text = f"比赛状态：{current_status_text}，上次更新时状态：{last_updated_status_text}"
-
-            rprint(
-                f"正在更新代号为 {match_id} 的比赛（{host_name} VS {guest_name}，{status_text}）的{action.name}信息..."
-            )
-
-            if data.loc[match_id, MatchInformationTable.updated_time] == -1.0:
-                rprint(f"该场比赛为从未获取过{action.name}的比赛")
-
-            before, after = action.update(
+            for scheduled_id in scheduler:
+                latest_status = global_data.loc[scheduled_id, DataTable.match_status]
+                if (
+                    latest_status not in status_list
+                    and not more_status_change[scheduled_id]
+                ):
+                    scheduler.remove(scheduled_id)
+                else:
+                    scheduler.update(scheduled_id, latest_status)
+
+        def apply(
+            index: int,
+            match_id: str,
+            match_data: DataTable,
+            current_status: int,
+            requested: bool,
+            fetched: Any,
+        ):
+            before, after = action.apply(
                 match_id=match_id,
-                global_data=global_data,
+                fetched=fetched,
+                global_data=match_data,
                 team_data=team_data,
-                session=session,
-                ua=ua,
-                request_trying_times=request_trying_times,
             )
+            metrics.inc("rows_updated_total", table=action.table_name)
+            metrics.match_updated()
             before = list(map(lambda x: "无" if pd.isna(x) else x, before))
 
             if before == after:
-                rprint(f"该场比赛的{action.name}信息未发生变化")
-                rprint("当前：")
+                rprint(f"该场比赛的{action.name}信息未发生变化", level="debug")
+                rprint("当前：", level="debug")
             else:
-                rprint(f"该场比赛的{action.name}信息已更新")
-                rprint("更新前：")
-                rprint(f"[red]{before}")
-                rprint("更新后：")
-            rprint(f"[bold blue]{after}")
+                rprint(f"该场比赛的{action.name}信息已更新", level="debug")
+                rprint("更新前：", level="debug")
+                rprint(f"[red]{before}", level="debug")
+                rprint("更新后：", level="debug")
+            rprint(f"[bold blue]{after}", level="debug")
+            event(
+                "match",
+                action=action.table_name,
+                match_id=match_id,
+                index=index + 1,
+                total=update_count,
+                status=current_status,
+                changed=before != after,
+                requested=requested,
+                before=before,
+                after=after,
+            )
 
             advance()
 
-            if index == len(data) - 1:
-                break
-
-            current_interval = interval_list[0]
-            if current_interval.extra:
-                rprint("[yellow]将使用额外更新间隔，请耐心等待")
-            sleep(current_interval.seconds, lambda _: advance())
-            interval_list.pop(0)
-
-            if random_ua:
-                ua = UserAgent(platforms=["desktop"]).random
+        # 解析与保存在后台线程中进行，与等待更新间隔重叠；更新间隔从上一次请求开始时计算，
+        # 因此请求频率只取决于更新间隔
+        pending: Future | None = None
+        # 退出时依次等待后台保存完成、写入视图
+        with action.batch(), circuit_breaker.listening(
+            show_circuit
+        ), ThreadPoolExecutor(max_workers=1, thread_name_prefix="apply") as applier:
+            index = 0
+            while index < update_count:
+                refresh_status()
+                if not scheduler:
+                    break
+                match_id = scheduler.pop()
+
+                profiler.set_match(match_id)
+                rule(
+                    f"正在更新第 [yellow]{index + 1}[/yellow] / [blue]{update_count}[/blue] 场比赛",
+                    level="debug",
+                )
+
+                host_name = team_names[global_data.loc[match_id, DataTable.host_id]]
+                guest_name = team_names[global_data.loc[match_id, DataTable.guest_id]]
+
+                current_status = global_data.loc[match_id, DataTable.match_status]
+                last_updated_status = data.loc[
+                    match_id, MatchInformationTable.updated_match_status
+                ]
+                current_status_text = (
+                    f"[bold blue]{match_status_dict[current_status]}[/bold blue]"
+                )
+                last_updated_status_text = f"[bold yellow]{match_status_dict[last_updated_status]}[/bold yellow]"
+                status_text = f"比赛状态：{current_status_text}，上次更新时状态：{last_updated_status_text}"
+
+                rprint(
+                    f"正在更新代号为 {match_id} 的比赛（{host_name} VS {guest_name}，{status_text}）的{action.name}信息...",
+                    level="debug",
+                )
+
+                if data.loc[match_id, MatchInformationTable.updated_time] == -1.0:
+                    rprint(f"该场比赛为从未获取过{action.name}的比赛", level="debug")
+
+                request_start = time.monotonic()
+                try:
+                    fetched = action.fetch(
+                        match_id=match_id,
+                        global_data=global_data,
+                        session=session,
+                        ua=ua,
+                        request_trying_times=request_trying_times,
+                    )
+                    requested = action.requested
+                except CircuitOpenError as e:
+                    # 未发送请求，将比赛放回队列，熔断结束后再获取，不计入更新数量
+                    rprint(f"[bold yellow]{e}，稍后重新更新该场比赛", level="warning")
+                    metrics.inc("matches_deferred_total", reason="circuit_open")
+                    event(
+                        "match_deferred",
+                        level="warning",
+                        action=action.table_name,
+                        match_id=match_id,
+                        host=e.host,
+                        retry_after=round(e.retry_after, 1),
+                    )
+                    scheduler.push(
+                        match_id,
+                        global_data.loc[match_id, DataTable.match_time],
+                        current_status,
+                        data.loc[match_id, MatchInformationTable.updated_time],
+                    )
+                    sleep_until(
+                        max(time.monotonic() + e.retry_after, request_start + interval)
+                    )
+                    continue
+
+                # 上一场比赛的结果应已在等待期间保存完毕，出错时在此抛出
+                if pending is not None:
+                    pending.result()
+                    pending = None
+                pending = applier.submit(
+                    apply,
+                    index,
+                    match_id,
+                    global_data,
+                    current_status,
+                    requested,
+                    fetched,
+                )
+
+                index += 1
+                if index == update_count or not scheduler:
+                    break
+
+                current_interval = interval_list.pop(0)
+                if not requested:
+                    progress.advance(task, current_interval.seconds)
+                    continue
+                if current_interval.extra:
+                    rprint("[yellow]将使用额外更新间隔，请耐心等待")
+                ticks = sleep_until(
+                    request_start + current_interval.seconds,
+                    None if progress.disable else lambda _: advance(),
+                )
+                progress.advance(task, current_interval.seconds - ticks)
+
+                if random_ua:
+                    ua = user_agents.random()
+
+            if pending is not None:
+                pending.result()
+
+    profiler.set_match(None)
 
     used_time = datetime.now() - start_time
     rprint(f"更新完成，用时 {used_time}")
@@ -0,0 +1,252 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Annotated, Optional
+
+import requests
+import typer
+
+from precise_bet import event, rprint, rule
+from precise_bet.cli.export import ExportFileFormats, export
+from precise_bet.cli.generate_data import fetch_volume
+from precise_bet.cli.update import Action, Actions
+from precise_bet.profiling import profiler
+from precise_bet.type import (
+    DataTable,
+    MatchInformationTable,
+    TeamTable,
+    match_status_dict,
+)
+from precise_bet.util import metrics, sleep, user_agents
+from precise_bet.util.scheduler import MatchScheduler, in_play_status
+
+
+def watch(
+    ctx: typer.Context,
+    volume_number: Annotated[
+        Optional[int],
+        typer.Option("--volume-number", "-v", help="期号（默认为当前期）"),
+    ] = None,
+    live_interval: Annotated[
+        int, typer.Option(help="有比赛进行中或即将开赛时的轮询间隔（秒）")
+    ] = 60,
+    idle_interval: Annotated[
+        int, typer.Option(help="没有比赛进行中时的轮询间隔（秒）")
+    ] = 600,
+    near_minutes: Annotated[
+        int, typer.Option(help="将多少分钟内开赛的比赛视为即将开赛")
+    ] = 30,
+    near_refresh_minutes: Annotated[
+        int, typer.Option(help="即将开赛的比赛的最短重新获取间隔（分钟）")
+    ] = 10,
+    update_value: Annotated[bool, typer.Option(help="获取从未获取过的球队价值")] = True,
+    update_handicap: Annotated[bool, typer.Option(help="更新亚盘")] = True,
+    update_recent_results: Annotated[
+        bool, typer.Option(help="获取从未获取过的近期战绩")
+    ] = True,
+    interval: Annotated[
+        int, typer.Option("--interval", "-i", help="比赛间的请求间隔（秒）")
+    ] = 5,
+    export_volume: Annotated[
+        bool, typer.Option("--export/--no-export", help="数据变化后导出当前期")
+    ] = True,
+    terminate_time: Annotated[
+        Optional[int], typer.Option(help="在指定时间后终止（秒）")
+    ] = None,
+    request_trying_times: Annotated[
+        int,
+        typer.Option("--request-trying-times", help="请求尝试次数（设为 0 无限尝试）"),
+    ] = 1,
+):
+    """
+    持续监视一期比赛
+
+    每次轮询只请求一次比赛列表页面，仅对状态发生变化或即将开赛的比赛获取详细数据。
+    """
+
+    project_path: Path = ctx.obj["project_path"]
+    session: requests.Session = ctx.obj["session"]
+
+    actions: list[tuple[Action, bool]] = []
+    if update_value:
+        actions.append((Actions.value_action.value, True))
+    if update_handicap:
+        actions.append((Actions.handicap_action.value, False))
+    if update_recent_results:
+        actions.append((Actions.recent_results_action.value, True))
+
+    previous_status: dict[str, int] = {}
+    if DataTable(project_path).file.exists():
+        previous_status = (
+            DataTable(project_path).read()[DataTable.match_status].to_dict()
+        )
+    fetched_time: dict[str, float] = {}
+
+    ua = user_agents.random()
+
+    start_time = datetime.now()
+    poll_times = 0
+
+    def expired() -> bool:
+        return (
+            bool(terminate_time)
+            and (datetime.now() - start_time).total_seconds() >= terminate_time
+        )
+
+    try:
+        while True:
+            poll_times += 1
+            rule(
+                f"正在进行第 [yellow]{poll_times}[/yellow] 次轮询"
+                "（按下 [bold]Ctrl[/bold] + [bold]C[/bold] 中断）"
+            )
+
+            data_set = fetch_volume(
+                project_path, session, volume_number, request_trying_times
+            )
+
+            if data_set is None:
+                # 获取持续失败时同样应按时结束
+                if expired():
+                    break
+                sleep(idle_interval)
+                continue
+
+            data = data_set.data.loc[
+                data_set.data[DataTable.volume_number] == data_set.volume_number
+            ]
+            now = datetime.now().timestamp()
+            near_time = now + near_minutes * 60
+
+            changed = [
+                match_id
+                for match_id, status in data[DataTable.match_status].items()
+                if previous_status.get(match_id) != status
+            ]
+            near = [
+                match_id
+                for match_id in data.index[
+                    (data[DataTable.match_status] == 0)
+                    & (data[DataTable.match_time] <= near_time)
+                ]
+                if now - fetched_time.get(match_id, 0) >= near_refresh_minutes * 60
+            ]
+
+            for match_id in changed:
+                old_status = previous_status.get(match_id)
+                old_status_text = (
+                    match_status_dict[old_status] if old_status is not None else "无"
+                )
+                rprint(
+                    f"比赛 {match_id} 状态变化：[bold yellow]{old_status_text}[/bold yellow]"
+                    f" -> [bold blue]{match_status_dict[data.loc[match_id, DataTable.match_status]]}[/bold blue]"
+                )
+            previous_status.update(data[DataTable.match_status].to_dict())
+
+            targets = list(dict.fromkeys(changed + near))
+            rprint(
+                f"状态变化的比赛 [bold]{len(changed)}[/bold] 场，"
+                f"即将开赛的比赛 [bold]{len(near)}[/bold] 场"
+            )
+
+            if targets:
+                team_data = TeamTable(project_path).read()
+                requested = False
+
+                for action, only_new in actions:
+                    action.assign(project_path=project_path)
+                    table = action.filter(indexes=targets)
+
+                    scheduler = MatchScheduler()
+                    for match_id in table.index:
+                        if (
+                            only_new
+                            and table.loc[match_id, MatchInformationTable.updated_time]
+                            != -1.0
+                        ):
+                            continue
+                        scheduler.push(
+                            match_id,
+                            data.loc[match_id, DataTable.match_time],
+                            data.loc[match_id, DataTable.match_status],
+                            table.loc[match_id, MatchInformationTable.updated_time],
+                        )
+
+                    if scheduler:
+                        rprint(
+                            f"正在更新 [bold]{len(scheduler)}[/bold] 场比赛的{action.name}信息..."
+                        )
+
+                    with action.batch():
+                        while scheduler:
+                            match_id = scheduler.pop()
+                            profiler.set_match(match_id)
+                            if requested:
+                                sleep(interval)
+                            requested = True
+                            try:
+                                before, after = action.update(
+                                    match_id=match_id,
+                                    global_data=data,
+                                    team_data=team_data,
+                                    session=session,
+                                    ua=ua,
+                                    request_trying_times=request_trying_times,
+                                )
+                            except Exception as e:
+                                traceback.print_exception(e)
+                                rprint(
+                                    f"[bold red]更新比赛 {match_id} 的{action.name}信息失败",
+                                    level="error",
+                                )
+                            else:
+                                requested = action.requested
+                                metrics.inc(
+                                    "rows_updated_total", table=action.table_name
+                                )
+                                metrics.match_updated()
+                                rprint(
+                                    f"{match_id}：{before} -> [bold blue]{after}",
+                                    level="debug",
+                                )
+                                event(
+                                    "match",
+                                    action=action.table_name,
+                                    match_id=match_id,
+                                    changed=before != after,
+                                    requested=action.requested,
+                                    before=before,
+                                    after=after,
+                                )
+
+                profiler.set_match(None)
+
+                for match_id in targets:
+                    fetched_time[match_id] = now
+
+                if export_volume:
+                    export(
+                        ctx,
+                        file_name_suffix=f"-{data_set.volume_number}",
+                        file_format=[ExportFileFormats.special.value],
+                        volume_number=data_set.volume_number,
+                    )
+
+            if expired():
+                break
+
+            live = (
+                data[DataTable.match_status].isin(in_play_status).any()
+                or (
+                    (data[DataTable.match_status] == 0)
+                    & (data[DataTable.match_time] <= near_time)
+                ).any()
+            )
+            rprint(f"{'有' if live else '没有'}比赛进行中或即将开赛")
+            sleep(live_interval if live else idle_interval)
+    except KeyboardInterrupt:
+        rule("[bold red]已中断")
+
+    rprint("[bold green]监视结束")
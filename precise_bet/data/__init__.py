@@ -1,7 +1,17 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
-from .handicap import get_match_handicap
+from .export_view import ExportView
+from .handicap import fetch_match_handicap, get_match_handicap, parse_handicap
+from .query_index import QueryIndex
+from .recent_form import local_recent_results
 from .recent_results import get_match_recent_results
-from .save import save, save_message, save_to_csv, save_to_excel, save_to_html
+from .save import (
+    replace_atomically,
+    save,
+    save_message,
+    save_to_csv,
+    save_to_excel,
+    save_to_html,
+)
 from .table import parse_table
-from .value import get_team_value
+from .value import fetch_team_value, get_team_value, parse_team_value
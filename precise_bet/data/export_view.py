@@ -0,0 +1,315 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import json
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Collection, Iterable
+
+import numpy as np
+import pandas as pd
+
+from precise_bet import rprint
+from precise_bet.data.save import replace_atomically
+from precise_bet.profiling import profiler
+from precise_bet.type import (
+    AverageEuropeOddTable,
+    Column,
+    DataTable,
+    ExportViewTable,
+    HandicapTable,
+    MatchInformationTable,
+    RecentResultsTable,
+    ScoreTable,
+    SpTable,
+    ValueTable,
+    read_tables,
+)
+
+# 视图的数据来源，各表的文件修改时间记录在 `export-view.json` 中，用于判断视图是否过期
+sources = [
+    DataTable,
+    ScoreTable,
+    ValueTable,
+    HandicapTable,
+    RecentResultsTable,
+    SpTable,
+    AverageEuropeOddTable,
+]
+
+
+def calculate_match_result(score_text: str):
+    score_list = score_text.split("-")
+    host_score = int(score_list[0].strip())
+    guest_score = int(score_list[1].strip())
+    if host_score > guest_score:
+        return "胜"
+    elif host_score == guest_score:
+        return "平"
+    else:
+        return "负"
+
+
+def calculate_result_with_concede(score_text: str, host_name: str):
+    score_list = score_text.split("-")
+    host_score = int(score_list[0].strip())
+    guest_score = int(score_list[1].strip())
+    concede_point = 0
+    concede_match = re.match(r".*\(([+-][\d.]+)\)", host_name)
+    if concede_match:
+        concede_point = int(concede_match.group(1))
+    if host_score + concede_point > guest_score:
+        return "胜"
+    elif host_score + concede_point == guest_score:
+        return "平"
+    else:
+        return "负"
+
+
+# 打包的一组近期战绩（`0` 至 `63`）对应的近况文本，`A`、`B`、`C` 分别表示胜、平、负，`-` 表示未知
+form_texts = np.array(
+    [
+        "".join("-ABC"[packed >> shift & 3] for shift in (0, 2, 4))
+        for packed in range(64)
+    ]
+)
+
+
+def calculate_recent_results(recent_results: pd.DataFrame) -> pd.DataFrame:
+    """
+    计算近期战绩在视图中的列
+
+    :param recent_results: 打包的近期战绩
+    :return: 每场比赛结果一列，以及 4 组近况文本
+    """
+
+    result = RecentResultsTable.results(recent_results)
+    for packed, column in zip(
+        RecentResultsTable.class_columns(), ExportViewTable.forms()
+    ):
+        result[column] = form_texts[recent_results[packed].to_numpy(dtype="uint8")]
+    return result
+
+
+def calculate_rows(
+    data: DataTable,
+    score: ScoreTable,
+    value: ValueTable,
+    handicap: HandicapTable,
+    recent_results: RecentResultsTable,
+    sp: SpTable,
+    odd: AverageEuropeOddTable,
+) -> pd.DataFrame:
+    """计算 `data` 中各场比赛在视图中的行"""
+
+    rows = pd.DataFrame(index=data.index)
+    for column in DataTable.class_columns():
+        rows[column] = data[column]
+
+    # '+' 为特殊运算符，表示合并，不可替换为模板字符串
+    score_str = (
+        score[ScoreTable.host_score].astype(str)
+        + " - "
+        + score[ScoreTable.guest_score].astype(str)
+    ).reindex(data.index)
+    rows[ExportViewTable.score] = score_str
+    rows[ExportViewTable.result] = score_str.apply(calculate_match_result)
+    rows[ExportViewTable.result_with_concede] = [
+        calculate_result_with_concede(score_text, host_name)
+        for score_text, host_name in zip(score_str, data[DataTable.host_name])
+    ]
+
+    for table in [odd, sp, value, handicap]:
+        columns = type(table).class_columns()
+        rows[columns] = table[columns]
+
+    recent = calculate_recent_results(recent_results)
+    rows[RecentResultsTable.result_columns()] = recent[
+        RecentResultsTable.result_columns()
+    ]
+    for column in ExportViewTable.forms():
+        rows[column] = recent[column].reindex(data.index, fill_value="---")
+
+    return rows
+
+
+class ExportView:
+    """
+    维护导出数据的物化视图 `ExportViewTable`
+
+    生成数据时按期更新视图中的行，更新数据时逐行更新，导出时直接读取视图。任何来源表在视图之外被修改后
+    （如其他进程或旧版本写入），视图即视为过期，下次导出时重新计算全部行。
+    """
+
+    def __init__(self, project_path: Path):
+        self.project_path = project_path
+        self.versions_file = project_path / f"{ExportViewTable.name_}.json"
+        self._rows: ExportViewTable | None = None
+        self._versions = self.stored_versions()
+        self._tracking = self.is_fresh()
+        # `deferred` 中被修改的来源表名称，修改尚未写入视图文件时不为 `None`
+        self._dirty: str | None = None
+        self._deferring = False
+
+    def current_versions(self) -> dict[str, int | None]:
+        result = {}
+        for table in sources:
+            file = self.project_path / f"{table.name_}.csv"
+            result[table.name_] = file.stat().st_mtime_ns if file.exists() else None
+        return result
+
+    def stored_versions(self) -> dict[str, int | None] | None:
+        if not self.versions_file.exists():
+            return None
+        return json.loads(self.versions_file.read_text(encoding="utf-8"))
+
+    def is_fresh(self) -> bool:
+        return (
+            self.stored_versions() == self.current_versions()
+            and ExportViewTable(self.project_path).file.exists()
+        )
+
+    def _save(self, rows: ExportViewTable):
+        rows.save()
+        self._versions = self.current_versions()
+        replace_atomically(
+            self.versions_file,
+            lambda p: p.write_text(json.dumps(self._versions), encoding="utf-8"),
+        )
+        self._tracking = True
+
+    def invalidate(self):
+        self._rows = None
+        self._tracking = False
+        self._dirty = None
+        self.versions_file.unlink(missing_ok=True)
+
+    def read(
+        self, where: dict[Column, Collection] | None = None
+    ) -> ExportViewTable | pd.DataFrame:
+        """
+        读取视图，过期时由来源表重新计算
+
+        :param where: 只读取各列的值均在给定范围内的行，见 `Table.read_from_file`
+        """
+
+        if self.is_fresh():
+            return ExportViewTable(self.project_path).read(where=where)
+
+        rprint("导出数据的视图已过期，正在重新计算...")
+        rows = self.rebuild(*read_tables(self.project_path, sources))
+        for column, values in (where or {}).items():
+            rows = rows.loc[rows[column].isin(values)]
+        return rows
+
+    def rebuild(self, *tables: MatchInformationTable | DataTable) -> ExportViewTable:
+        """由给定的来源表（按 `sources` 的顺序）重新计算全部行并保存"""
+
+        with profiler.phase("mutate"):
+            rows = self._typed(calculate_rows(*tables))
+        self._save(rows)
+        return rows
+
+    def _typed(self, frame: pd.DataFrame) -> ExportViewTable:
+        rows = ExportViewTable(self.project_path).create()
+        for column in rows.table_columns()[1:]:
+            rows[column] = frame[column].astype(column.current_type)
+        return rows
+
+    def refresh(self, match_ids: Iterable[str], *tables: MatchInformationTable):
+        """
+        生成数据后更新指定比赛的行
+
+        应在保存来源表之前创建本对象，以判断保存前视图是否为最新；视图原已过期时重新计算全部行。
+
+        :param match_ids: 要更新的比赛代号
+        :param tables: 已保存的来源表（按 `sources` 的顺序）
+        """
+
+        if not self._tracking:
+            self.rebuild(*tables)
+            return
+
+        rows = ExportViewTable(self.project_path).read()
+        with profiler.phase("mutate"):
+            data = tables[0]
+            data = data.loc[data.index.isin(list(match_ids))]
+            calculated = calculate_rows(data, *tables[1:])
+            rows = self._typed(
+                pd.concat(
+                    [rows.loc[~rows.index.isin(calculated.index)], calculated]
+                ).reindex(tables[0].index)
+            )
+        self._save(rows)
+
+    def _others_changed(self, name: str) -> bool:
+        """除 `name` 以外的来源表是否在上次保存视图后被修改过"""
+
+        current = self.current_versions()
+        return any(
+            current[source] != version
+            for source, version in self._versions.items()
+            if source != name
+        )
+
+    def update(self, table: MatchInformationTable, match_id: str):
+        """
+        更新数据后更新一场比赛的行
+
+        只有视图在创建本对象时为最新，且此后只有 `table` 被修改过时才更新，否则使视图过期。
+        在 `deferred` 中只修改内存中的视图，结束时再一并写入。
+        """
+
+        if not self._tracking:
+            return
+
+        if self._others_changed(table.name_):
+            self.invalidate()
+            return
+
+        if self._rows is None:
+            self._rows = ExportViewTable(self.project_path).read()
+        if match_id not in self._rows.index:
+            self.invalidate()
+            return
+
+        try:
+            with profiler.phase("mutate"):
+                if isinstance(table, RecentResultsTable):
+                    values = calculate_recent_results(table.loc[[match_id]])
+                else:
+                    values = table.loc[[match_id], type(table).class_columns()]
+                self._rows.loc[match_id, values.columns] = values.iloc[0].values
+        except BaseException:
+            # 来源表已保存，内存中的视图却可能只修改了一部分
+            self.invalidate()
+            raise
+        self._dirty = table.name_
+        if not self._deferring:
+            self.flush()
+
+    def flush(self):
+        """将 `update` 对视图的修改写入文件"""
+
+        if self._dirty is None:
+            return
+        if self._others_changed(self._dirty):
+            self.invalidate()
+            return
+        self._save(self._rows)
+        self._dirty = None
+
+    @contextmanager
+    def deferred(self):
+        """
+        在 `with` 语句中 `update` 只修改内存中的视图，结束（包括出错或中断）时写入一次
+
+        视图文件较大时，每场比赛都重写视图的耗时远超过保存来源表本身。
+        """
+
+        self._deferring = True
+        try:
+            yield
+        finally:
+            self._deferring = False
+            self.flush()
@@ -1,22 +1,53 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+import re
+
 import requests
 from bs4 import BeautifulSoup, Tag
 
+from precise_bet.profiling import profiler
+from precise_bet.type import MatchTable
 from precise_bet.util import request_content
 
+# 完整的平均值行，其后的内容均不需要
+footer_pattern = re.compile(r"<tr[^>]*xls=[\"']?footer.*?</tr>", re.S)
+
 
 def parse(td: Tag) -> list[float]:
     data_td = td.find_all("td")
     return [float(data_td[0].text), float(data_td[1].text), float(data_td[2].text)]
 
 
+def fetch_match_handicap(
+    match_id: str, session: requests.Session, ua: str, request_trying_times: int
+) -> str:
+    url = "https://odds.500.com/fenxi/yazhi-" + MatchTable.page_id(match_id) + ".shtml"
+
+    return request_content(
+        url,
+        session,
+        ua=ua,
+        trying_times=request_trying_times,
+        until=footer_pattern,
+    )
+
+
 def get_match_handicap(
     match_id: str, session: requests.Session, ua: str, request_trying_times: int
 ) -> list[float]:
-    url = "https://odds.500.com/fenxi/yazhi-" + match_id[1:] + ".shtml"
+    text = fetch_match_handicap(match_id, session, ua, request_trying_times)
+
+    with profiler.phase("parse"):
+        return parse_handicap(text)
+
+
+def parse_handicap(text: str) -> list[float]:
+    """
+    解析亚盘页面
 
-    text = request_content(url, session, ua=ua, trying_times=request_trying_times)
+    :param text: 亚盘页面
+    :return: 依次为平均即时水位 1、盘口、水位 2 与平均初始水位 1、盘口、水位 2
+    """
 
     soup = BeautifulSoup(text, "html.parser")
 
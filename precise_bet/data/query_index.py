@@ -0,0 +1,164 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import io
+import json
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterable
+
+from precise_bet import rprint
+from precise_bet.data.save import replace_atomically
+from precise_bet.profiling import profiler
+from precise_bet.type import DataTable, HandicapTable
+
+# 索引的数据来源，各表的文件修改时间记录在索引文件中，用于判断索引是否过期
+sources = [DataTable, HandicapTable]
+
+
+class QueryIndex:
+    """
+    `DataTable` 的二级索引，保存在 `query-index.json` 中
+
+    包括球队、赛事、期号到比赛代号的映射，按比赛时间排序的比赛代号，即时盘与初盘不同的比赛，
+    以及各比赛在 `data.csv` 中所在行的字节偏移量；查询时只读取命中的行，无需读取整个数据表。
+    来源表被修改后索引即视为过期，下次查询时重新建立。
+    """
+
+    def __init__(self, project_path: Path):
+        self.project_path = project_path
+        self.file = project_path / "query-index.json"
+        self.teams: dict[str, list[str]] = {}
+        self.leagues: dict[str, list[str]] = {}
+        self.volumes: dict[str, list[str]] = {}
+        self.times: list[int] = []
+        self.time_ids: list[str] = []
+        self.handicap_moved: list[str] = []
+        self.offsets: dict[str, int] = {}
+
+    def current_versions(self) -> dict[str, int | None]:
+        result = {}
+        for table in sources:
+            file = self.project_path / f"{table.name_}.csv"
+            result[table.name_] = file.stat().st_mtime_ns if file.exists() else None
+        return result
+
+    def load(self):
+        """读取索引，过期时重新建立"""
+
+        with profiler.phase("load"):
+            stored = (
+                json.loads(self.file.read_text(encoding="utf-8"))
+                if self.file.exists()
+                else None
+            )
+        if stored is None or stored["versions"] != self.current_versions():
+            rprint("查询索引已过期，正在重新建立...")
+            return self.rebuild()
+
+        self.teams = stored["teams"]
+        self.leagues = stored["leagues"]
+        self.volumes = stored["volumes"]
+        self.times = stored["times"]
+        self.time_ids = stored["time_ids"]
+        self.handicap_moved = stored["handicap_moved"]
+        self.offsets = stored["offsets"]
+        return self
+
+    def rebuild(self):
+        versions = self.current_versions()
+        data = DataTable(self.project_path).read_or_create(
+            columns=[
+                DataTable.volume_number,
+                DataTable.league_id,
+                DataTable.match_time,
+                DataTable.host_id,
+                DataTable.guest_id,
+            ]
+        )
+        handicap = HandicapTable(self.project_path).read_or_create(
+            columns=[
+                HandicapTable.live_average_handicap,
+                HandicapTable.early_average_handicap,
+            ]
+        )
+
+        with profiler.phase("mutate"):
+            self.teams = {}
+            for column in [DataTable.host_id, DataTable.guest_id]:
+                for team_id, ids in data.groupby(column).groups.items():
+                    self.teams.setdefault(str(team_id), []).extend(ids)
+            self.leagues = {
+                str(league_id): list(ids)
+                for league_id, ids in data.groupby(DataTable.league_id).groups.items()
+            }
+            self.volumes = {
+                str(volume): list(ids)
+                for volume, ids in data.groupby(DataTable.volume_number).groups.items()
+            }
+            ordered = data[DataTable.match_time].sort_values(kind="stable")
+            self.times = [int(t) for t in ordered]
+            self.time_ids = list(ordered.index)
+            live = handicap[HandicapTable.live_average_handicap]
+            early = handicap[HandicapTable.early_average_handicap]
+            moved = live.notna() & early.notna() & (live != early)
+            self.handicap_moved = list(handicap.index[moved.fillna(False)])
+            self.offsets = self._row_offsets()
+
+        replace_atomically(
+            self.file,
+            lambda p: p.write_text(
+                json.dumps(
+                    {
+                        "versions": versions,
+                        "teams": self.teams,
+                        "leagues": self.leagues,
+                        "volumes": self.volumes,
+                        "times": self.times,
+                        "time_ids": self.time_ids,
+                        "handicap_moved": self.handicap_moved,
+                        "offsets": self.offsets,
+                    },
+                    ensure_ascii=False,
+                ),
+                encoding="utf-8",
+            ),
+        )
+        return self
+
+    def _row_offsets(self) -> dict[str, int]:
+        # 数据表的索引列在第一列，且比赛代号不含逗号与引号
+        result = {}
+        file = DataTable(self.project_path).file
+        if not file.exists():
+            return result
+        with open(file, "rb") as f:
+            f.readline()
+            offset = f.tell()
+            for line in f:
+                result[line.split(b",", 1)[0].decode("utf-8")] = offset
+                offset += len(line)
+        return result
+
+    def between(self, start: int | None, end: int | None) -> list[str]:
+        """比赛时间在 `start` 与 `end` 之间（含两端）的比赛，按比赛时间排序"""
+
+        low = 0 if start is None else bisect_left(self.times, start)
+        high = len(self.times) if end is None else bisect_right(self.times, end)
+        return self.time_ids[low:high]
+
+    def read(self, match_ids: Iterable[str]) -> DataTable:
+        """只读取 `data.csv` 中指定比赛所在的行，数据表不存在时返回空表"""
+
+        match_ids = list(match_ids)
+        file = DataTable(self.project_path).file
+        if not match_ids or not file.exists():
+            return DataTable(self.project_path).create()
+        with profiler.phase("load"):
+            with open(file, "rb") as f:
+                buffer = io.BytesIO()
+                buffer.write(f.readline())
+                for match_id in match_ids:
+                    f.seek(self.offsets[match_id])
+                    buffer.write(f.readline())
+            buffer.seek(0)
+        return DataTable(self.project_path).read_from_file(buffer)
@@ -0,0 +1,118 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import numpy as np
+import pandas as pd
+
+from precise_bet.profiling import profiler
+from precise_bet.type import DataTable, LeagueTable, RecentResultsTable, ScoreTable
+
+# 与 500.com 近期战绩页面一致，不计入球会友谊赛
+friendly_keyword = "友谊"
+
+
+def team_history(data: DataTable, score: ScoreTable, league: LeagueTable):
+    """
+    将已结束的比赛展开为每队一行的历史记录，按球队、比赛时间排序
+
+    :return: 包含 `team`、`time`、`home`、`result` 列的表，`result` 为该队视角的比赛结果
+    """
+
+    finished = data.loc[
+        (data[DataTable.match_status] == 4) & data.index.isin(score.index)
+    ]
+    league_names = finished[DataTable.league_id].map(league[LeagueTable.name])
+    friendly = league_names.fillna("").str.contains(friendly_keyword, regex=False)
+    finished = finished.loc[~friendly]
+
+    # 比分表与数据表的 `主队`、`客队` 列同名，不能直接连接
+    scores = score.loc[finished.index]
+    difference = (
+        scores[ScoreTable.host_score] - scores[ScoreTable.guest_score]
+    ).to_numpy()
+    host_result = np.select(
+        [difference > 0, difference == 0], ["win", "draw"], default="lose"
+    )
+    guest_result = np.select(
+        [difference < 0, difference == 0], ["win", "draw"], default="lose"
+    )
+    times = finished[DataTable.match_time].to_numpy()
+
+    history = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "team": finished[DataTable.host_id].to_numpy(),
+                    "time": times,
+                    "home": True,
+                    "result": host_result,
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "team": finished[DataTable.guest_id].to_numpy(),
+                    "time": times,
+                    "home": False,
+                    "result": guest_result,
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+    return history.sort_values(["team", "time"], kind="stable", ignore_index=True)
+
+
+def last_three(history: pd.DataFrame, teams: pd.Series, times: pd.Series):
+    """
+    查询各队在指定时间前（不含）的最近 3 场比赛结果
+
+    :return: 与 `teams` 索引相同的 3 列，依次为最近的第 1、2、3 场，不足 3 场时为空
+    """
+
+    history = history.copy()
+    grouped = history.groupby("team")["result"]
+    history["r1"] = history["result"]
+    history["r2"] = grouped.shift(1)
+    history["r3"] = grouped.shift(2)
+
+    targets = pd.DataFrame(
+        {"team": teams.to_numpy(), "time": times.to_numpy(), "key": teams.index}
+    ).sort_values("time", kind="stable")
+    merged = pd.merge_asof(
+        targets,
+        history[["team", "time", "r1", "r2", "r3"]].sort_values("time", kind="stable"),
+        on="time",
+        by="team",
+        allow_exact_matches=False,
+    )
+    return merged.set_index("key")[["r1", "r2", "r3"]].reindex(teams.index)
+
+
+def local_recent_results(
+    data: DataTable, score: ScoreTable, league: LeagueTable, targets: pd.Index
+) -> pd.DataFrame:
+    """
+    由本地记录的比赛历史计算近期战绩
+
+    只有本地历史足以确定全部 12 场结果的比赛才会返回；缺少历史的比赛需通过网络获取。
+    本地历史只包含生成过的期中的比赛，因此适用于连续生成了各期数据的项目。
+
+    :param targets: 要计算的比赛代号
+    :return: 只包含可以由本地历史确定的比赛，列为 `RecentResultsTable.result_columns()`
+    """
+
+    with profiler.phase("mutate"):
+        history = team_history(data, score, league)
+        matches = data.loc[data.index.isin(targets)]
+        times = matches[DataTable.match_time]
+        host = matches[DataTable.host_id]
+        guest = matches[DataTable.guest_id]
+
+        parts = [
+            last_three(history, host, times),
+            last_three(history, guest, times),
+            last_three(history.loc[history["home"]], host, times),
+            last_three(history.loc[~history["home"]], guest, times),
+        ]
+        results = pd.concat(parts, axis=1)
+        results.columns = RecentResultsTable.result_columns()
+        return results.dropna()
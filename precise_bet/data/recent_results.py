@@ -1,20 +1,76 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import requests
 from bs4 import BeautifulSoup, Tag
 
+from precise_bet.profiling import profiler
+from precise_bet.type import MatchTable
 from precise_bet.util import post_request_content, request_content
 
 
+@dataclass
+class DetailedQuery:
+    """对一张近期战绩表的详细查询"""
+
+    api_variant_parameter_0: str
+    api_variant_parameter_1: str
+    allowed_match_types: list[str]
+    disabled_match_type: str
+
+
 def get_match_recent_results(
     match_id: str, session: requests.Session, ua: str, request_trying_times: int
 ) -> list[str]:
-    url = "https://odds.500.com/fenxi/shuju-" + match_id[1:] + ".shtml"
+    url = "https://odds.500.com/fenxi/shuju-" + MatchTable.page_id(match_id) + ".shtml"
 
     text = request_content(
         url, session, ua=ua, encoding="gb2312", trying_times=request_trying_times
     )
 
+    with profiler.phase("parse"):
+        query_hash, team_results = parse_page(text)
+
+        results = [parse_table(table) for table in team_results]
+
+        # 先规划全部详细查询，再并发发送，使一场比赛最多只需在主页面之后等待一轮请求
+        queries = {
+            index: plan_detailed_query(table)
+            for index, (table, result) in enumerate(zip(team_results, results))
+            if len(result) < 3
+        }
+
+    if queries:
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            texts = executor.map(
+                lambda query: request_detailed_recent_results(
+                    match_id, query_hash, query, session, ua, request_trying_times
+                ),
+                queries.values(),
+            )
+            for index, detailed_text in zip(queries, texts):
+                with profiler.phase("parse"):
+                    results[index] = parse_table(
+                        BeautifulSoup(detailed_text, "html.parser")
+                    )
+
+    result = []
+    for team_result in results:
+        result += team_result + ["unknown"] * (3 - len(team_result))
+
+    return result
+
+
+def parse_page(text: str) -> tuple[str, list[Tag]]:
+    """
+    解析比赛数据页面
+
+    :param text: 比赛数据页面
+    :return: 查询哈希，以及依次为主队近期、客队近期、主队主场、客队客场的 4 张近期战绩表
+    """
+
     soup = BeautifulSoup(text, "html.parser")
 
     query_hash = soup.find(id="hash")["value"]
@@ -22,41 +78,19 @@ def get_match_recent_results(
     record = soup.find("div", class_="M_box record")
     tables = record.find_all("div", class_="odds_zj_tubiao")
 
-    result = []
-
+    team_results = []
     for table in tables:
-        divs = table.find_all("div", recursive=False)
-        for div in divs[:2]:
-            result += parse_table(
-                match_id,
-                div,
-                query_hash,
-                session,
-                ua,
-                request_trying_times,
-            )
+        team_results += table.find_all("div", recursive=False)[:2]
 
-    return result
+    return query_hash, team_results
 
 
-def parse_table(
-    match_id: str,
-    team_results: Tag,
-    query_hash: str,
-    session: requests.Session = None,
-    ua: str = None,
-    request_trying_times: int = None,
-) -> list[str]:
+def parse_table(team_results: Tag) -> list[str]:
     """
     解析球队近期比赛结果
 
-    :param match_id: 比赛 ID
-    :param team_results: 带有 `id` 以 `team_zhanji` 开头的 `div` 标签
-    :param query_hash: 网页中的查询哈希
-    :param session: 请求会话
-    :param ua: User-Agent
-    :param request_trying_times: 请求尝试次数
-    :return: 近 3 场比赛结果
+    :param team_results: 带有 `id` 以 `team_zhanji` 开头的 `div` 标签，或详细查询的结果
+    :return: 至多 3 场比赛结果
     """
 
     trs = team_results.find_all("tr")
@@ -76,73 +110,62 @@ def parse_table(
         elif match_result == "负":
             result.append("lose")
 
-    if session and ua and request_trying_times and len(result) < 3:
-        api_variant = team_results["id"][11:].split("_")
-
-        form = team_results.find("div", class_="record_check")
-        allowed_match_types = []
-        disabled_match_type = ""
-        for option in form.find_all("span", class_="mar_right15"):
-            match_type = option.find("input")["value"]
-
-            if option.text.strip() == "球会友谊":
-                disabled_match_type = match_type
-            else:
-                allowed_match_types.append(match_type)
-
-        result = get_detailed_recent_results(
-            match_id,
-            query_hash,
-            api_variant[0],
-            api_variant[1],
-            allowed_match_types,
-            disabled_match_type,
-            session,
-            ua,
-            request_trying_times,
-        )
-
-    for _ in range(0, 3 - len(result)):
-        result.append("unknown")
-
     return result
 
 
-def get_detailed_recent_results(
+def plan_detailed_query(team_results: Tag) -> DetailedQuery:
+    """
+    根据近期战绩表的筛选表单规划详细查询
+
+    :param team_results: 带有 `id` 以 `team_zhanji` 开头的 `div` 标签
+    """
+
+    api_variant = team_results["id"][11:].split("_")
+
+    form = team_results.find("div", class_="record_check")
+    allowed_match_types = []
+    disabled_match_type = ""
+    for option in form.find_all("span", class_="mar_right15"):
+        match_type = option.find("input")["value"]
+
+        if option.text.strip() == "球会友谊":
+            disabled_match_type = match_type
+        else:
+            allowed_match_types.append(match_type)
+
+    return DetailedQuery(
+        api_variant[0], api_variant[1], allowed_match_types, disabled_match_type
+    )
+
+
+def request_detailed_recent_results(
     match_id: str,
     query_hash: str,
-    api_variant_parameter_0: str,
-    api_variant_parameter_1: str,
-    allowed_match_types: list[str],
-    disabled_match_type: str,
+    query: DetailedQuery,
     session: requests.Session,
     ua: str,
     request_trying_times: int,
-) -> list[str]:
+) -> str:
     url = (
         "https://odds.500.com/fenxi1/inc/shuju_zhanji"
-        + api_variant_parameter_0
+        + query.api_variant_parameter_0
         + ".php"
     )
 
     data = {
-        "id": match_id[1:],
+        "id": MatchTable.page_id(match_id),
         "hash": query_hash,
         "limit": 6,
-        "hoa": api_variant_parameter_1,
+        "hoa": query.api_variant_parameter_1,
         "bhbc": 0,
         "callback": "ajax",
         "r": 1,
-        f"match[{disabled_match_type}]": -1,
+        f"match[{query.disabled_match_type}]": -1,
     }
 
-    for match_type in allowed_match_types:
+    for match_type in query.allowed_match_types:
         data[f"match[{match_type}]"] = 1
 
-    text = post_request_content(
+    return post_request_content(
         url, data, session, ua=ua, encoding="utf-8", trying_times=request_trying_times
     )
-
-    soup = BeautifulSoup(text, "html.parser")
-
-    return parse_table(match_id, soup, query_hash)
@@ -1,24 +1,44 @@
 #  Copyright (C) 2023  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+import os
+import uuid
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable
 
 from pandas import DataFrame
 from pandas.io.formats.style import Styler
 
 from precise_bet import rprint
+from precise_bet.profiling import profiler
 from precise_bet.util import mkdir
 
 
 def save_message(path: Path, func: Callable):
-    rprint('正在保存数据...')
+    rprint('正在保存数据...', level='debug')
     mkdir(path.parent)
-    rprint(f'正在保存到 [bold]{path}[/bold] ...')
-    func()
+    rprint(f'正在保存到 [bold]{path}[/bold] ...', level='debug')
+    with profiler.phase('save'):
+        func()
 
 
-def save(data: DataFrame | Styler, path: Path, func: Callable):
-    save_message(path, lambda: func(data, path))
+def replace_atomically(path: Path, func: Callable[[Path], Any]):
+    """
+    先由 `func` 写入同一目录下的临时文件，写入完成后替换 `path`
+
+    写入中断时不会留下写了一半的文件，其他进程也不会读到写了一半的文件。临时文件与 `path` 的扩展名相同，
+    以便按扩展名选择格式的写入方法正常工作。
+    """
+
+    temp = path.with_name(f'.{path.stem}-{uuid.uuid4().hex}{path.suffix}')
+    try:
+        func(temp)
+        os.replace(temp, path)
+    finally:
+        temp.unlink(missing_ok=True)
+
+
+def save(data: Any, path: Path, func: Callable):
+    save_message(path, lambda: replace_atomically(path, lambda p: func(data, p)))
 
 
 def save_to_html(data: DataFrame | Styler, path: Path, file_name: str, extension: str = '.html'):
@@ -20,6 +20,8 @@ from precise_bet.type import (
     SpTable,
     TeamTable,
     ValueTable,
+    read_tables,
+    save_tables,
 )
 
 
@@ -36,21 +38,40 @@ class DataSet:
     league: LeagueTable
     team: TeamTable
 
+    def save(self):
+        save_tables(
+            self.data,
+            self.score,
+            self.value,
+            self.handicap,
+            self.recent_results,
+            self.sp,
+            self.odd,
+            self.league,
+            self.team,
+        )
+
 
 def parse_table(project_path: Path, html: str) -> DataSet:
     soup = BeautifulSoup(html, features="html.parser")
 
     volume_number = int(soup.find(id="sel_expect").text.strip())
 
-    data = DataTable(project_path).read_or_create()
-    score = ScoreTable(project_path).read_or_create()
-    value = ValueTable(project_path).read_or_create()
-    handicap = HandicapTable(project_path).read_or_create()
-    recent_results = RecentResultsTable(project_path).read_or_create()
-    sp = SpTable(project_path).read_or_create()
-    odd = AverageEuropeOddTable(project_path).read_or_create()
-    league = LeagueTable(project_path).read_or_create()
-    team = TeamTable(project_path).read_or_create()
+    data, score, value, handicap, recent_results, sp, odd, league, team = read_tables(
+        project_path,
+        [
+            DataTable,
+            ScoreTable,
+            ValueTable,
+            HandicapTable,
+            RecentResultsTable,
+            SpTable,
+            AverageEuropeOddTable,
+            LeagueTable,
+            TeamTable,
+        ],
+        create=True,
+    )
 
     trs: list[Tag] = soup.find("tbody").find_all("tr")
 
@@ -69,7 +90,8 @@ def parse_table(project_path: Path, html: str) -> DataSet:
             rprint(
                 f"[bold yellow]在第 {volume_number} 期发现重复的比赛 {match_id}，"
                 f"已有的数据位于第 {data.loc[match_id, DataTable.volume_number]} 期。"
-                "跳过该比赛..."
+                "跳过该比赛...",
+                level="warning",
             )
             continue
 
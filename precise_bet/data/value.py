@@ -5,32 +5,60 @@ import re
 import requests
 
 from precise_bet import rprint
+from precise_bet.profiling import profiler
 from precise_bet.util import request_content
 
+value_pattern = re.compile(r"球队身价：(\d+(\.\d+)?)([万|亿])欧")
+
+
+def fetch_team_value(
+    team_id: int, session: requests.Session, ua: str, request_trying_times: int
+) -> str:
+    url = "https://liansai.500.com/team/" + str(team_id)
+
+    rprint(f"正在获取代号为 [bold]{team_id}[/bold] 的球队价值信息...", level="debug")
+
+    # 球队身价位于页面前半部分，匹配到后即可停止接收
+    return request_content(
+        url,
+        session,
+        ua=ua,
+        trying_times=request_trying_times,
+        until=value_pattern,
+    )
+
 
 def get_team_value(
     team_id: int, session: requests.Session, ua: str, request_trying_times: int
 ) -> int:
-    url = "https://liansai.500.com/team/" + str(team_id)
+    text = fetch_team_value(team_id, session, ua, request_trying_times)
+
+    with profiler.phase("parse"):
+        return parse_team_value(text)
+
 
-    rprint(f"正在获取代号为 [bold]{team_id}[/bold] 的球队价值信息...")
+def parse_team_value(text: str) -> int:
+    """
+    解析球队页面
 
-    text = request_content(url, session, ua=ua, trying_times=request_trying_times)
+    :param text: 球队页面
+    :return: 球队价值（万欧），未找到时为 0
+    """
 
     name = re.search(r'<h2 class="lsnav_qdnav_name">(.+)</h2>', text)
     if name:
-        rprint(f"球队名称为 [bold blue]{name.group(1)}[/bold blue]")
+        rprint(f"球队名称为 [bold blue]{name.group(1)}[/bold blue]", level="debug")
     else:
-        rprint("[bold yellow]未找到球队名称")
+        rprint("[bold yellow]未找到球队名称", level="warning")
 
-    rprint("正在匹配...")
+    rprint("正在匹配...", level="debug")
 
-    match = re.search(r"球队身价：(\d+(\.\d+)?)([万|亿])欧", text)
+    match = value_pattern.search(text)
     if match is None:
-        rprint("[bold yellow]匹配失败。将该球队价值设为 0")
+        rprint("[bold yellow]匹配失败。将该球队价值设为 0", level="warning")
         return 0
 
-    rprint(f"匹配到{match.group(0)}")
+    rprint(f"匹配到{match.group(0)}", level="debug")
 
     value = float(match.group(1))
 
@@ -13,20 +13,22 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import importlib
+import multiprocessing
 import sys
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Optional
 
-import pandas as pd
-import requests
+import click
 import typer
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.prompt import Confirm
+from typer.core import TyperGroup
+from typer.main import get_command_from_info
+from typer.models import CommandInfo
 
-from precise_bet import __version__, rprint, stdout_console
-from precise_bet.cli import export, flow, generate_data, gui, okooo, update
-from precise_bet.type import match_status_dict
+from precise_bet import __version__, configure_output, event, rprint, stdout_console
 
 notice = (
     f"PreciseBet {__version__}  Copyright (C) 2023  LTFan (aka xfqwdsj)\n\n"
@@ -36,7 +38,85 @@ notice = (
     f"Type `{sys.argv[0]} license' to read.  If not, see <https://www.gnu.org/licenses/>.\n\n"
 )
 
-cli = typer.Typer(rich_markup_mode="markdown")
+# 子命令及其依赖（pandas、BeautifulSoup、openpyxl、tkinter 等）仅在首次使用时导入
+lazy_commands = {
+    "generate-data": "precise_bet.cli.generate_data:generate_data",
+    "update": "precise_bet.cli.update:update",
+    "export": "precise_bet.cli.export:export",
+    "flow": "precise_bet.cli.flow:flow",
+    "gui": "precise_bet.cli.gui:gui",
+    "okooo": "precise_bet.cli.okooo:okooo",
+    "watch": "precise_bet.cli.watch:watch",
+    "query": "precise_bet.cli.query:query",
+}
+
+
+class LazyGroup(TyperGroup):
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return list(self.commands) + [
+            name for name in lazy_commands if name not in self.commands
+        ]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.commands and cmd_name in lazy_commands:
+            module_name, function_name = lazy_commands[cmd_name].split(":")
+            callback = getattr(importlib.import_module(module_name), function_name)
+            self.commands[cmd_name] = get_command_from_info(
+                CommandInfo(name=cmd_name, callback=callback),
+                pretty_exceptions_short=True,
+                rich_markup_mode="markdown",
+            )
+        return super().get_command(ctx, cmd_name)
+
+
+class ContextObject(dict):
+    """命令上下文，请求会话在首次使用时才创建"""
+
+    def __missing__(self, key):
+        if key == "session":
+            import requests
+
+            self[key] = requests.Session()
+            return self[key]
+        raise KeyError(key)
+
+
+cli = typer.Typer(rich_markup_mode="markdown", cls=LazyGroup)
+
+
+def start_profiling(ctx: typer.Context, project_path: Path, use_cprofile: bool):
+    """开始统计子命令各阶段的耗时，子命令结束后输出汇总并将报告保存到项目的 `profile` 目录"""
+
+    import cProfile
+    from datetime import datetime
+
+    from precise_bet.profiling import profiler
+
+    name = ctx.invoked_subcommand or "cli"
+    profiler.enable()
+    profiler.start_command(name)
+    c_profile = cProfile.Profile() if use_cprofile else None
+    if c_profile:
+        c_profile.enable()
+
+    def finish():
+        if c_profile:
+            c_profile.disable()
+        profiler.finish_command()
+
+        report_path = project_path / "profile"
+        report_path.mkdir(exist_ok=True)
+        file_name = f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+        event("profile", **profiler.to_dict())
+        rprint(profiler.summary())
+        profiler.save(report_path / f"{file_name}.json")
+        rprint(f"性能报告已保存到 [bold]{report_path / file_name}.json[/bold]")
+        if c_profile:
+            c_profile.dump_stats(report_path / f"{file_name}.prof")
+            rprint(f"cProfile 数据已保存到 [bold]{report_path / file_name}.prof[/bold]")
+
+    ctx.call_on_close(finish)
 
 
 @cli.callback()
@@ -45,6 +125,77 @@ def cli_main(
     project_path: Annotated[
         Path, typer.Option("--project-path", "-p", help="项目路径")
     ] = "./project/",
+    hedge_percentile: Annotated[
+        Optional[float],
+        typer.Option(
+            help="对冲请求的延迟百分位（0-100，GET 请求超过该百分位的延迟仍未完成时发送一次备用请求，不设置则不启用）"
+        ),
+    ] = None,
+    hedge_budget: Annotated[
+        float, typer.Option(help="对冲请求占全部请求的最大比例（0-1）")
+    ] = 0.05,
+    circuit_failure_threshold: Annotated[
+        Optional[int],
+        typer.Option(
+            help="同一主机连续多少次请求失败（未收到响应或状态码为 429、5xx）后熔断，设为 0 不启用（默认为 5）"
+        ),
+    ] = None,
+    circuit_open_seconds: Annotated[
+        Optional[float],
+        typer.Option(help="熔断的时长（秒），之后放行一个试探请求（默认为 60）"),
+    ] = None,
+    circuit_mode: Annotated[
+        Optional[str],
+        typer.Option(
+            help="熔断期间对该主机的请求：`pause` 等待熔断结束，`skip` 跳过（如推迟该场比赛）（默认为 `pause`）",
+            click_type=click.Choice(["pause", "skip"]),
+        ),
+    ] = None,
+    base_url: Annotated[
+        Optional[str],
+        typer.Option(
+            help="将全部请求发往该基础 URL（如本地替身服务器 `http://127.0.0.1:8500`），原地址的主机名作为路径的第一段"
+        ),
+    ] = None,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            help="统计各阶段（请求、解码、解析、读取、修改、保存、等待、输出）的耗时，并将报告保存到项目的 `profile` 目录"
+        ),
+    ] = False,
+    use_cprofile: Annotated[
+        bool, typer.Option("--cprofile", help="统计耗时的同时使用 cProfile 记录调用")
+    ] = False,
+    metrics_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="定时将请求延迟、重试、503 次数、缓存命中、更新行数等指标写入该文件（如 Prometheus node_exporter 的 textfile 目录）"
+        ),
+    ] = None,
+    metrics_format: Annotated[
+        str,
+        typer.Option(
+            help="指标文件格式",
+            click_type=click.Choice(["prometheus", "json"]),
+        ),
+    ] = "prometheus",
+    metrics_interval: Annotated[
+        float, typer.Option(help="写入指标文件的间隔（秒）")
+    ] = 15,
+    log_level: Annotated[
+        Optional[str],
+        typer.Option(
+            help="最低输出级别（默认：rich 格式下输出全部信息，JSON Lines 格式下为 info）",
+            click_type=click.Choice(["debug", "info", "warning", "error"]),
+        ),
+    ] = None,
+    log_format: Annotated[
+        str,
+        typer.Option(
+            help="输出格式，`auto` 表示标准输出为终端时使用 rich，否则每条信息及每个请求、每场比赛的事件输出为一行 JSON",
+            click_type=click.Choice(["auto", "rich", "json"]),
+        ),
+    ] = "auto",
 ):
     """
     一个用于获取 500.com 足球数据的命令行工具
@@ -69,6 +220,12 @@ def cli_main(
        precise_bet export --help
        ```
 
+    4. 查询数据
+
+       ```
+       precise_bet query --help
+       ```
+
     ## 傻瓜式工作流
 
     ```
@@ -76,9 +233,11 @@ def cli_main(
     ```
     """
 
+    configure_output(log_level, log_format)
+
     rprint(notice, highlight=False)
 
-    ctx.ensure_object(dict)
+    ctx.ensure_object(ContextObject)
 
     if project_path.exists() and not project_path.is_dir():
         confirm = Confirm.ask(
@@ -96,13 +255,48 @@ def cli_main(
 
     project_path.mkdir(exist_ok=True)
     ctx.obj["project_path"] = project_path
-    ctx.obj["session"] = requests.Session()
+
+    if hedge_percentile is not None:
+        from precise_bet.util import configure_hedging
+
+        configure_hedging(hedge_percentile, hedge_budget)
+
+    # 未指定时无需配置，以免不发送请求的命令也导入请求模块
+    circuit = (circuit_failure_threshold, circuit_open_seconds, circuit_mode)
+    if any(option is not None for option in circuit):
+        from precise_bet.util import circuit_breaker
+
+        circuit_breaker.configure(
+            circuit_failure_threshold, circuit_open_seconds, circuit_mode
+        )
+
+    if base_url is not None:
+        from precise_bet.util import configure_base_url
+
+        configure_base_url(base_url)
+
+    if profile:
+        start_profiling(ctx, project_path, use_cprofile)
+
+    if metrics_file is not None:
+        from precise_bet.util import metrics
+        from precise_bet.util.metrics import MetricsExporter
+
+        exporter = MetricsExporter(
+            metrics, metrics_file, metrics_format, metrics_interval
+        )
+        exporter.start()
+        ctx.call_on_close(exporter.stop)
 
 
 @cli.command()
 def print_match_status_codes():
     """显示比赛状态列表"""
 
+    import pandas as pd
+
+    from precise_bet.type import match_status_dict
+
     df = pd.DataFrame(match_status_dict, index=["状态"]).transpose().to_markdown()
     Console().print(Markdown(df))
 
@@ -123,15 +317,9 @@ def about():
     rprint(f"PreciseBet [green]{__version__}", highlight=False)
 
 
-cli.command()(generate_data)
-cli.command()(update)
-cli.command()(export)
-cli.command()(flow)
-cli.command()(gui)
-cli.command()(okooo)
-
-
 def main():
+    # `okooo` 的批量模式在子进程中解析页面，打包后需要此调用
+    multiprocessing.freeze_support()
     cli()
 
 
@@ -0,0 +1,189 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+
+from rich.table import Table
+
+# 各阶段依次为：网络请求、响应解码、页面解析、读取数据表、修改数据表、保存文件、等待更新间隔、控制台输出
+phases = ["fetch", "decode", "parse", "load", "mutate", "save", "sleep", "render"]
+
+
+@dataclass
+class CommandProfile:
+    name: str
+    depth: int
+    start: float
+    wall: float = 0
+    phases: dict[str, float] = field(default_factory=dict)
+    matches: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "wall": self.wall,
+            "phases": self.phases,
+            "other": max(0.0, self.wall - sum(self.phases.values())),
+            "matches": self.matches,
+        }
+
+
+class _Disabled:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_disabled = _Disabled()
+
+
+class _Phase:
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+        return self
+
+    def __exit__(self, *_):
+        self.profiler._exit()
+        return False
+
+
+class _Scope:
+    def __init__(self, enter, exit_):
+        self._enter = enter
+        self._exit = exit_
+
+    def __enter__(self):
+        self._enter()
+        return self
+
+    def __exit__(self, *_):
+        self._exit()
+        return False
+
+
+class Profiler:
+    """
+    按阶段统计耗时
+
+    阶段可以嵌套，耗时只计入最内层的阶段；在其他线程中进入的阶段（如并发请求）按线程分别计时，
+    因此各阶段之和可能超过墙上时间。未启用时各方法均为空操作。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.commands: list[CommandProfile] = []
+        self._commands: list[CommandProfile] = []
+        self._match: str | None = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+        self.commands.clear()
+
+    def _charge(self, name: str, seconds: float):
+        with self._lock:
+            if not self._commands:
+                return
+            command = self._commands[-1]
+            command.phases[name] = command.phases.get(name, 0) + seconds
+            if self._match is not None:
+                match = command.matches.setdefault(self._match, {})
+                match[name] = match.get(name, 0) + seconds
+
+    def _enter(self, name: str):
+        local = self._local
+        now = perf_counter()
+        stack = getattr(local, "stack", None)
+        if stack is None:
+            stack = local.stack = []
+        if stack:
+            self._charge(stack[-1], now - local.mark)
+        stack.append(name)
+        local.mark = now
+
+    def _exit(self):
+        local = self._local
+        now = perf_counter()
+        self._charge(local.stack.pop(), now - local.mark)
+        local.mark = now
+
+    def phase(self, name: str):
+        """在 `with` 语句中统计一个阶段的耗时"""
+
+        if not self.enabled:
+            return _disabled
+        return _Phase(self, name)
+
+    def command(self, name: str):
+        """在 `with` 语句中统计一个命令（包括在流程中调用的命令）"""
+
+        if not self.enabled:
+            return _disabled
+        return _Scope(lambda: self.start_command(name), self.finish_command)
+
+    def set_match(self, match_id: str | None):
+        """将之后的阶段耗时同时计入指定比赛，直至切换到下一场比赛或设为 `None`"""
+
+        self._match = match_id
+
+    def start_command(self, name: str):
+        with self._lock:
+            command = CommandProfile(name, len(self._commands), perf_counter())
+            self._commands.append(command)
+            self.commands.append(command)
+
+    def finish_command(self):
+        with self._lock:
+            command = self._commands.pop()
+            command.wall = perf_counter() - command.start
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": phases,
+            "commands": [command.to_dict() for command in self.commands],
+        }
+
+    def summary(self) -> Table:
+        """各阶段在各命令中的耗时（秒），更新了比赛的命令另附每场比赛的平均耗时"""
+
+        table = Table("阶段")
+        columns: list[list[str]] = []
+        for command in self.commands:
+            result = command.to_dict()
+            table.add_column("  " * command.depth + command.name, justify="right")
+            columns.append(
+                [f"{command.phases.get(phase, 0):.2f}" for phase in phases]
+                + [f"{result['other']:.2f}", f"{command.wall:.2f}"]
+            )
+            if command.matches:
+                count = len(command.matches)
+                table.add_column("每场平均", justify="right")
+                columns.append(
+                    [
+                        f"{sum(m.get(phase, 0) for m in command.matches.values()) / count:.3f}"
+                        for phase in phases
+                    ]
+                    + ["", ""]
+                )
+        for index, name in enumerate(phases + ["other", "total"]):
+            table.add_row(name, *[column[index] for column in columns])
+        return table
+
+    def save(self, path: Path):
+        path.write_text(
+            json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+
+profiler = Profiler()
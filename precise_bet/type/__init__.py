@@ -4,6 +4,7 @@ from .table import (
     AverageEuropeOddTable,
     Column,
     DataTable,
+    ExportViewTable,
     HandicapTable,
     LeagueTable,
     MatchInformationTable,
@@ -15,9 +16,13 @@ from .table import (
     ScoreTable,
     SpTable,
     Table,
+    TeamRecentResultsTable,
     TeamTable,
     UpdatableRow,
     UpdatableTable,
     ValueTable,
+    compact_dtypes,
     match_status_dict,
+    read_tables,
+    save_tables,
 )
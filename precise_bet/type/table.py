@@ -1,18 +1,25 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+import io
+import os
 from abc import ABC
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Collection
 
+import numpy as np
 import pandas as pd
 
 # noinspection PyProtectedMember
 from pandas._typing import Dtype
 
+from precise_bet.profiling import profiler
+
 match_status_dict = {
     -2: "从旧数据导入",
     -1: "无",
@@ -32,6 +39,30 @@ match_status_dict = {
 }
 
 
+_compact = False
+
+# 带有过滤条件时每次读取的行数
+read_chunk_rows = 20_000
+
+
+@contextmanager
+def compact_dtypes():
+    """
+    在 `with` 语句中以紧凑的类型创建与读取数据表，以减少内存占用
+
+    比赛代号去掉前缀后存为整数，名称等重复较多的文本存为分类，赔率与盘口存为 32 位浮点数；
+    保存时比赛代号恢复为带前缀的文本，因此文件格式不变。分类列不能写入新的值，只适用于只读的命令（如导出）。
+    """
+
+    global _compact
+    previous = _compact
+    _compact = True
+    try:
+        yield
+    finally:
+        _compact = previous
+
+
 class ColumnOrder(Enum):
     index = 0
     name = 1
@@ -45,6 +76,16 @@ class Column:
     name: str
     type: Dtype
     order: ColumnOrder = ColumnOrder.content
+    # 紧凑模式下使用的类型，为 `None` 时与 `type` 相同
+    compact: Dtype | None = None
+
+    @property
+    def current_type(self) -> Dtype:
+        """当前模式下使用的类型"""
+
+        if _compact and self.compact is not None:
+            return self.compact
+        return self.type
 
     def __str__(self):
         return self.name
@@ -66,6 +107,8 @@ class UpdatableRow(Row):
 class Table(pd.DataFrame, ABC):
     name_: str
     index_: Column
+    # 紧凑模式下从索引中去掉的前缀，索引在文件中始终带有前缀
+    index_prefix_: str | None = None
 
     _table_pairs: OrderedDict[str, Column] | None = None
 
@@ -83,7 +126,8 @@ class Table(pd.DataFrame, ABC):
 
     @classmethod
     def table_pairs(cls) -> OrderedDict[str, Column]:
-        if cls._table_pairs is None:
+        # 缓存只对定义了它的类有效，子类（如 `ExportViewTable`）不应沿用父类的缓存
+        if vars(cls).get("_table_pairs") is None:
             mro = [i for i in cls.__mro__ if issubclass(i, Table)]
             result = OrderedDict[str, Column]()
             for cls_ in mro:
@@ -103,7 +147,28 @@ class Table(pd.DataFrame, ABC):
 
     @classmethod
     def column_types(cls) -> dict[str, Dtype]:
-        return {column.name: column.type for column in cls.table_columns()}
+        return {column.name: column.current_type for column in cls.table_columns()}
+
+    @classmethod
+    def compact_index(cls) -> bool:
+        return _compact and cls.index_prefix_ is not None
+
+    @classmethod
+    def decode_index(cls, index: pd.Index) -> pd.Index:
+        """去掉索引的前缀并转换为整数；有不能无损转换的值（如以 0 开头）时保持原样"""
+
+        numbers = index.str.removeprefix(cls.index_prefix_)
+        if not (numbers.str.isdecimal() & ~numbers.str.startswith("0")).all():
+            return index
+        return numbers.astype(cls.index_.current_type).rename(index.name)
+
+    @classmethod
+    def encode_index(cls, index: pd.Index) -> pd.Index:
+        """为 `decode_index` 转换后的整数索引恢复前缀"""
+
+        if not pd.api.types.is_integer_dtype(index):
+            return index
+        return (cls.index_prefix_ + index.astype(str)).rename(index.name)
 
     @classmethod
     def generate_row(cls, **kwargs) -> Row:
@@ -126,35 +191,109 @@ class Table(pd.DataFrame, ABC):
         super().__init__(
             pd.DataFrame(
                 {
-                    column: pd.Series(dtype=column.type)
+                    column: pd.Series(dtype=column.current_type)
                     for column in self.table_columns()
                 }
             ).set_index(self.index_)
         )
         return self
 
-    def read_from_file(self, file: Path):
-        table = self.create()
-        data = pd.read_csv(file, dtype=self.column_types()).set_index(self.index_.name)
-        for column in self.table_columns():
-            if column.name in data:
-                table[column] = data[column.name]
-        super().__init__(table)
+    def read_from_file(
+        self,
+        file: Path | BinaryIO,
+        where: dict[Column, Collection] | None = None,
+        columns: list[Column] | None = None,
+    ):
+        """
+        读取数据表
+
+        :param file: 文件路径或文件对象
+        :param where: 只读取各列的值均在给定范围内的行，可包括索引列；指定时分块读取并逐块过滤，
+            不会同时读入整个文件
+        :param columns: 只读取这些列，索引列总会读取
+        """
+
+        where = where or {}
+        selected = [
+            column
+            for column in self.table_columns()
+            if column != self.index_ and (columns is None or column in columns)
+        ]
+        names = {self.index_.name} | {column.name for column in selected + list(where)}
+
+        # 索引在文件中带有前缀，先按文本读取；推断类别的分类列在各块中的类别不同，合并后再转换
+        types = {column.name: column.type for column in where}
+        types.update({column.name: column.current_type for column in selected})
+        deferred = [
+            column
+            for column in selected
+            if where
+            and isinstance(column.current_type, str)
+            and column.current_type == "category"
+        ]
+        types.update({column.name: str for column in deferred})
+        types[self.index_.name] = self.index_.type
+
+        with profiler.phase("load"):
+            reader = pd.read_csv(
+                file,
+                dtype=types,
+                usecols=lambda name: name in names,
+                chunksize=read_chunk_rows if where else None,
+            )
+            if where:
+                kept = {self.index_.name} | {column.name for column in selected}
+                data = pd.concat([self._filter(chunk, where, kept) for chunk in reader])
+            else:
+                data = reader
+
+            data = data.set_index(self.index_.name)
+            if self.compact_index():
+                data.index = self.decode_index(data.index)
+            data.index.name = self.index_
+            for column in deferred:
+                data[column.name] = data[column.name].astype(column.current_type)
+            for column in selected:
+                if column.name not in data:
+                    data[column.name] = pd.Series(dtype=column.current_type).reindex(
+                        data.index
+                    )
+
+            order = [column.name for column in selected]
+            if list(data.columns) != order:
+                data = data.reindex(columns=order)
+            data.columns = pd.Index(selected, dtype=object)
+            super().__init__(data)
         return self
 
-    def read_from_dir(self, path: Path):
-        return self.read_from_file(path / f"{self.name_}.csv")
-
-    def read_from_dir_or_create(self, path: Path):
+    def _filter(
+        self, chunk: pd.DataFrame, where: dict[Column, Collection], kept: set[str]
+    ):
+        mask = pd.Series(True, index=chunk.index)
+        for column, values in where.items():
+            if column == self.index_:
+                # 紧凑模式下的整数代号需恢复前缀后才能与文件中的代号比较
+                values = self.encode_index(pd.Index(list(values)))
+            mask &= chunk[column.name].isin(values)
+        return chunk.loc[mask, [name for name in chunk if name in kept]]
+
+    def read_from_dir(self, path: Path, **kwargs):
+        return self.read_from_file(path / f"{self.name_}.csv", **kwargs)
+
+    def read_from_dir_or_create(self, path: Path, **kwargs):
         if (path / f"{self.name_}.csv").exists():
-            return self.read_from_dir(path)
+            return self.read_from_dir(path, **kwargs)
         else:
             return self.create()
 
     def save_to_file(self, file: Path):
         from precise_bet.data import save
 
-        save(self, file, lambda d, p: d.to_csv(p))
+        data = self
+        if self.compact_index():
+            data = pd.DataFrame(self, copy=False)
+            data.index = self.encode_index(self.index)
+        save(data, file, lambda d, p: d.to_csv(p))
 
     def save_to_dir(self, path: Path):
         self.save_to_file(path / f"{self.name_}.csv")
@@ -167,16 +306,52 @@ class ProjectTable(Table, ABC):
         super().__init__()
         self.project_path = project_path
 
-    def read(self):
-        return self.read_from_dir(self.project_path)
+    @property
+    def file(self) -> Path:
+        return self.project_path / f"{self.name_}.csv"
 
-    def read_or_create(self):
-        return self.read_from_dir_or_create(self.project_path)
+    def read(self, **kwargs):
+        return self.read_from_dir(self.project_path, **kwargs)
+
+    def read_or_create(self, **kwargs):
+        return self.read_from_dir_or_create(self.project_path, **kwargs)
 
     def save(self):
         self.save_to_dir(self.project_path)
 
 
+def table_workers(count: int) -> int:
+    """同时读写 `count` 张数据表时的线程数，不超过 CPU 核数，单核时与依次读写相同"""
+
+    return max(1, min(count, os.cpu_count() or 1))
+
+
+def read_tables(
+    project_path: Path, tables: list[type[ProjectTable]], create: bool = False
+) -> list:
+    """
+    在线程池中同时读取多张数据表，pandas 的 C 解析器在解析 CSV 时会释放 GIL
+
+    :param tables: 要读取的数据表类
+    :param create: 文件不存在时是否创建空表
+    :return: 与 `tables` 顺序相同的数据表
+    """
+
+    def read(table: type[ProjectTable]):
+        table = table(project_path)
+        return table.read_or_create() if create else table.read()
+
+    with ThreadPoolExecutor(table_workers(len(tables)), "read") as executor:
+        return list(executor.map(read, tables))
+
+
+def save_tables(*tables: ProjectTable):
+    """在线程池中同时保存多张数据表，每张表都原子地替换文件"""
+
+    with ThreadPoolExecutor(table_workers(len(tables)), "save") as executor:
+        list(executor.map(lambda table: table.save(), tables))
+
+
 # class VolumeTable(ProjectTable, ABC):
 #     volume_number: int
 #
@@ -195,9 +370,16 @@ class ProjectTable(Table, ABC):
 
 
 class MatchTable(ProjectTable, ABC):
-    match_id = Column("代号", str, ColumnOrder.index)
+    match_id = Column("代号", str, ColumnOrder.index, compact="int64")
 
     index_ = match_id
+    index_prefix_ = "a"
+
+    @classmethod
+    def page_id(cls, match_id: str | int) -> str:
+        """页面地址中的比赛编号，即去掉前缀的比赛代号；紧凑模式下的整数代号可直接使用"""
+
+        return str(match_id).removeprefix(cls.index_prefix_)
 
     def get_row(self, match_id: str):
         return self.data.loc[match_id]
@@ -211,16 +393,16 @@ class DataTable(MatchTable):
 
     volume_number = Column("期号", int)
     match_number = Column("场次", int)
-    league_id = Column("赛事", str)
-    round_number = Column("轮次", str)
+    league_id = Column("赛事", str, compact="category")
+    round_number = Column("轮次", str, compact="category")
     match_time = Column("比赛时间", int)
     match_status = Column("状态", int)
     host_id = Column("主队", int)
-    host_name = Column("主队名称", str)
+    host_name = Column("主队名称", str, compact="category")
     guest_id = Column("客队", int)
-    guest_name = Column("客队名称", str)
-    half_score = Column("半场比分", str)
-    handicap_name = Column("盘口", str)
+    guest_name = Column("客队名称", str, compact="category")
+    half_score = Column("半场比分", str, compact="category")
+    handicap_name = Column("盘口", str, compact="category")
 
 
 class UpdatableTable(Table, ABC):
@@ -288,12 +470,24 @@ class ValueTable(MatchInformationTable):
 class HandicapTable(MatchInformationTable):
     name_ = "handicap"
 
-    live_average_water1 = Column("平即水1", pd.Float64Dtype())
-    live_average_handicap = Column("平即盘", pd.Float64Dtype())
-    live_average_water2 = Column("平即水2", pd.Float64Dtype())
-    early_average_water1 = Column("平初水1", pd.Float64Dtype())
-    early_average_handicap = Column("平初盘", pd.Float64Dtype())
-    early_average_water2 = Column("平初水2", pd.Float64Dtype())
+    live_average_water1 = Column(
+        "平即水1", pd.Float64Dtype(), compact=pd.Float32Dtype()
+    )
+    live_average_handicap = Column(
+        "平即盘", pd.Float64Dtype(), compact=pd.Float32Dtype()
+    )
+    live_average_water2 = Column(
+        "平即水2", pd.Float64Dtype(), compact=pd.Float32Dtype()
+    )
+    early_average_water1 = Column(
+        "平初水1", pd.Float64Dtype(), compact=pd.Float32Dtype()
+    )
+    early_average_handicap = Column(
+        "平初盘", pd.Float64Dtype(), compact=pd.Float32Dtype()
+    )
+    early_average_water2 = Column(
+        "平初水2", pd.Float64Dtype(), compact=pd.Float32Dtype()
+    )
 
     def get_data(self, match_id: MatchTable.match_id.type) -> list[float]:
         return list(self.loc[match_id, self.class_columns()])
@@ -333,60 +527,116 @@ class HandicapTable(MatchInformationTable):
 
 
 class RecentResultsTable(MatchInformationTable):
+    """
+    近期战绩
+
+    依次为主队近期、客队近期、主队近期主场、客队近期客场 4 组，每组最近 3 场比赛的结果打包为一个整数：
+    第 n 场比赛的结果占第 `2n-2`、`2n-1` 位，`0`、`1`、`2`、`3` 分别表示未知、胜、平、负。
+    旧版本每场比赛一列的文件在读取时转换，下次保存时写回。
+    """
+
     name_ = "recent_results"
 
     _dtype = pd.CategoricalDtype(categories=["win", "draw", "lose", "unknown"])
+    # 打包后各编码表示的结果
+    codes_ = ["unknown", "win", "draw", "lose"]
+    # 各场比赛的编码在一组中的位移
+    _shifts = np.array([0, 2, 4], dtype="uint8")
+
+    host_all = Column("主队近期", "uint8")
+    guest_all = Column("客队近期", "uint8")
+    host_home = Column("主队近期主场", "uint8")
+    guest_away = Column("客队近期客场", "uint8")
+
+    # 解包后每场比赛一列，即旧版本文件中的列
+    host_all_match_1_ = Column("主队近期第1场", _dtype)
+    host_all_match_2_ = Column("主队近期第2场", _dtype)
+    host_all_match_3_ = Column("主队近期第3场", _dtype)
+    guest_all_match_1_ = Column("客队近期第1场", _dtype)
+    guest_all_match_2_ = Column("客队近期第2场", _dtype)
+    guest_all_match_3_ = Column("客队近期第3场", _dtype)
+    host_home_match_1_ = Column("主队近期主场第1场", _dtype)
+    host_home_match_2_ = Column("主队近期主场第2场", _dtype)
+    host_home_match_3_ = Column("主队近期主场第3场", _dtype)
+    guest_away_match_1_ = Column("客队近期客场第1场", _dtype)
+    guest_away_match_2_ = Column("客队近期客场第2场", _dtype)
+    guest_away_match_3_ = Column("客队近期客场第3场", _dtype)
 
-    host_all_match_1 = Column("主队近期第1场", _dtype)
-    host_all_match_2 = Column("主队近期第2场", _dtype)
-    host_all_match_3 = Column("主队近期第3场", _dtype)
-    guest_all_match_1 = Column("客队近期第1场", _dtype)
-    guest_all_match_2 = Column("客队近期第2场", _dtype)
-    guest_all_match_3 = Column("客队近期第3场", _dtype)
-    host_home_match_1 = Column("主队近期主场第1场", _dtype)
-    host_home_match_2 = Column("主队近期主场第2场", _dtype)
-    host_home_match_3 = Column("主队近期主场第3场", _dtype)
-    guest_away_match_1 = Column("客队近期客场第1场", _dtype)
-    guest_away_match_2 = Column("客队近期客场第2场", _dtype)
-    guest_away_match_3 = Column("客队近期客场第3场", _dtype)
+    @classmethod
+    def result_columns(cls) -> list[Column]:
+        return [
+            cls.host_all_match_1_,
+            cls.host_all_match_2_,
+            cls.host_all_match_3_,
+            cls.guest_all_match_1_,
+            cls.guest_all_match_2_,
+            cls.guest_all_match_3_,
+            cls.host_home_match_1_,
+            cls.host_home_match_2_,
+            cls.host_home_match_3_,
+            cls.guest_away_match_1_,
+            cls.guest_away_match_2_,
+            cls.guest_away_match_3_,
+        ]
 
-    def get_data(self, match_id: MatchTable.match_id.type) -> list[int]:
-        return list(self.loc[match_id, self.class_columns()])
+    @classmethod
+    def pack(cls, codes: np.ndarray) -> np.ndarray:
+        """将最后一维依次为 12 场比赛结果的编码打包为 4 组"""
+
+        grouped = codes.astype("uint8").reshape(*codes.shape[:-1], 4, 3)
+        return (grouped << cls._shifts).sum(axis=-1, dtype="uint8")
+
+    @classmethod
+    def unpack(cls, packed: np.ndarray) -> np.ndarray:
+        """`pack` 的逆运算"""
+
+        codes = (packed.astype("uint8")[..., None] >> cls._shifts) & 3
+        return codes.reshape(*packed.shape[:-1], 12)
+
+    @classmethod
+    def results(cls, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        将 `frame` 中打包的近期战绩解包为每场比赛一列
+
+        :return: 与 `frame` 索引相同，列为 `result_columns` 的表
+        """
+
+        codes = cls.unpack(frame[cls.class_columns()].to_numpy())
+        # 由打包的编码转换为分类的编码
+        categories = np.array(
+            [cls._dtype.categories.get_loc(result) for result in cls.codes_]
+        )[codes]
+        return pd.DataFrame(
+            {
+                column: pd.Categorical.from_codes(categories[:, i], dtype=cls._dtype)
+                for i, column in enumerate(cls.result_columns())
+            },
+            index=frame.index,
+        )
+
+    def get_data(self, match_id: MatchTable.match_id.type) -> list[str]:
+        packed = self.loc[match_id, self.class_columns()].to_numpy()
+        return [self.codes_[code] for code in self.unpack(packed)]
 
     @classmethod
     def empty_row(cls):
         return cls.generate_row(
-            host_all_match_1="unknown",
-            host_all_match_2="unknown",
-            host_all_match_3="unknown",
-            guest_all_match_1="unknown",
-            guest_all_match_2="unknown",
-            guest_all_match_3="unknown",
-            host_home_match_1="unknown",
-            host_home_match_2="unknown",
-            host_home_match_3="unknown",
-            guest_away_match_1="unknown",
-            guest_away_match_2="unknown",
-            guest_away_match_3="unknown",
+            host_all=0,
+            guest_all=0,
+            host_home=0,
+            guest_away=0,
             updated_time=-1.0,
             updated_match_status=-1,
         )
 
     @classmethod
     def row_from_list(cls, results: list[str], updated_match_status: int):
+        packed = cls.pack(np.array([cls.codes_.index(result) for result in results]))
         return cls.generate_row(
-            host_all_match_1=results[0],
-            host_all_match_2=results[1],
-            host_all_match_3=results[2],
-            guest_all_match_1=results[3],
-            guest_all_match_2=results[4],
-            guest_all_match_3=results[5],
-            host_home_match_1=results[6],
-            host_home_match_2=results[7],
-            host_home_match_3=results[8],
-            guest_away_match_1=results[9],
-            guest_away_match_2=results[10],
-            guest_away_match_3=results[11],
+            host_all=int(packed[0]),
+            guest_all=int(packed[1]),
+            host_home=int(packed[2]),
+            guest_away=int(packed[3]),
             updated_match_status=updated_match_status,
         ).append_updated_time()
 
@@ -398,6 +648,39 @@ class RecentResultsTable(MatchInformationTable):
     ):
         self.update_row(match_id, self.row_from_list(results, updated_match_status))
 
+    def read_from_file(
+        self,
+        file: Path | BinaryIO,
+        where: dict[Column, Collection] | None = None,
+        columns: list[Column] | None = None,
+    ):
+        if isinstance(file, Path):
+            header = pd.read_csv(file, nrows=0).columns
+            if self.host_all.name not in header:
+                file = self._migrate(file)
+        return super().read_from_file(file, where, columns)
+
+    def _migrate(self, file: Path) -> BinaryIO:
+        """将旧版本每场比赛一列的文件转换为打包的格式"""
+
+        with profiler.phase("load"):
+            legacy = pd.read_csv(file, dtype=str).set_index(self.index_.name)
+            names = [column.name for column in self.result_columns()]
+            codes = (
+                legacy[names]
+                .apply(lambda column: column.map(self.codes_.index, na_action="ignore"))
+                .fillna(0)
+                .to_numpy()
+            )
+            packed = self.pack(codes)
+            legacy = legacy.drop(columns=names)
+            for i, column in enumerate(self.class_columns()):
+                legacy[column.name] = packed[:, i]
+            buffer = io.BytesIO()
+            legacy.to_csv(buffer)
+            buffer.seek(0)
+        return buffer
+
 
 class OddTable(MatchInformationTable, ABC):
     win: Column
@@ -420,17 +703,17 @@ class OddTable(MatchInformationTable, ABC):
 class SpTable(OddTable):
     name_ = "sp"
 
-    win = Column("SP胜", float)
-    draw = Column("SP平", float)
-    lose = Column("SP负", float)
+    win = Column("SP胜", float, compact="float32")
+    draw = Column("SP平", float, compact="float32")
+    lose = Column("SP负", float, compact="float32")
 
 
 class AverageEuropeOddTable(OddTable):
     name_ = "odd"
 
-    win = Column("欧赔胜", float)
-    draw = Column("欧赔平", float)
-    lose = Column("欧赔负", float)
+    win = Column("欧赔胜", float, compact="float32")
+    draw = Column("欧赔平", float, compact="float32")
+    lose = Column("欧赔负", float, compact="float32")
 
 
 class NamedTable(Table, ABC):
@@ -476,3 +759,136 @@ class TeamTable(ProjectTable, NamedTable, UpdatableTable):
 
     def update_from_value(self, team_id: int, value: int):
         self.update_row(team_id, self.row_from_value(value))
+
+
+class TeamRecentResultsTable(ProjectTable, UpdatableTable):
+    """
+    球队近期战绩缓存
+
+    `截至` 为获取时已记录的该球队最近一场已结束比赛的比赛时间，记录到更新的已结束比赛后缓存即失效。
+    主场、客场战绩只能分别在球队作为主队、客队时获取，未获取时为空。
+    """
+
+    name_ = "team_recent_results"
+
+    _dtype = RecentResultsTable._dtype
+
+    team_id = Column("代号", int, ColumnOrder.index)
+    as_of = Column("截至", int)
+    all_match_1 = Column("近期第1场", _dtype)
+    all_match_2 = Column("近期第2场", _dtype)
+    all_match_3 = Column("近期第3场", _dtype)
+    home_match_1 = Column("近期主场第1场", _dtype)
+    home_match_2 = Column("近期主场第2场", _dtype)
+    home_match_3 = Column("近期主场第3场", _dtype)
+    away_match_1 = Column("近期客场第1场", _dtype)
+    away_match_2 = Column("近期客场第2场", _dtype)
+    away_match_3 = Column("近期客场第3场", _dtype)
+
+    index_ = team_id
+
+    @classmethod
+    def venue_columns(cls, home: bool) -> list[Column]:
+        if home:
+            return [cls.home_match_1, cls.home_match_2, cls.home_match_3]
+        return [cls.away_match_1, cls.away_match_2, cls.away_match_3]
+
+    @classmethod
+    def all_columns(cls) -> list[Column]:
+        return [cls.all_match_1, cls.all_match_2, cls.all_match_3]
+
+    def get_results(
+        self, team_id: int, as_of: int, home: bool, max_age: float
+    ) -> list[str] | None:
+        """
+        获取缓存的近期战绩
+
+        :param team_id: 球队代号
+        :param as_of: 该球队最近一场已结束比赛的比赛时间
+        :param home: 获取主场（`True`）或客场（`False`）战绩
+        :param max_age: 缓存的最长有效时间（秒）
+        :return: 依次为近期、近期主场或客场的 6 场比赛结果，未命中时返回 `None`
+        """
+
+        if team_id not in self.index or self.loc[team_id, self.as_of] != as_of:
+            return None
+        if datetime.now().timestamp() - self.loc[team_id, self.updated_time] > max_age:
+            return None
+        results = list(self.loc[team_id, self.all_columns() + self.venue_columns(home)])
+        if any(pd.isna(result) for result in results):
+            return None
+        return results
+
+    def update_results(
+        self,
+        team_id: int,
+        as_of: int,
+        all_results: list[str],
+        home: bool,
+        venue_results: list[str],
+    ):
+        if team_id in self.index:
+            if self.loc[team_id, self.as_of] > as_of:
+                # 不以较旧的战绩覆盖较新的缓存
+                return
+            if self.loc[team_id, self.as_of] < as_of:
+                self.loc[team_id] = self.generate_row(as_of=as_of)
+        else:
+            self.loc[team_id] = self.generate_row(as_of=as_of)
+        row = UpdatableRow(
+            zip(
+                self.all_columns() + self.venue_columns(home),
+                all_results + venue_results,
+            )
+        )
+        self.update_row(team_id, row.append_updated_time())
+
+
+class ExportViewTable(DataTable):
+    """
+    导出数据的物化视图
+
+    即 `DataTable` 与比分、赔率、球队价值、亚盘、近期战绩各表按比赛代号连接的结果，
+    另附比分文本、赛果及近况文本等导出所需的计算列，由 `precise_bet.data.ExportView` 维护。
+    """
+
+    name_ = "export-view"
+
+    score = Column("比分", str, compact="category")
+    result = Column("结果", str, compact="category")
+    result_with_concede = Column("让球结果", str, compact="category")
+    host_form = Column("主队近况", str, compact="category")
+    guest_form = Column("客队近况", str, compact="category")
+    host_home_form = Column("主队近况（主）", str, compact="category")
+    guest_away_form = Column("客队近况（客）", str, compact="category")
+
+    odd_win = AverageEuropeOddTable.win
+    odd_draw = AverageEuropeOddTable.draw
+    odd_lose = AverageEuropeOddTable.lose
+    sp_win = SpTable.win
+    sp_draw = SpTable.draw
+    sp_lose = SpTable.lose
+    host_value = ValueTable.host_value
+    guest_value = ValueTable.guest_value
+    live_average_water1 = HandicapTable.live_average_water1
+    live_average_handicap = HandicapTable.live_average_handicap
+    live_average_water2 = HandicapTable.live_average_water2
+    early_average_water1 = HandicapTable.early_average_water1
+    early_average_handicap = HandicapTable.early_average_handicap
+    early_average_water2 = HandicapTable.early_average_water2
+    host_all_match_1 = RecentResultsTable.host_all_match_1_
+    host_all_match_2 = RecentResultsTable.host_all_match_2_
+    host_all_match_3 = RecentResultsTable.host_all_match_3_
+    guest_all_match_1 = RecentResultsTable.guest_all_match_1_
+    guest_all_match_2 = RecentResultsTable.guest_all_match_2_
+    guest_all_match_3 = RecentResultsTable.guest_all_match_3_
+    host_home_match_1 = RecentResultsTable.host_home_match_1_
+    host_home_match_2 = RecentResultsTable.host_home_match_2_
+    host_home_match_3 = RecentResultsTable.host_home_match_3_
+    guest_away_match_1 = RecentResultsTable.guest_away_match_1_
+    guest_away_match_2 = RecentResultsTable.guest_away_match_2_
+    guest_away_match_3 = RecentResultsTable.guest_away_match_3_
+
+    @classmethod
+    def forms(cls) -> list[Column]:
+        return [cls.host_form, cls.guest_form, cls.host_home_form, cls.guest_away_form]
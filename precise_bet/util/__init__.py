@@ -1,5 +1,14 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+from .circuit_breaker import CircuitOpenError, circuit_breaker
 from .path import can_write, mkdir
-from .request import post_request_content, request_content
-from .sleep import sleep
+from .request import (
+    configure_base_url,
+    configure_hedging,
+    post_request_content,
+    request_content,
+)
+from .metrics import metrics
+from .rate_limit import RateLimiter
+from .sleep import sleep, sleep_until
+from .user_agent import user_agents
@@ -0,0 +1,217 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from requests import RequestException
+
+from precise_bet import event, rprint
+from precise_bet.profiling import profiler
+from precise_bet.util.metrics import metrics
+
+circuit_states = {"closed": "关闭", "open": "打开", "half_open": "半开"}
+
+
+class CircuitOpenError(RequestException):
+    """熔断器打开期间被跳过的请求"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(
+            f"主机 {host} 的熔断器已打开，{retry_after:.0f} 秒后才会再次请求"
+        )
+        self.host = host
+        self.retry_after = retry_after
+
+
+@dataclass
+class HostCircuit:
+    state: str = "closed"
+    failures: int = 0
+    opened_at: float = 0.0
+    # 半开状态下是否已有试探请求在进行
+    probing: bool = False
+
+
+class CircuitBreaker:
+    """
+    按主机熔断请求，由全部请求共享
+
+    连续 `failure_threshold` 次请求失败（未收到响应，或状态码为 429 或 5xx）后熔断器打开，
+    `open_seconds` 秒内不再向该主机发送请求：`pause` 模式下等待至熔断结束，`skip` 模式下直接抛出
+    `CircuitOpenError`，由调用方跳过。熔断结束后进入半开状态，只放行一个试探请求，成功则关闭，失败则再次打开。
+    """
+
+    def __init__(
+        self, failure_threshold: int = 5, open_seconds: float = 60, mode: str = "pause"
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.mode = mode
+        self._hosts: dict[str, HostCircuit] = {}
+        self._listeners: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        failure_threshold: int | None = None,
+        open_seconds: float | None = None,
+        mode: str | None = None,
+    ):
+        """
+        修改给定的参数，为 `None` 的参数保持不变
+
+        :param failure_threshold: 打开熔断器前连续失败的次数，为 0 时不启用
+        :param open_seconds: 熔断器打开的时长（秒）
+        :param mode: 熔断期间的请求等待（`pause`）还是跳过（`skip`）
+        """
+
+        if failure_threshold is not None:
+            self.failure_threshold = failure_threshold
+        if open_seconds is not None:
+            self.open_seconds = open_seconds
+        if mode is not None:
+            self.mode = mode
+
+    @contextmanager
+    def listening(self, listener: Callable[[], None]):
+        """在 `with` 语句中，熔断器状态变化时调用 `listener`"""
+
+        with self._lock:
+            self._listeners.append(listener)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._listeners.remove(listener)
+
+    def _transition(self, host: str, circuit: HostCircuit, state: str):
+        circuit.state = state
+        metrics.inc("circuit_transitions_total", host=host, state=state)
+        event("circuit", level="warning", host=host, state=state)
+        if state == "open":
+            rprint(
+                f"[bold red]主机 {host} 连续 {circuit.failures} 次请求失败，"
+                f"熔断 {self.open_seconds:g} 秒",
+                level="warning",
+            )
+        else:
+            rprint(
+                f"主机 {host} 的熔断器已{circuit_states[state]}",
+                level="info" if state == "closed" else "warning",
+            )
+
+    def _notify(self):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def acquire(self, host: str):
+        """
+        请求前调用，熔断器打开时等待或抛出 `CircuitOpenError`
+
+        半开状态下只有一个请求可以通过，其余请求同样等待或被跳过。
+        """
+
+        if self.failure_threshold <= 0:
+            return
+        while True:
+            changed = False
+            with self._lock:
+                circuit = self._hosts.setdefault(host, HostCircuit())
+                now = time.monotonic()
+                if circuit.state == "closed":
+                    return
+                remaining = circuit.opened_at + self.open_seconds - now
+                if circuit.state == "open" and remaining <= 0:
+                    self._transition(host, circuit, "half_open")
+                    changed = True
+                if circuit.state == "half_open" and not circuit.probing:
+                    circuit.probing = True
+                    break
+                if circuit.state == "half_open":
+                    # 等待试探请求的结果
+                    remaining = 1
+            if changed:
+                self._notify()
+            if self.mode == "skip":
+                raise CircuitOpenError(host, remaining)
+            with profiler.phase("sleep"):
+                time.sleep(min(remaining, 1))
+        if changed:
+            self._notify()
+
+    def record(self, host: str, success: bool):
+        """请求结束后记录结果"""
+
+        if self.failure_threshold <= 0:
+            return
+        changed = False
+        with self._lock:
+            circuit = self._hosts.setdefault(host, HostCircuit())
+            circuit.probing = False
+            if success:
+                circuit.failures = 0
+                if circuit.state != "closed":
+                    self._transition(host, circuit, "closed")
+                    changed = True
+            else:
+                circuit.failures += 1
+                if circuit.state == "half_open" or (
+                    circuit.state == "closed"
+                    and circuit.failures >= self.failure_threshold
+                ):
+                    circuit.opened_at = time.monotonic()
+                    self._transition(host, circuit, "open")
+                    changed = True
+        if changed:
+            self._notify()
+
+    def release(self, host: str):
+        """请求未得到结果（如被中断）时调用，不记录结果，只允许半开状态下再次试探"""
+
+        with self._lock:
+            circuit = self._hosts.get(host)
+            if circuit is not None:
+                circuit.probing = False
+
+    def wait(self):
+        """等待至没有打开的熔断器"""
+
+        while True:
+            with self._lock:
+                remaining = max(
+                    (
+                        circuit.opened_at + self.open_seconds - time.monotonic()
+                        for circuit in self._hosts.values()
+                        if circuit.state == "open"
+                    ),
+                    default=0,
+                )
+            if remaining <= 0:
+                return
+            rprint(f"等待熔断结束（{remaining:.0f} 秒）...", level="warning")
+            with profiler.phase("sleep"):
+                time.sleep(remaining)
+
+    def describe(self) -> str:
+        """未关闭的熔断器的状态文本，全部关闭时为空"""
+
+        with self._lock:
+            items = []
+            for host, circuit in self._hosts.items():
+                if circuit.state == "open":
+                    until = datetime.now() + timedelta(
+                        seconds=circuit.opened_at + self.open_seconds - time.monotonic()
+                    )
+                    items.append(f"{host} 已熔断至 {until.strftime('%H:%M:%S')}")
+                elif circuit.state == "half_open":
+                    items.append(f"{host} 正在试探")
+        return f"（{'，'.join(items)}）" if items else ""
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,107 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from time import perf_counter
+from typing import Callable, TypeVar
+
+from precise_bet import rprint
+
+T = TypeVar("T")
+
+
+class Hedge:
+    """
+    对冲请求：请求在观测到的延迟分布的指定百分位内仍未完成时，发出一次备用请求，取先完成者
+
+    备用请求的数量受全局预算限制，即备用请求数不超过全部请求数的 `budget` 倍。
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        budget: float,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        """
+        :param percentile: 触发对冲的延迟百分位（0-100）
+        :param budget: 备用请求占全部请求的最大比例（0-1）
+        :param window: 每个端点保留的延迟样本数
+        :param min_samples: 启用对冲前需要的最少样本数
+        """
+
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies: defaultdict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=window)
+        )
+        self._requests = 0
+        self._hedged = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+
+    def delay(self, endpoint: str) -> float | None:
+        """获取端点的对冲延迟（秒），样本不足时返回 `None`"""
+
+        with self._lock:
+            samples = sorted(self._latencies[endpoint])
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return samples[index]
+
+    def _record(self, endpoint: str, start: float, future: Future):
+        if future.exception() is None:
+            with self._lock:
+                self._latencies[endpoint].append(perf_counter() - start)
+
+    def _acquire(self) -> tuple[int, int] | None:
+        """占用一次备用请求预算，返回占用后的备用请求数与预算上限；预算不足时返回 `None`"""
+
+        with self._lock:
+            limit = int(self._requests * self.budget)
+            if self._hedged + 1 > self._requests * self.budget:
+                return None
+            self._hedged += 1
+            return self._hedged, limit
+
+    def _submit(self, endpoint: str, func: Callable[[], T]) -> Future[T]:
+        start = perf_counter()
+        future = self._executor.submit(func)
+        future.add_done_callback(lambda f: self._record(endpoint, start, f))
+        return future
+
+    def run(self, endpoint: str, func: Callable[[], T]) -> T:
+        with self._lock:
+            self._requests += 1
+
+        primary = self._submit(endpoint, func)
+
+        delay = self.delay(endpoint)
+        if delay is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        budget = self._acquire()
+        if budget is None:
+            return primary.result()
+
+        hedged, limit = budget
+        rprint(
+            f"请求超过 [bold]{delay:.2f}[/bold] 秒仍未完成，正在发送备用请求"
+            f"（已使用 {hedged} / {limit} 次）..."
+        )
+        pending = {primary, self._submit(endpoint, func)}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+        raise error
@@ -0,0 +1,214 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# 指标名称、类型及说明
+definitions = {
+    "request_duration_seconds": ("histogram", "请求耗时（秒）"),
+    "responses_total": ("counter", "按状态码统计的响应数"),
+    "response_bytes_total": ("counter", "接收的响应字节数"),
+    "request_errors_total": ("counter", "未收到响应的请求数"),
+    "request_retries_total": ("counter", "重试的请求数"),
+    "cache_requests_total": ("counter", "缓存查询数"),
+    "rows_updated_total": ("counter", "更新的数据行数"),
+    "matches_updated_total": ("counter", "更新的比赛数"),
+    "matches_per_minute": ("gauge", "最近 5 分钟内平均每分钟更新的比赛数"),
+}
+
+default_buckets = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...] = default_buckets
+    counts: list[int] = field(init=False)
+    sum: float = 0
+    count: int = 0
+
+    def __post_init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+
+class MetricsRegistry:
+    """
+    进程内的指标注册表
+
+    由请求层与更新循环写入，可导出为 Prometheus 文本文件或 JSON 快照。
+    """
+
+    def __init__(self, prefix: str = "precise_bet", rate_window: float = 300):
+        self.prefix = prefix
+        self.rate_window = rate_window
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._events: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = self._labels(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            series.setdefault(self._labels(labels), Histogram()).observe(value)
+
+    def match_updated(self):
+        """记录一场比赛更新完成，用于计算每分钟更新的比赛数"""
+
+        now = time.monotonic()
+        with self._lock:
+            self._events.append(now)
+        self.inc("matches_updated_total")
+
+    def matches_per_minute(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            while self._events and now - self._events[0] > self.rate_window:
+                self._events.popleft()
+            return len(self._events) * 60 / self.rate_window
+
+    def snapshot(self) -> dict:
+        matches_per_minute = self.matches_per_minute()
+        with self._lock:
+            return {
+                "time": time.time(),
+                "counters": {
+                    name: [
+                        {"labels": dict(labels), "value": value}
+                        for labels, value in series.items()
+                    ]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(labels),
+                            "buckets": dict(histogram.cumulative()),
+                            "sum": histogram.sum,
+                            "count": histogram.count,
+                        }
+                        for labels, histogram in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+                "gauges": {"matches_per_minute": matches_per_minute},
+            }
+
+    def to_prometheus(self) -> str:
+        def format_labels(labels: dict[str, str]) -> str:
+            if not labels:
+                return ""
+            escaped = (
+                f'{key}="{escape_label_value(value)}"' for key, value in labels.items()
+            )
+            return "{" + ",".join(escaped) + "}"
+
+        def header(name: str) -> list[str]:
+            metric_type, description = definitions.get(name, ("untyped", name))
+            full_name = f"{self.prefix}_{name}"
+            return [
+                f"# HELP {full_name} {description}",
+                f"# TYPE {full_name} {metric_type}",
+            ]
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot["counters"].items():
+            lines += header(name)
+            for item in series:
+                lines.append(
+                    f"{self.prefix}_{name}{format_labels(item['labels'])} {item['value']}"
+                )
+        for name, series in snapshot["histograms"].items():
+            lines += header(name)
+            for item in series:
+                for bound, count in item["buckets"].items():
+                    labels = format_labels({**item["labels"], "le": bound})
+                    lines.append(f"{self.prefix}_{name}_bucket{labels} {count}")
+                labels = format_labels(item["labels"])
+                lines.append(f"{self.prefix}_{name}_sum{labels} {item['sum']}")
+                lines.append(f"{self.prefix}_{name}_count{labels} {item['count']}")
+        for name, value in snapshot["gauges"].items():
+            lines += header(name)
+            lines.append(f"{self.prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, metrics_format: str):
+        """将指标写入文件；先写入临时文件再替换，避免采集端读到不完整的文件"""
+
+        if metrics_format == "prometheus":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        temp = path.with_name(f".{path.name}.tmp")
+        temp.write_text(content, encoding="utf-8")
+        os.replace(temp, path)
+
+
+class MetricsExporter:
+    """按固定间隔在后台线程中将指标写入文件，停止时再写入一次"""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: Path,
+        metrics_format: str,
+        interval: float,
+    ):
+        self.registry = registry
+        self.path = path
+        self.metrics_format = metrics_format
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-exporter", daemon=True
+        )
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.registry.write(self.path, self.metrics_format)
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.registry.write(self.path, self.metrics_format)
+
+
+metrics = MetricsRegistry()
@@ -9,14 +9,14 @@ def mkdir(path: Path):
     if not path.exists():
         path.mkdir(parents=True)
     elif not path.is_dir():
-        rprint_err('路径错误')
+        rprint_err("路径错误")
         return
 
 
 def can_write(path: Path):
     exists = path.exists()
     try:
-        with path.open(mode='a') as f:
+        with path.open(mode="a") as f:
             f.close()
             if not exists:
                 path.unlink()
@@ -0,0 +1,28 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import threading
+import time
+
+from precise_bet.profiling import profiler
+
+
+class RateLimiter:
+    """
+    限制请求的频率：相邻两次 `wait` 返回的时间至少相隔 `interval` 秒
+
+    可在多个线程间共享，各线程按调用 `wait` 的先后顺序依次获得请求的时机。
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            with profiler.phase("sleep"):
+                time.sleep(start - now)
@@ -1,12 +1,188 @@
 #  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
 
+import codecs
+import re
+from time import perf_counter
 from typing import Callable
+from urllib.parse import urlparse
 
 import requests
-from fake_useragent import UserAgent
 from requests import RequestException
 
-from precise_bet import rprint
+from precise_bet import event, rprint
+from precise_bet.profiling import profiler
+from precise_bet.util.circuit_breaker import CircuitOpenError, circuit_breaker
+from precise_bet.util.hedge import Hedge
+from precise_bet.util.metrics import metrics
+from precise_bet.util.user_agent import user_agents
+
+_hedge: Hedge | None = None
+_base_url: str | None = None
+
+
+def configure_hedging(percentile: float | None, budget: float):
+    """
+    配置 GET 请求的对冲
+
+    :param percentile: 触发对冲的延迟百分位，为 `None` 时不启用
+    :param budget: 备用请求占全部请求的最大比例
+    """
+
+    global _hedge
+    _hedge = Hedge(percentile, budget) if percentile is not None else None
+
+
+def configure_base_url(base_url: str | None):
+    """
+    配置请求的基础 URL，用于将全部请求发往本地的替身服务器
+
+    :param base_url: 基础 URL（如 `http://127.0.0.1:8500`），为 `None` 时直接请求原地址
+    """
+
+    global _base_url
+    _base_url = base_url.rstrip("/") if base_url else None
+
+
+def resolve_url(url: str) -> str:
+    """
+    获取实际请求的 URL
+
+    配置了基础 URL 时，原地址的主机名将作为路径的第一段，
+    如 `https://live.500.com/zqdc.php` 变为 `http://127.0.0.1:8500/live.500.com/zqdc.php`。
+    """
+
+    if _base_url is None:
+        return url
+    parsed = urlparse(url)
+    query = f"?{parsed.query}" if parsed.query else ""
+    return f"{_base_url}/{parsed.netloc}{parsed.path}{query}"
+
+
+def endpoint_of(url: str) -> str:
+    """将 URL 归类为端点，如 `odds.500.com/fenxi/yazhi-*.shtml`"""
+
+    parsed = urlparse(url)
+    return parsed.netloc + re.sub(r"\d+", "*", parsed.path)
+
+
+def measured(
+    url: str, func: Callable[[], requests.Response]
+) -> Callable[[], requests.Response]:
+    """记录每次尝试的耗时、状态码、响应字节数，以及重试和未收到响应的次数"""
+
+    host = urlparse(url).netloc
+    endpoint = endpoint_of(url)
+    attempts = 0
+
+    def wrapper() -> requests.Response:
+        nonlocal attempts
+        if attempts:
+            metrics.inc("request_retries_total", host=host)
+        attempts += 1
+        start = perf_counter()
+        try:
+            response = func()
+        except RequestException as e:
+            metrics.inc("request_errors_total", host=host, error=type(e).__name__)
+            event(
+                "request",
+                level="warning",
+                url=url,
+                attempt=attempts,
+                error=type(e).__name__,
+            )
+            raise
+        seconds = perf_counter() - start
+        size = len(response.content)
+        metrics.observe(
+            "request_duration_seconds", seconds, host=host, endpoint=endpoint
+        )
+        metrics.inc("responses_total", host=host, status=response.status_code)
+        metrics.inc("response_bytes_total", size, host=host)
+        event(
+            "request",
+            level="info" if response.ok else "warning",
+            url=url,
+            attempt=attempts,
+            status=response.status_code,
+            seconds=round(seconds, 3),
+            bytes=size,
+        )
+        return response
+
+    return wrapper
+
+
+def guarded(
+    url: str, func: Callable[[], requests.Response]
+) -> Callable[[], requests.Response]:
+    """每次尝试前经过主机的熔断器，并将结果记入熔断器；未收到响应或状态码为 429、5xx 时视为失败"""
+
+    host = urlparse(url).netloc
+
+    def wrapper() -> requests.Response:
+        circuit_breaker.acquire(host)
+        success = None
+        try:
+            response = func()
+            success = response.status_code != 429 and response.status_code < 500
+            return response
+        except Exception:
+            success = False
+            raise
+        finally:
+            if success is None:
+                # 如被中断，结果不计入熔断器，但须结束可能在进行的试探
+                circuit_breaker.release(host)
+            else:
+                circuit_breaker.record(host, success)
+
+    return wrapper
+
+
+# 满足条件后页面剩余部分不超过该字节数时仍读取完，以便复用连接，而不是为下一次请求重新建立连接
+stream_drain_bytes = 16 * 1024
+
+
+def stream_until(
+    response: requests.Response,
+    pattern: re.Pattern,
+    chunk_size: int = 4096,
+    overlap: int = 4096,
+) -> requests.Response:
+    """
+    逐块读取并解码响应，读取到 `pattern` 的匹配时关闭连接，不再接收页面的其余部分
+
+    已读取的部分作为响应的内容，即 `response.text` 为已读取的文本；始终未匹配时读取完整页面。
+    剩余部分较短（见 `stream_drain_bytes`）时读取并丢弃，保留连接。
+
+    :param overlap: 每次只在新解码的文本及其前 `overlap` 个字符中查找，匹配的长度不应超过该值
+    """
+
+    # 响应头未指定编码时，`response.text` 需根据完整内容推测编码，无法逐块解码
+    if not response.ok or response.encoding is None:
+        return response
+
+    decoder = codecs.getincrementaldecoder(response.encoding)(errors="replace")
+    chunks = []
+    tail = ""
+    try:
+        for chunk in response.iter_content(chunk_size):
+            chunks.append(chunk)
+            window = tail + decoder.decode(chunk)
+            if pattern.search(window):
+                length = response.headers.get("Content-Length")
+                # 未压缩时 `tell()` 与 `Content-Length` 均为响应体的字节数，压缩时均为压缩后的字节数
+                if length and int(length) - response.raw.tell() <= stream_drain_bytes:
+                    for _ in response.iter_content(chunk_size):
+                        pass
+                break
+            tail = window[-overlap:]
+    finally:
+        response.close()
+    # requests 没有设置响应内容的公开接口
+    response._content = b"".join(chunks)
+    return response
 
 
 def request_base(
@@ -18,23 +194,29 @@ def request_base(
     while True:
         if tried:
             rprint(
-                f"正在重试请求，剩余尝试次数：{trying_times if trying_times > 0 else '无限'}"
+                f"正在重试请求，剩余尝试次数：{trying_times if trying_times > 0 else '无限'}",
+                level="warning",
             )
         tried = True
         try:
-            response = func()
+            with profiler.phase("fetch"):
+                response = func()
             if response.ok:
                 if encoding:
                     response.encoding = encoding
-                return response.text
+                with profiler.phase("decode"):
+                    return response.text
             else:
                 if response.status_code == 503:
                     error_message = f"请求失败，可能是因为访问频率过高导致被暂时封禁"
                 else:
                     error_message = f"请求失败，状态码：{response.status_code}"
                 raise RequestException(error_message, response=response)
+        except CircuitOpenError:
+            # 熔断期间重试只会被再次跳过
+            raise
         except RequestException as e:
-            rprint(f"请求过程中发生错误：{e}")
+            rprint(f"请求过程中发生错误：{e}", level="warning")
             if trying_times == 0:
                 continue
             trying_times -= 1
@@ -45,13 +227,37 @@ def request_base(
 def request_content(
     url,
     session: requests.Session,
-    ua=UserAgent(platforms=["desktop"]).random,
+    ua: str = None,
     encoding: str = None,
     trying_times=1,
+    until: re.Pattern = None,
 ) -> str:
-    rprint(f"正在向 {url} 发送请求（UA：{ua}）...")
+    """
+    :param until: 只需要页面中的部分信息时，匹配该信息的正则表达式；指定时流式读取页面，
+        匹配后立即断开连接，返回已读取的部分页面，见 `stream_until`
+    """
+
+    if ua is None:
+        ua = user_agents.for_host(urlparse(url).netloc)
+    target = resolve_url(url)
+    rprint(f"正在向 {target} 发送请求（UA：{ua}）...", level="debug")
+
+    def get():
+        if until is None:
+            return session.get(target, headers={"User-Agent": ua})
+        response = session.get(target, headers={"User-Agent": ua}, stream=True)
+        if encoding:
+            response.encoding = encoding
+        return stream_until(response, until)
+
     return request_base(
-        lambda: session.get(url, headers={"User-Agent": ua}),
+        guarded(
+            url,
+            measured(
+                url,
+                get if _hedge is None else lambda: _hedge.run(endpoint_of(url), get),
+            ),
+        ),
         encoding=encoding,
         trying_times=trying_times,
     )
@@ -61,13 +267,21 @@ def post_request_content(
     url,
     data: dict,
     session: requests.Session,
-    ua=UserAgent(platforms=["desktop"]).random,
+    ua: str = None,
     encoding: str = None,
     trying_times=1,
 ) -> str:
-    rprint(f"正在向 {url} 发送请求（UA：{ua}）...")
+    if ua is None:
+        ua = user_agents.for_host(urlparse(url).netloc)
+    target = resolve_url(url)
+    rprint(f"正在向 {target} 发送请求（UA：{ua}）...", level="debug")
     return request_base(
-        lambda: session.post(url, data, headers={"User-Agent": ua}),
+        guarded(
+            url,
+            measured(
+                url, lambda: session.post(target, data, headers={"User-Agent": ua})
+            ),
+        ),
         encoding=encoding,
         trying_times=trying_times,
     )
@@ -0,0 +1,97 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import count
+from typing import Iterator
+
+in_play_status = {1, 2, 3, 10, 11, 12}
+not_started_status = {0}
+
+
+@dataclass
+class ScheduledMatch:
+    match_time: int
+    status: int
+    updated_time: float
+    version: int = 0
+
+
+class MatchScheduler:
+    """
+    待更新比赛的优先队列
+
+    优先级依次为：进行中的比赛、未开始的比赛、其他比赛；同类比赛中距开赛时间越近越优先，
+    其次上次更新时间越早越优先。比赛状态变化后可调用 `update` 重新计算优先级。
+    """
+
+    def __init__(self):
+        self._matches: dict[str, ScheduledMatch] = {}
+        self._heap: list[tuple[tuple[int, float, float], int, int, str]] = []
+        self._counter = count()
+        self._versions = count()
+
+    @staticmethod
+    def priority(match: ScheduledMatch, now: float) -> tuple[int, float, float]:
+        if match.status in in_play_status:
+            rank = 0
+        elif match.status in not_started_status:
+            rank = 1
+        else:
+            rank = 2
+        distance = 0 if rank == 0 else abs(match.match_time - now)
+        return rank, distance, match.updated_time
+
+    def _push(self, match_id: str, now: float):
+        match = self._matches[match_id]
+        heapq.heappush(
+            self._heap,
+            (self.priority(match, now), next(self._counter), match.version, match_id),
+        )
+
+    def push(self, match_id: str, match_time: int, status: int, updated_time: float):
+        # 版本号在整个队列中递增，重新加入的比赛（包括已取出的）的旧堆项均失效，以免同一场比赛被取出两次
+        self._matches[match_id] = ScheduledMatch(
+            match_time, status, updated_time, next(self._versions)
+        )
+        self._push(match_id, datetime.now().timestamp())
+
+    def update(self, match_id: str, status: int):
+        match = self._matches.get(match_id)
+        if match is None or match.status == status:
+            return
+        match.status = status
+        match.version = next(self._versions)
+        self._push(match_id, datetime.now().timestamp())
+
+    def remove(self, match_id: str):
+        self._matches.pop(match_id, None)
+
+    def pop(self) -> str:
+        now = datetime.now().timestamp()
+        while self._heap:
+            priority, _, version, match_id = heapq.heappop(self._heap)
+            match = self._matches.get(match_id)
+            if match is None or match.version != version:
+                continue
+            current = self.priority(match, now)
+            if self._heap and current > self._heap[0][0]:
+                # 开赛时间距离随时间变化，优先级落后时重新入队
+                self._push(match_id, now)
+                continue
+            del self._matches[match_id]
+            return match_id
+        raise IndexError("优先队列为空")
+
+    def ordered(self) -> list[str]:
+        """按当前优先级返回全部比赛，不改变队列"""
+
+        now = datetime.now().timestamp()
+        return sorted(self._matches, key=lambda i: self.priority(self._matches[i], now))
+
+    def __len__(self):
+        return len(self._matches)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._matches))
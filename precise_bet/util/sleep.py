@@ -4,20 +4,46 @@ import time
 from typing import Callable
 
 from precise_bet import rprint
+from precise_bet.profiling import profiler
 
 
 def _sleep(time_sec: int, after: Callable[[int], None] | None = None):
     if after is None:
-        time.sleep(time_sec)
+        with profiler.phase("sleep"):
+            time.sleep(time_sec)
         return
 
     for i in range(time_sec):
-        time.sleep(1)
+        with profiler.phase("sleep"):
+            time.sleep(1)
         after(i)
 
 
 def sleep(time_sec: int, after: Callable[[int], None] | None = None):
     if time_sec < 0:
         time_sec = 0
-    rprint(f'等待 [bold]{time_sec}[/bold] 秒...')
+    rprint(f"等待 [bold]{time_sec}[/bold] 秒...", level="debug")
     _sleep(time_sec, after)
+
+
+def sleep_until(deadline: float, after: Callable[[int], None] | None = None) -> int:
+    """
+    等待至 `time.monotonic()` 达到 `deadline`
+
+    :param deadline: 截止时间
+    :param after: 每等待满 1 秒调用一次
+    :return: 调用 `after` 的次数
+    """
+
+    rprint(
+        f"等待 [bold]{max(deadline - time.monotonic(), 0):.1f}[/bold] 秒...",
+        level="debug",
+    )
+    ticks = 0
+    while (remaining := deadline - time.monotonic()) > 0:
+        with profiler.phase("sleep"):
+            time.sleep(min(remaining, 1))
+        if remaining >= 1 and after is not None:
+            after(ticks)
+            ticks += 1
+    return ticks
@@ -0,0 +1,54 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+import random
+import threading
+
+
+class UserAgentPool:
+    """
+    预先采样的 UA 池
+
+    fake_useragent 的数据集只在首次使用时加载一次，之后从池中以 O(1) 取出 UA。
+    """
+
+    def __init__(self, size: int = 64):
+        self.size = size
+        self._pool: list[str] | None = None
+        self._pinned: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> list[str]:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    from fake_useragent import UserAgent
+
+                    user_agent = UserAgent(platforms=["desktop"])
+                    # 只筛选一次数据集，避免每次 `random` 都重新筛选
+                    # noinspection PyProtectedMember
+                    candidates = list(
+                        dict.fromkeys(
+                            data["useragent"]
+                            for data in user_agent._filter_useragents()
+                        )
+                    )
+                    self._pool = random.sample(
+                        candidates, min(self.size, len(candidates))
+                    ) or [user_agent.random]
+        return self._pool
+
+    def random(self) -> str:
+        return random.choice(self.load())
+
+    def for_host(self, host: str) -> str:
+        """获取固定分配给指定主机的 UA，使同一主机的会话始终使用同一 UA"""
+
+        ua = self._pinned.get(host)
+        if ua is None:
+            pool = self.load()
+            with self._lock:
+                ua = self._pinned.setdefault(host, random.choice(pool))
+        return ua
+
+
+user_agents = UserAgentPool()
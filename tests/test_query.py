@@ -0,0 +1,22 @@
+#  Copyright (C) 2025  LTFan (aka xfqwdsj). For full copyright notice, see `main.py`.
+
+from typer.testing import CliRunner
+
+from precise_bet.data import QueryIndex
+from precise_bet.main import cli
+
+
+def test_read_without_data(tmp_path):
+    index = QueryIndex(tmp_path).load()
+
+    assert index.read(["a1210000"]).empty
+    assert index.read([]).empty
+
+
+def test_query_empty_project(tmp_path):
+    result = CliRunner().invoke(
+        cli, ["--log-format", "rich", "-p", str(tmp_path), "query"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "共 0 场比赛" in result.output